@@ -22,7 +22,7 @@ if config.config_file_name is not None:
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 from app.database.session import Base
-from app.models import users, patients, reports, images  # Make sure these are imported so they're registered
+from app.models import users, patients, reports, images, annotations, blobs, report_jobs, report_cache, stats  # Make sure these are imported so they're registered
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,43 @@
+"""add indexes for keyset pagination and list filters
+
+Revision ID: 3c9a7e21f5b6
+Revises: e2b7c6d104f8
+Create Date: 2026-10-18 12:02:38.640519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9a7e21f5b6'
+down_revision: Union[str, Sequence[str], None] = 'e2b7c6d104f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('reports', 'patient_id'),
+    ('reports', 'image_id'),
+    ('reports', 'created_at'),
+    ('images', 'patient_id'),
+    ('images', 'scan_type'),
+    ('images', 'upload_time'),
+    ('annotations', 'image_id'),
+    ('users', 'role'),
+    ('users', 'created_at'),
+    ('patients', 'date_of_birth'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in INDEXES:
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in reversed(INDEXES):
+        op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table)
@@ -0,0 +1,47 @@
+"""add stats_counters for the admin dashboard
+
+Revision ID: 4f7a2c9e8b13
+Revises: 6b2e8f4c1d97
+Create Date: 2026-10-18 15:03:27.481590
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f7a2c9e8b13'
+down_revision: Union[str, Sequence[str], None] = '6b2e8f4c1d97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ENTITY_TABLES = ['users', 'patients', 'reports', 'images', 'annotations']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'stats_counters',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    # Seed from the existing rows; from here on the app keeps them current
+    for table in ENTITY_TABLES:
+        op.execute(
+            f"INSERT INTO stats_counters (name, value, updated_at) "
+            f"SELECT '{table}', COUNT(*), CURRENT_TIMESTAMP FROM {table}"
+        )
+    op.execute(
+        "INSERT INTO stats_counters (name, value, updated_at) "
+        "SELECT 'users:role:' || COALESCE(role, 'none'), COUNT(*), CURRENT_TIMESTAMP FROM users "
+        "GROUP BY COALESCE(role, 'none')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('stats_counters')
@@ -0,0 +1,52 @@
+"""add DICOM header metadata to images
+
+Revision ID: 5f8e0b37a2c9
+Revises: c4d2a91e6b10
+Create Date: 2026-10-18 10:03:17.552190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f8e0b37a2c9'
+down_revision: Union[str, Sequence[str], None] = 'c4d2a91e6b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('images', sa.Column('mime_type', sa.String(), nullable=True))
+    op.add_column('images', sa.Column('modality', sa.String(length=16), nullable=True))
+    op.add_column('images', sa.Column('study_instance_uid', sa.String(length=64), nullable=True))
+    op.add_column('images', sa.Column('series_instance_uid', sa.String(length=64), nullable=True))
+    op.add_column('images', sa.Column('sop_instance_uid', sa.String(length=64), nullable=True))
+    op.add_column('images', sa.Column('instance_number', sa.Integer(), nullable=True))
+    op.add_column('images', sa.Column('width', sa.Integer(), nullable=True))
+    op.add_column('images', sa.Column('height', sa.Integer(), nullable=True))
+    op.add_column('images', sa.Column('number_of_frames', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_images_modality'), 'images', ['modality'], unique=False)
+    op.create_index(op.f('ix_images_study_instance_uid'), 'images', ['study_instance_uid'], unique=False)
+    op.create_index(op.f('ix_images_series_instance_uid'), 'images', ['series_instance_uid'], unique=False)
+    op.create_index(op.f('ix_images_sop_instance_uid'), 'images', ['sop_instance_uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_images_sop_instance_uid'), table_name='images')
+    op.drop_index(op.f('ix_images_series_instance_uid'), table_name='images')
+    op.drop_index(op.f('ix_images_study_instance_uid'), table_name='images')
+    op.drop_index(op.f('ix_images_modality'), table_name='images')
+    op.drop_column('images', 'number_of_frames')
+    op.drop_column('images', 'height')
+    op.drop_column('images', 'width')
+    op.drop_column('images', 'instance_number')
+    op.drop_column('images', 'sop_instance_uid')
+    op.drop_column('images', 'series_instance_uid')
+    op.drop_column('images', 'study_instance_uid')
+    op.drop_column('images', 'modality')
+    op.drop_column('images', 'mime_type')
@@ -0,0 +1,34 @@
+"""add trigram index for fuzzy patient name search
+
+Revision ID: 6b2e8f4c1d97
+Revises: 9d41b6e07a3c
+Create Date: 2026-10-18 14:20:51.603127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.patients import POSTGRES_TRGM_DDL
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b2e8f4c1d97'
+down_revision: Union[str, Sequence[str], None] = '9d41b6e07a3c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Other backends use the in-process index in app/services/patient_search.py
+    if op.get_bind().dialect.name == "postgresql":
+        for statement in POSTGRES_TRGM_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_patients_full_name_trgm")
@@ -0,0 +1,48 @@
+"""add ingest-time pixel statistics to images
+
+Revision ID: 8a3f6d2b9e14
+Revises: d51a8e3f7c62
+Create Date: 2026-10-18 17:05:21.664019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a3f6d2b9e14'
+down_revision: Union[str, Sequence[str], None] = 'd51a8e3f7c62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATS_COLUMNS = [
+    sa.Column('bit_depth', sa.Integer(), nullable=True),
+    sa.Column('pixel_min', sa.Float(), nullable=True),
+    sa.Column('pixel_max', sa.Float(), nullable=True),
+    sa.Column('pixel_mean', sa.Float(), nullable=True),
+    sa.Column('pixel_std', sa.Float(), nullable=True),
+    sa.Column('histogram', sa.JSON(), nullable=True),
+    sa.Column('contrast_score', sa.Float(), nullable=True),
+    sa.Column('exposure', sa.String(length=8), nullable=True),
+    sa.Column('quality_score', sa.Float(), nullable=True),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows stay NULL (decoding every stored image is no job for a migration);
+    # they just don't match the exposure / quality filters
+    for column in STATS_COLUMNS:
+        op.add_column('images', column)
+    op.create_index(op.f('ix_images_quality_score'), 'images', ['quality_score'], unique=False)
+    op.create_index('ix_images_exposure_upload_time', 'images', ['exposure', 'upload_time'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_images_exposure_upload_time', table_name='images')
+    op.drop_index(op.f('ix_images_quality_score'), table_name='images')
+    for column in reversed(STATS_COLUMNS):
+        op.drop_column('images', column.name)
@@ -0,0 +1,45 @@
+"""add full-text search index over reports
+
+Revision ID: 9d41b6e07a3c
+Revises: 3c9a7e21f5b6
+Create Date: 2026-10-18 13:41:09.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.reports import POSTGRES_SEARCH_DDL, SQLITE_SEARCH_DDL
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d41b6e07a3c'
+down_revision: Union[str, Sequence[str], None] = '3c9a7e21f5b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        # The generated column is filled for existing rows as part of the ALTER
+        for statement in POSTGRES_SEARCH_DDL:
+            op.execute(statement)
+    elif dialect == "sqlite":
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO reports_fts(reports_fts) VALUES('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_reports_search_vector")
+        op.execute("ALTER TABLE reports DROP COLUMN IF EXISTS search_vector")
+    elif dialect == "sqlite":
+        for trigger in ("reports_fts_insert", "reports_fts_delete", "reports_fts_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS reports_fts")
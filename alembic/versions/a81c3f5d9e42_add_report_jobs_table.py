@@ -0,0 +1,46 @@
+"""add report_jobs table
+
+Revision ID: a81c3f5d9e42
+Revises: 5f8e0b37a2c9
+Create Date: 2026-10-18 10:41:52.907113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a81c3f5d9e42'
+down_revision: Union[str, Sequence[str], None] = '5f8e0b37a2c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'report_jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('image_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('report_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['image_id'], ['images.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['report_id'], ['reports.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_report_jobs_image_id'), 'report_jobs', ['image_id'], unique=False)
+    op.create_index(op.f('ix_report_jobs_status'), 'report_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_report_jobs_status'), table_name='report_jobs')
+    op.drop_index(op.f('ix_report_jobs_image_id'), table_name='report_jobs')
+    op.drop_table('report_jobs')
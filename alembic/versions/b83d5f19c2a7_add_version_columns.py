@@ -0,0 +1,34 @@
+"""add version / updated_at to patients, reports and annotations
+
+Revision ID: b83d5f19c2a7
+Revises: 4f7a2c9e8b13
+Create Date: 2026-10-18 15:48:12.907364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83d5f19c2a7'
+down_revision: Union[str, Sequence[str], None] = '4f7a2c9e8b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ['patients', 'reports', 'annotations']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in VERSIONED_TABLES:
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'version')
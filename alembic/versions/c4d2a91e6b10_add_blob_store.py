@@ -0,0 +1,39 @@
+"""add content-addressed blob store
+
+Revision ID: c4d2a91e6b10
+Revises: 7e3189add88a
+Create Date: 2026-10-18 09:12:44.218305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d2a91e6b10'
+down_revision: Union[str, Sequence[str], None] = '7e3189add88a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+    op.add_column('images', sa.Column('sha256', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_images_sha256'), 'images', ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_images_sha256'), table_name='images')
+    op.drop_column('images', 'sha256')
+    op.drop_table('blobs')
@@ -0,0 +1,75 @@
+"""add typed box columns and a spatial index to annotations
+
+Revision ID: d51a8e3f7c62
+Revises: b83d5f19c2a7
+Create Date: 2026-10-18 16:37:54.410283
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.annotations import POSTGRES_SPATIAL_DDL, SQLITE_SPATIAL_DDL
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd51a8e3f7c62'
+down_revision: Union[str, Sequence[str], None] = 'b83d5f19c2a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BOX_COLUMNS = ['x_min', 'y_min', 'x_max', 'y_max']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in BOX_COLUMNS:
+        op.add_column('annotations', sa.Column(column, sa.Integer(), nullable=True))
+
+    # Boxes with a negative origin or no area (accepted before the schema checked) keep NULL
+    # columns: rtree_i32 rejects max < min, and they'd only skew overlap scores anyway
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("""
+            UPDATE annotations SET
+                x_min = (bounding_box->>'x')::int,
+                y_min = (bounding_box->>'y')::int,
+                x_max = (bounding_box->>'x')::int + (bounding_box->>'width')::int,
+                y_max = (bounding_box->>'y')::int + (bounding_box->>'height')::int
+            WHERE (bounding_box->>'x')::int >= 0 AND (bounding_box->>'y')::int >= 0
+              AND (bounding_box->>'width')::int >= 1 AND (bounding_box->>'height')::int >= 1
+        """)
+        for statement in POSTGRES_SPATIAL_DDL:
+            op.execute(statement)
+    elif dialect == "sqlite":
+        op.execute("""
+            UPDATE annotations SET
+                x_min = json_extract(bounding_box, '$.x'),
+                y_min = json_extract(bounding_box, '$.y'),
+                x_max = json_extract(bounding_box, '$.x') + json_extract(bounding_box, '$.width'),
+                y_max = json_extract(bounding_box, '$.y') + json_extract(bounding_box, '$.height')
+            WHERE json_extract(bounding_box, '$.x') >= 0 AND json_extract(bounding_box, '$.y') >= 0
+              AND json_extract(bounding_box, '$.width') >= 1 AND json_extract(bounding_box, '$.height') >= 1
+        """)
+        # Triggers only see rows written from here on, so load the existing ones
+        for statement in SQLITE_SPATIAL_DDL:
+            op.execute(statement)
+        op.execute("""
+            INSERT INTO annotations_rtree
+            SELECT id, image_id, image_id, x_min, x_max, y_min, y_max FROM annotations
+            WHERE x_min IS NOT NULL AND image_id IS NOT NULL
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_annotations_image_bbox")
+    elif dialect == "sqlite":
+        for trigger in ("annotations_rtree_insert", "annotations_rtree_update", "annotations_rtree_delete"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS annotations_rtree")
+    for column in reversed(BOX_COLUMNS):
+        op.drop_column('annotations', column)
@@ -0,0 +1,46 @@
+"""add ai_report_cache table
+
+Revision ID: e2b7c6d104f8
+Revises: a81c3f5d9e42
+Create Date: 2026-10-18 11:20:05.114872
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7c6d104f8'
+down_revision: Union[str, Sequence[str], None] = 'a81c3f5d9e42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'ai_report_cache',
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('image_sha256', sa.String(length=64), nullable=False),
+        sa.Column('prompt_version', sa.String(length=16), nullable=False),
+        sa.Column('model_name', sa.String(), nullable=False),
+        sa.Column('findings', sa.Text(), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('hit_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_hit_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('cache_key'),
+    )
+    op.create_index(op.f('ix_ai_report_cache_image_sha256'), 'ai_report_cache', ['image_sha256'], unique=False)
+    op.create_index(op.f('ix_ai_report_cache_last_hit_at'), 'ai_report_cache', ['last_hit_at'], unique=False)
+    op.add_column('report_jobs', sa.Column('bypass_cache', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('report_jobs', 'bypass_cache')
+    op.drop_index(op.f('ix_ai_report_cache_last_hit_at'), table_name='ai_report_cache')
+    op.drop_index(op.f('ix_ai_report_cache_image_sha256'), table_name='ai_report_cache')
+    op.drop_table('ai_report_cache')
@@ -0,0 +1,39 @@
+"""add perceptual hash and near-duplicate link to images
+
+Revision ID: f06c4b8e2a71
+Revises: 8a3f6d2b9e14
+Create Date: 2026-10-18 17:32:46.105837
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f06c4b8e2a71'
+down_revision: Union[str, Sequence[str], None] = '8a3f6d2b9e14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FK_NAME = 'fk_images_duplicate_of_id_images'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('images', sa.Column('phash', sa.BigInteger(), nullable=True))
+    op.add_column('images', sa.Column('duplicate_of_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_images_duplicate_of_id'), 'images', ['duplicate_of_id'], unique=False)
+    if op.get_bind().dialect.name != "sqlite":
+        # SQLite can't add a constraint to an existing table; the ORM never relies on it there
+        op.create_foreign_key(FK_NAME, 'images', 'images', ['duplicate_of_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        op.drop_constraint(FK_NAME, 'images', type_='foreignkey')
+    op.drop_index(op.f('ix_images_duplicate_of_id'), table_name='images')
+    op.drop_column('images', 'duplicate_of_id')
+    op.drop_column('images', 'phash')
@@ -1,8 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm.exc import StaleDataError
 from app.routers import users, auth, patients, reports, images, ai
-from app.database.init_db import init_db
-from fastapi.staticfiles import StaticFiles
+from app.database import init_db  # noqa: F401  registers every model on Base
+from app.core.storage import BlobStaticFiles
+from app.services.report_queue import report_queue
+from app.core.hashing import password_pool
+from app.services.report_pdf import pdf_pool
+from app.services.stats import stats_refresher
+from app.core.uploads import session_sweeper
 from dotenv import load_dotenv
 from starlette.middleware.sessions import SessionMiddleware
 import os
@@ -28,8 +35,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ✅ Initialize database
-init_db()
+# ✅ Two writers raced on the same row (version column mismatch): the later one retries
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request, exc):
+    return JSONResponse(status_code=409, content={"detail": "Resource was modified concurrently, reload and retry"})
+
+# ✅ Start/stop the AI report worker pool with the app
+@app.on_event("startup")
+async def start_report_queue():
+    await report_queue.start()
+
+@app.on_event("shutdown")
+async def stop_report_queue():
+    await report_queue.stop()
+
+# ✅ Periodically recount the admin dashboard counters
+@app.on_event("startup")
+async def start_stats_refresher():
+    stats_refresher.start()
+
+@app.on_event("shutdown")
+async def stop_stats_refresher():
+    await stats_refresher.stop()
+
+# ✅ Periodically drop abandoned resumable uploads
+@app.on_event("startup")
+async def start_session_sweeper():
+    session_sweeper.start()
+
+@app.on_event("shutdown")
+async def stop_session_sweeper():
+    await session_sweeper.stop()
+
+# ✅ Stop the password hashing worker processes (started on first login)
+@app.on_event("shutdown")
+def stop_password_pool():
+    password_pool.shutdown()
+
+# ✅ Stop the PDF rendering worker processes (started on first export)
+@app.on_event("shutdown")
+def stop_pdf_pool():
+    pdf_pool.shutdown()
 
 # ✅ Include Routers
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
@@ -38,7 +84,7 @@ app.include_router(patients.router, prefix="/patients", tags=["Patients"])
 app.include_router(reports.router, prefix="/reports", tags=["Reports"])
 app.include_router(images.router, prefix="/images", tags=["Images"])
 app.include_router(ai.router, prefix="/ai", tags=["AI Assistant"])
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount("/uploads", BlobStaticFiles(), name="uploads")
 app.include_router(annotations.router, prefix="/annotations", tags=["Annotations"])
 
 # ✅ Root route
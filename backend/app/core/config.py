@@ -6,3 +6,98 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+
+# ---------- Uploads ----------
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))  # bytes buffered per disk write
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", 2 * 1024 * 1024 * 1024))  # 2 GiB
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", 24 * 3600))  # seconds without a chunk before a resumable upload is dropped
+UPLOAD_SWEEP_INTERVAL = int(os.getenv("UPLOAD_SWEEP_INTERVAL", 3600))  # seconds; 0 disables the sweep
+
+# ---------- Derived images (thumbnails / tile pyramids) ----------
+TILE_SIZE = int(os.getenv("TILE_SIZE", 256))
+TILE_QUALITY = int(os.getenv("TILE_QUALITY", 80))
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", 256))
+BUILD_TILES_AT_INGEST = os.getenv("BUILD_TILES_AT_INGEST", "true").lower() == "true"
+
+# ---------- Ingest image statistics ----------
+IMAGE_STATS_MAX_PIXELS = int(os.getenv("IMAGE_STATS_MAX_PIXELS", 1024 * 1024))  # larger images are subsampled
+IMAGE_STATS_HISTOGRAM_BINS = int(os.getenv("IMAGE_STATS_HISTOGRAM_BINS", 32))  # over the 8-bit display range
+# Mean display brightness (0-255) below / above which an image counts as under- / overexposed
+IMAGE_UNDEREXPOSED_MEAN = float(os.getenv("IMAGE_UNDEREXPOSED_MEAN", 60))
+IMAGE_OVEREXPOSED_MEAN = float(os.getenv("IMAGE_OVEREXPOSED_MEAN", 195))
+# Max pHash Hamming distance (of 64 bits) at which an upload is linked to an existing image
+DUPLICATE_MAX_DISTANCE = int(os.getenv("DUPLICATE_MAX_DISTANCE", 6))
+# The duplicate index re-reads this many ids below the newest it has seen (rows other workers
+# commit out of id order), and reloads in full this often (anything older, deletes elsewhere)
+DUPLICATE_INDEX_OVERLAP = int(os.getenv("DUPLICATE_INDEX_OVERLAP", 1000))
+DUPLICATE_INDEX_RESYNC_SECONDS = int(os.getenv("DUPLICATE_INDEX_RESYNC_SECONDS", 600))
+
+# ---------- AI report generation ----------
+AI_PROVIDER = os.getenv("AI_PROVIDER", "gemini")  # "gemini" or "stub" (offline, no API key)
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+# Stub provider knobs, for offline load tests of the report pipeline
+AI_STUB_LATENCY = float(os.getenv("AI_STUB_LATENCY", 0.5))  # mean seconds per stub call
+AI_STUB_LATENCY_JITTER = float(os.getenv("AI_STUB_LATENCY_JITTER", 0.0))  # std dev / spread, seconds
+AI_STUB_LATENCY_DIST = os.getenv("AI_STUB_LATENCY_DIST", "fixed")  # fixed, uniform, normal, lognormal
+AI_STUB_ERROR_RATE = float(os.getenv("AI_STUB_ERROR_RATE", 0.0))  # fraction of calls that fail
+AI_STUB_OUTPUT_CHARS = int(os.getenv("AI_STUB_OUTPUT_CHARS", 1200))
+AI_STUB_SEED = int(os.getenv("AI_STUB_SEED", 42))
+AI_WORKERS = int(os.getenv("AI_WORKERS", 4))
+AI_QUEUE_SIZE = int(os.getenv("AI_QUEUE_SIZE", 1000))
+AI_MAX_ATTEMPTS = int(os.getenv("AI_MAX_ATTEMPTS", 3))
+AI_RETRY_BACKOFF = float(os.getenv("AI_RETRY_BACKOFF", 2.0))  # seconds, doubled per attempt
+AI_RETRY_BACKOFF_MAX = float(os.getenv("AI_RETRY_BACKOFF_MAX", 60.0))
+AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", 7 * 24 * 3600))  # seconds
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", 50000))
+# What the vision model is sent: longest edge in pixels after downscaling, and the encoding
+AI_INPUT_MAX_EDGE = int(os.getenv("AI_INPUT_MAX_EDGE", 1536))
+AI_INPUT_FORMAT = os.getenv("AI_INPUT_FORMAT", "jpeg").lower()  # jpeg, png or webp
+AI_INPUT_QUALITY = int(os.getenv("AI_INPUT_QUALITY", 90))  # jpeg / webp only
+
+# ---------- Patient search ----------
+# pg_trgm's own defaults; the in-process fallback index uses the same cut-offs
+PATIENT_SEARCH_SIMILARITY = float(os.getenv("PATIENT_SEARCH_SIMILARITY", 0.3))
+PATIENT_SEARCH_WORD_SIMILARITY = float(os.getenv("PATIENT_SEARCH_WORD_SIMILARITY", 0.6))
+
+# ---------- Bulk import / export ----------
+PATIENT_IMPORT_BATCH_SIZE = int(os.getenv("PATIENT_IMPORT_BATCH_SIZE", 5000))  # rows per INSERT batch and commit
+PATIENT_IMPORT_MAX_ERRORS = int(os.getenv("PATIENT_IMPORT_MAX_ERRORS", 1000))  # error rows listed in the result
+PATIENT_EXPORT_BATCH_SIZE = int(os.getenv("PATIENT_EXPORT_BATCH_SIZE", 5000))  # rows fetched per cursor round trip
+REPORT_EXPORT_BATCH_SIZE = int(os.getenv("REPORT_EXPORT_BATCH_SIZE", 1000))  # reports carry long text; smaller batches
+BULK_STATEMENT_TIMEOUT_MS = int(os.getenv("BULK_STATEMENT_TIMEOUT_MS", 0))  # imports and exports; 0 = no limit
+
+# ---------- Report PDFs ----------
+# Rendering runs on its own process pool; past REPORT_PDF_QUEUE_SIZE pending renders we shed load (503)
+REPORT_PDF_WORKERS = int(os.getenv("REPORT_PDF_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+REPORT_PDF_QUEUE_SIZE = int(os.getenv("REPORT_PDF_QUEUE_SIZE", 256))  # queued + running
+REPORT_PDF_BATCH_MAX = int(os.getenv("REPORT_PDF_BATCH_MAX", 5000))  # reports per zip
+
+# ---------- Auth ----------
+# Authenticated users are cached per token subject; role changes and deletions made in
+# this process invalidate immediately, other workers pick them up within the TTL.
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", 60))  # seconds
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", 10000))
+# bcrypt runs in worker processes so a burst of logins can't starve the event loop or
+# the request threadpool; past PASSWORD_HASH_QUEUE_SIZE pending calls we shed load (503).
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 64))  # queued + running
+
+# ---------- Admin dashboard stats ----------
+# Counters are kept current on every ORM write; the periodic recount corrects drift from
+# bulk/raw-SQL writes and DB-side cascades. 0 disables it.
+STATS_REFRESH_INTERVAL = int(os.getenv("STATS_REFRESH_INTERVAL", 3600))  # seconds
+STATS_AI_REPORT_DAYS = int(os.getenv("STATS_AI_REPORT_DAYS", 30))  # days of AI reports/day shown
+
+# ---------- Database connection pool ----------
+# Per process, shared half and half by the sync and the async engine
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))  # connections kept open
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))  # extra connections allowed under burst
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # seconds; close connections older than this
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Default per-transaction statement timeout (Postgres); endpoints can ask for a longer one
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))  # 0 = no limit
+
+# ---------- Annotations ----------
+MAX_BULK_ANNOTATIONS = int(os.getenv("MAX_BULK_ANNOTATIONS", 10000))  # boxes per bulk request
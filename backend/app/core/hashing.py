@@ -0,0 +1,32 @@
+from app.core.config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_SIZE
+from app.core.process_pool import BoundedProcessPool
+from app.core.security import get_password_hash, verify_password
+
+
+class PasswordHashPool(BoundedProcessPool):
+    """bcrypt hashing/verification on a fixed-size process pool with a pending-call limit.
+
+    Each call costs a few hundred ms of CPU; see BoundedProcessPool for why that runs
+    out of process.
+    """
+
+    service = "Authentication service"
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_QUEUE_SIZE):
+        super().__init__(workers, max_pending)
+
+    # Sync endpoints already run in the request threadpool; they just wait on the worker
+    def hash(self, password: str) -> str:
+        return self.result(self.submit(get_password_hash, password))
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self.result(self.submit(verify_password, password, hashed_password))
+
+    async def ahash(self, password: str) -> str:
+        return await self.aresult(self.submit(get_password_hash, password))
+
+    async def averify(self, password: str, hashed_password: str) -> bool:
+        return await self.aresult(self.submit(verify_password, password, hashed_password))
+
+
+password_pool = PasswordHashPool()
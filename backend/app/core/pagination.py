@@ -0,0 +1,100 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+class Keyset:
+    """Cursor (keyset) pagination over one sortable column with the primary key as tiebreaker.
+
+    `sort` is a column name from `columns`, prefixed with "-" for descending. The cursor
+    carries the last row's (sort value, id), so each page is an index range scan and the
+    cost does not grow with how deep the client has paged.
+    """
+
+    def __init__(self, columns: dict, id_column, sort: str, cursor: Optional[str], limit: int):
+        self.descending = sort.startswith("-")
+        self.sort_name = sort.lstrip("-")
+        if self.sort_name not in columns:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot sort by '{self.sort_name}'; choose from {', '.join(sorted(columns))}",
+            )
+        self.column = columns[self.sort_name]
+        self.id_column = id_column
+        self.limit = limit
+        self.after = self._decode(cursor) if cursor else None
+
+    # ---------- Cursor encoding ----------
+    def _encode(self, value: Any, row_id: int) -> str:
+        if isinstance(value, datetime):
+            value = {"dt": value.isoformat()}
+        elif isinstance(value, date):
+            value = {"d": value.isoformat()}
+        payload = json.dumps({"s": self.sort_name, "v": value, "id": row_id})
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def _decode(self, cursor: str):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded))
+            value = payload["v"]
+            if isinstance(value, dict) and "dt" in value:
+                value = datetime.fromisoformat(value["dt"])
+            elif isinstance(value, dict) and "d" in value:
+                value = date.fromisoformat(value["d"])
+            if payload["s"] != self.sort_name:
+                raise ValueError("cursor was issued for a different sort")
+            return value, int(payload["id"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
+
+    # ---------- Query / result ----------
+    def apply(self, stmt):
+        """Add the keyset predicate, ORDER BY and LIMIT (one extra row to detect a next page).
+
+        Rows with a NULL sort value come last in either direction (Postgres and SQLite
+        disagree on the default), and the predicate spells out the NULL cases, since a
+        comparison with NULL matches nothing.
+        """
+        if self.after is not None:
+            value, last_id = self.after
+            if self.column is self.id_column:
+                stmt = stmt.where(self._past(self.id_column, last_id))
+            elif value is None:
+                # Already into the NULL tail: only the rest of it is left
+                stmt = stmt.where(self.column.is_(None), self._past(self.id_column, last_id))
+            else:
+                stmt = stmt.where(or_(
+                    self._past(self.column, value),
+                    and_(self.column == value, self._past(self.id_column, last_id)),
+                    self.column.is_(None),
+                ))
+
+        id_order = self.id_column.desc() if self.descending else self.id_column.asc()
+        if self.column is self.id_column:
+            order = [id_order]
+        else:
+            order = [(self.column.desc() if self.descending else self.column.asc()).nulls_last(), id_order]
+        return stmt.order_by(*order).limit(self.limit + 1)
+
+    def _past(self, column, value):
+        return column < value if self.descending else column > value
+
+    def page(self, rows: list, items: Optional[list] = None, key=lambda row: row) -> dict:
+        """Envelope for fetched rows; `items` overrides what is returned (e.g. serialized rows)."""
+        has_more = len(rows) > self.limit
+        rows = rows[: self.limit]
+        items = (items if items is not None else rows)[: self.limit]
+
+        next_cursor = None
+        if has_more and rows:
+            last = key(rows[-1])
+            next_cursor = self._encode(getattr(last, self.column.key), getattr(last, self.id_column.key))
+        return {"items": items, "next_cursor": next_cursor, "limit": self.limit}
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from app.core.config import PRINCIPAL_CACHE_TTL, PRINCIPAL_CACHE_MAX_ENTRIES
+
+
+@dataclass(frozen=True)
+class Principal:
+    """What a request knows about its authenticated user; detached from any DB session."""
+
+    id: int
+    username: str
+    role: str
+
+
+class PrincipalCache:
+    """Bounded LRU of Principal snapshots keyed by token subject (username), with a TTL."""
+
+    def __init__(self, ttl: float = PRINCIPAL_CACHE_TTL, max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[str, tuple[float, Principal]]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, subject: str, load: Callable[[str], Optional[Principal]]) -> Optional[Principal]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(subject)
+            if cached and cached[0] > now:
+                self._entries.move_to_end(subject)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            generation = self._generation
+
+        principal = load(subject)
+        if principal is None:
+            return None
+
+        with self._lock:
+            # An invalidation while we were loading means our row may predate it
+            if generation == self._generation:
+                self._entries[subject] = (now + self.ttl, principal)
+                self._entries.move_to_end(subject)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return principal
+
+    def invalidate(self, subject: str) -> None:
+        with self._lock:
+            self._entries.pop(subject, None)
+            self._generation += 1
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+principal_cache = PrincipalCache()
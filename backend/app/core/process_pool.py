@@ -0,0 +1,106 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from fastapi import HTTPException
+
+# The server has threads by the time the pool starts; forking it could copy a lock some other
+# thread holds. Workers come from a clean single-threaded server process instead.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class BoundedProcessPool:
+    """CPU-bound calls on a lazily started process pool with a pending-call limit.
+
+    Work here would otherwise hold the GIL (or the event loop, from async handlers) for
+    as long as it runs; in the pool it only occupies a worker, and once `max_pending`
+    calls are queued or running new ones fail fast with 503 instead of piling up.
+    """
+
+    service = "Worker pool"  # named in the 503 detail
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.completed = 0
+        self.rejected = 0
+        self._pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _release(self, executor: ProcessPoolExecutor, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+            # A worker died mid-call (e.g. OOM-killed): the pool is unusable, start afresh next time
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                if self._executor is executor:
+                    self._executor = None
+
+    def _restarting(self) -> HTTPException:
+        return HTTPException(status_code=503, detail=f"{self.service} restarting, please retry")
+
+    def submit(self, fn, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"{self.service} is busy, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(START_METHOD)
+                )
+            executor = self._executor
+            self._pending += 1
+
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool for the next caller
+            with self._lock:
+                self._pending -= 1
+                if self._executor is executor:
+                    self._executor = None
+            raise self._restarting()
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(functools.partial(self._release, executor))
+        return future
+
+    def result(self, future: Future):
+        """future.result(), with a worker dying mid-call reported like a failed submit."""
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            raise self._restarting()
+
+    async def aresult(self, future: Future):
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            raise self._restarting()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
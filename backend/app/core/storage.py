@@ -0,0 +1,191 @@
+import logging
+import os
+import re
+import shutil
+import uuid
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.staticfiles import StaticFiles
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import UPLOAD_DIR
+from app.models.blobs import Blob
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = os.path.join(UPLOAD_DIR, "blobs")
+DERIVED_DIR = os.path.join(UPLOAD_DIR, "derived")
+DIGEST_RE = re.compile(r"[0-9a-f]{64}")
+
+# session.info keys for file changes that wait on the transaction's outcome
+PENDING_PUTS = "blob_store.pending_puts"
+PENDING_DELETES = "blob_store.pending_deletes"
+
+
+class BlobStore:
+    """Content-addressed file store: blobs/ab/cd/abcd... keyed by SHA-256.
+
+    Two levels of two hex characters give 65,536 leaf directories, so even tens of
+    millions of blobs stay at a few hundred entries per directory. Reference counts
+    live in the `blobs` table and are changed inside the caller's transaction; the
+    matching file moves (`stage`, `release`) only take effect once that transaction
+    commits, so a rollback never leaves a row without its file or a file without its row.
+    """
+
+    def __init__(self, root: str, derived_root: str, depth: int = 2, width: int = 2):
+        self.root = root
+        self.derived_root = derived_root
+        self.depth = depth
+        self.width = width
+        self.trash = os.path.join(root, ".trash")
+        os.makedirs(self.trash, exist_ok=True)
+
+    def relpath(self, digest: str) -> str:
+        shards = [digest[i * self.width:(i + 1) * self.width] for i in range(self.depth)]
+        return os.path.join(*shards, digest)
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, self.relpath(digest))
+
+    def derived_path(self, digest: str) -> str:
+        """Directory of files generated from a blob; they go when the blob does."""
+        return os.path.join(self.derived_root, digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def put(self, src_path: str, digest: str) -> str:
+        """Move a fully written temp file into the store (atomic, same filesystem)."""
+        dest = self.path(digest)
+        if os.path.exists(dest):
+            # Identical content is already stored; keep the existing copy.
+            os.remove(src_path)
+            return dest
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(src_path, dest)
+        return dest
+
+    def stage(self, db: Session, src_path: str, digest: str) -> str:
+        """`put` once the session commits; the temp file is removed if it rolls back instead.
+        Returns the path the blob will have."""
+        db.info.setdefault(PENDING_PUTS, []).append((src_path, digest))
+        return self.path(digest)
+
+    # ---------- Reference counting ----------
+    def add_ref(self, db: Session, digest: str, size: int) -> None:
+        updated = (
+            db.query(Blob)
+            .filter(Blob.sha256 == digest)
+            .update({Blob.ref_count: Blob.ref_count + 1}, synchronize_session=False)
+        )
+        if updated:
+            return
+        try:
+            with db.begin_nested():
+                db.add(Blob(sha256=digest, size=size, ref_count=1))
+        except IntegrityError:
+            # A concurrent upload of the same content created the row first.
+            db.query(Blob).filter(Blob.sha256 == digest).update(
+                {Blob.ref_count: Blob.ref_count + 1}, synchronize_session=False
+            )
+
+    def release(self, db: Session, digest: str) -> bool:
+        """Drop one reference; when it was the last, the file goes once the session commits.
+        Returns True if the blob is being deleted."""
+        blob = db.query(Blob).filter(Blob.sha256 == digest).with_for_update().first()
+        if not blob:
+            return False
+        blob.ref_count -= 1
+        if blob.ref_count > 0:
+            return False
+
+        db.delete(blob)
+        db.flush()
+        # Move the file (and its thumbnails, tiles, model inputs) aside while the row lock is
+        # held: a concurrent add_ref for this digest waits for our commit and then stores a
+        # fresh copy under the real path, which the deferred removal of the trash can't touch.
+        moved = []
+        for path in (self.path(digest), self.derived_path(digest)):
+            trashed = os.path.join(self.trash, f"{os.path.basename(path)}.{uuid.uuid4().hex}")
+            try:
+                os.replace(path, trashed)
+            except FileNotFoundError:
+                continue
+            moved.append((path, trashed))
+        db.info.setdefault(PENDING_DELETES, []).extend(moved)
+        return True
+
+    # ---------- Transaction outcome ----------
+    def _committed(self, session: Session) -> None:
+        for src_path, digest in session.info.pop(PENDING_PUTS, []):
+            try:
+                self.put(src_path, digest)
+            except OSError as e:
+                logger.error("Could not store blob %s: %s", digest, e)
+        for _, trashed in session.info.pop(PENDING_DELETES, []):
+            _remove(trashed)
+
+    def _rolled_back(self, session: Session) -> None:
+        for src_path, _ in session.info.pop(PENDING_PUTS, []):
+            _remove(src_path)
+        for path, trashed in session.info.pop(PENDING_DELETES, []):
+            # Same content either way, so if a re-upload already put it back, keep that copy
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                os.replace(trashed, path)
+            except OSError:
+                _remove(trashed)
+
+    def resolve(self, image) -> Optional[str]:
+        """Local path for an Image row, falling back to pre-store uploads."""
+        if image.sha256:
+            return self.path(image.sha256)
+        if image.file_path:
+            return image.file_path
+        return os.path.join(os.path.abspath(UPLOAD_DIR), image.filename)
+
+
+blob_store = BlobStore(BLOB_DIR, DERIVED_DIR)
+
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_blob_changes(session):
+    blob_store._committed(session)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _revert_blob_changes(session, transaction):
+    # Runs after after_commit, which has already taken the lists; anything left over
+    # belongs to an outermost transaction that rolled back (or was closed uncommitted)
+    if transaction.parent is None:
+        blob_store._rolled_back(session)
+
+
+class BlobStaticFiles(StaticFiles):
+    """Serves /uploads/<sha256> out of the blob store, and legacy /uploads/<filename> as before."""
+
+    def __init__(self, store: BlobStore = blob_store, **kwargs):
+        self.store = store
+        super().__init__(directory=UPLOAD_DIR, **kwargs)
+
+    def get_path(self, scope) -> str:
+        path = super().get_path(scope)
+        if DIGEST_RE.fullmatch(path):
+            return os.path.relpath(self.store.path(path), UPLOAD_DIR)
+        if path.split(os.sep)[0] == ".incoming":
+            # Never expose in-flight partial uploads.
+            raise HTTPException(status_code=404, detail="Not Found")
+        return path
@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+
+from app.database.session import SessionLocal
+
+FORMATS = ("csv", "ndjson")
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+def detect_format(fmt: Optional[str], filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Explicit format, else the file extension, else the content type."""
+    if fmt:
+        return fmt if fmt in FORMATS else None
+    for ext, name in EXTENSIONS.items():
+        if (filename or "").lower().endswith(ext):
+            return name
+    for name, media_type in MEDIA_TYPES.items():
+        if (content_type or "").startswith(media_type):
+            return name
+    return None
+
+
+# ---------- Reading ----------
+def iter_records(stream: io.TextIOBase, fmt: str) -> Iterator[tuple[int, object]]:
+    """(line number, dict) per record, or (line number, exception) for one that can't be parsed.
+    Reads line by line, so memory stays flat whatever the file size."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield reader.line_num, e
+                continue
+            # Cells beyond the header land under None; they're not fields
+            yield reader.line_num, {k: v for k, v in row.items() if k is not None}
+    else:
+        for line_num, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_num, e
+                continue
+            yield line_num, record if isinstance(record, dict) else ValueError("Expected a JSON object")
+
+
+# ---------- Writing ----------
+def _plain(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def encode(batches: Iterable[Sequence[Sequence]], columns: Sequence[str], fmt: str) -> Iterator[bytes]:
+    """One chunk of CSV (header first) or NDJSON per batch of rows."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for rows in batches:
+            writer.writerows([_plain(v) for v in row] for row in rows)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()  # header of an empty export
+    else:
+        for rows in batches:
+            yield "".join(
+                json.dumps(dict(zip(columns, map(_plain, row))), separators=(",", ":")) + "\n" for row in rows
+            ).encode()
+
+
+def gzipped(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream chunk by chunk, without buffering the whole body."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # 16+: gzip framing
+    for chunk in chunks:
+        # Sync flush per chunk: each batch reaches the client now rather than when zlib's
+        # window fills; costs a few bytes per (already large) chunk
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def stream_query(
+    build_stmt: Callable[[Session], Select], columns: Sequence[str], fmt: str, batch_size: int,
+    statement_timeout_ms: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Encoded rows of the statement, read through a server-side cursor batch by batch.
+
+    Opens its own session: a streaming response outlives the request's dependencies. The
+    statement is built against that session (some filters depend on the dialect). Long
+    exports would trip the default statement timeout, so the caller picks one (None = off).
+    """
+    db = SessionLocal(info={"statement_timeout_ms": statement_timeout_ms})
+    try:
+        result = db.execute(build_stmt(db).execution_options(yield_per=batch_size))
+        yield from encode(result.partitions(), columns, fmt)
+    finally:
+        db.close()
@@ -0,0 +1,282 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import UPLOAD_DIR, UPLOAD_CHUNK_SIZE, MAX_UPLOAD_SIZE, UPLOAD_SESSION_TTL, UPLOAD_SWEEP_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Partial files live inside UPLOAD_DIR so the final os.replace() stays on one
+# filesystem and is atomic.
+INCOMING_DIR = os.path.join(UPLOAD_DIR, ".incoming")
+os.makedirs(INCOMING_DIR, exist_ok=True)
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    path: str
+    sha256: str
+    size: int
+
+
+@dataclass
+class UploadSession:
+    upload_id: str
+    filename: str
+    size: int
+    offset: int = 0
+
+
+# upload_id -> (offset, hasher) for sessions handled by this process.
+_session_hashers: dict[str, tuple[int, "hashlib._Hash"]] = {}
+_session_locks: dict[str, asyncio.Lock] = {}
+
+
+# ---------- Chunk sources ----------
+async def iter_upload_file(file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+# ---------- Disk helpers ----------
+def _flush(f, hasher, data) -> None:
+    # hashlib releases the GIL for large buffers, so hashing here overlaps with other requests
+    hasher.update(data)
+    f.write(data)
+
+
+def _fsync(f) -> None:
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _unlink_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _append_chunks(f, chunks: AsyncIterator[bytes], hasher, size: int, limit: int) -> int:
+    buffer = bytearray()
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(status_code=413, detail=f"Upload exceeds the {limit} byte limit")
+        buffer += chunk
+        if len(buffer) >= UPLOAD_CHUNK_SIZE:
+            await run_in_threadpool(_flush, f, hasher, buffer)
+            buffer.clear()
+    if buffer:
+        await run_in_threadpool(_flush, f, hasher, buffer)
+    return size
+
+
+async def save_upload(
+    chunks: AsyncIterator[bytes], dest_path: Optional[str] = None, max_size: int = MAX_UPLOAD_SIZE
+) -> StoredUpload:
+    """Stream chunks to a temp file, hashing as we go, then move it into place atomically.
+
+    Without a dest_path the finished temp file is returned as-is, for callers (like the
+    blob store) that only know the final location once the digest is known.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=INCOMING_DIR, suffix=".part")
+    hasher = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as f:
+            size = await _append_chunks(f, chunks, hasher, 0, max_size)
+            await run_in_threadpool(_fsync, f)
+        if dest_path:
+            os.replace(tmp_path, dest_path)
+    except BaseException:
+        _unlink_quietly(tmp_path)
+        raise
+    return StoredUpload(path=dest_path or tmp_path, sha256=hasher.hexdigest(), size=size)
+
+
+# ---------- Resumable sessions ----------
+def _part_path(upload_id: str) -> str:
+    return os.path.join(INCOMING_DIR, f"{upload_id}.part")
+
+
+def _meta_path(upload_id: str) -> str:
+    return os.path.join(INCOMING_DIR, f"{upload_id}.json")
+
+
+def create_session(filename: str, size: int) -> UploadSession:
+    if size > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds the {MAX_UPLOAD_SIZE} byte limit")
+
+    session = UploadSession(upload_id=uuid.uuid4().hex, filename=os.path.basename(filename), size=size)
+    open(_part_path(session.upload_id), "wb").close()
+    with open(_meta_path(session.upload_id), "w") as f:
+        json.dump({"filename": session.filename, "size": session.size}, f)
+    return session
+
+
+def load_session(upload_id: str) -> UploadSession:
+    try:
+        upload_id = uuid.UUID(hex=upload_id).hex
+        with open(_meta_path(upload_id)) as f:
+            meta = json.load(f)
+    except (ValueError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+
+    return UploadSession(
+        upload_id=upload_id,
+        filename=meta["filename"],
+        size=meta["size"],
+        offset=os.path.getsize(_part_path(upload_id)),
+    )
+
+
+def _rehash_part(upload_id: str, length: int):
+    # Another process (or a restart) handled earlier chunks; rebuild the digest from disk.
+    hasher = hashlib.sha256()
+    remaining = length
+    with open(_part_path(upload_id), "rb") as f:
+        while remaining:
+            chunk = f.read(min(UPLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            remaining -= len(chunk)
+    return hasher
+
+
+async def _session_hasher(session: UploadSession):
+    cached = _session_hashers.get(session.upload_id)
+    if cached and cached[0] == session.offset:
+        return cached[1]
+    return await run_in_threadpool(_rehash_part, session.upload_id, session.offset)
+
+
+def _check_open(session: UploadSession) -> None:
+    # Under the lock: a request that queued behind finish_session (or the sweep) finds it gone
+    if not os.path.exists(_meta_path(session.upload_id)):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+
+
+async def append_to_session(session: UploadSession, offset: int, chunks: AsyncIterator[bytes]) -> UploadSession:
+    lock = _session_locks.setdefault(session.upload_id, asyncio.Lock())
+    async with lock:
+        _check_open(session)
+        # Re-read the offset under the lock; a concurrent request may have moved it.
+        current = os.path.getsize(_part_path(session.upload_id))
+        if offset != current:
+            raise HTTPException(status_code=409, detail=f"Upload offset mismatch, expected {current}")
+        session.offset = current
+
+        hasher = await _session_hasher(session)
+        with open(_part_path(session.upload_id), "ab") as f:
+            try:
+                session.offset = await _append_chunks(f, chunks, hasher, session.offset, session.size)
+            finally:
+                # Keep whatever reached disk so the client can resume from there.
+                await run_in_threadpool(_fsync, f)
+                session.offset = os.path.getsize(_part_path(session.upload_id))
+        _session_hashers[session.upload_id] = (session.offset, hasher)
+    return session
+
+
+async def finish_session(session: UploadSession, dest_path: Optional[str] = None) -> StoredUpload:
+    lock = _session_locks.setdefault(session.upload_id, asyncio.Lock())
+    async with lock:
+        # Same lock as append_to_session, so a PATCH can't grow the file while it is handed off
+        _check_open(session)
+        session.offset = os.path.getsize(_part_path(session.upload_id))
+        if session.offset != session.size:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incomplete: received {session.offset} of {session.size} bytes",
+            )
+
+        hasher = await _session_hasher(session)
+        part_path = _part_path(session.upload_id)
+        if dest_path:
+            os.replace(part_path, dest_path)
+        _unlink_quietly(_meta_path(session.upload_id))
+        _session_hashers.pop(session.upload_id, None)
+    _session_locks.pop(session.upload_id, None)
+    return StoredUpload(path=dest_path or part_path, sha256=hasher.hexdigest(), size=session.size)
+
+
+# ---------- Expiry ----------
+def _stale_paths(ttl: int) -> dict[str, list[str]]:
+    """Files in INCOMING_DIR grouped by upload id (or temp name), for groups untouched for ttl seconds.
+    A session's .part is written on every chunk, so its newest file says when it was last used."""
+    groups: dict[str, list[tuple[str, float]]] = {}
+    with os.scandir(INCOMING_DIR) as entries:
+        for entry in entries:
+            try:
+                mtime = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            stem = entry.name.split(".", 1)[0]
+            groups.setdefault(stem, []).append((entry.path, mtime))
+    cutoff = time.time() - ttl
+    return {
+        stem: [path for path, _ in files]
+        for stem, files in groups.items()
+        if max(mtime for _, mtime in files) < cutoff
+    }
+
+
+async def sweep_sessions(ttl: int = UPLOAD_SESSION_TTL) -> int:
+    """Remove resumable uploads (and stray temp files) abandoned for ttl seconds, and forget
+    the in-memory state of sessions that no longer exist. Returns the files removed."""
+    removed = 0
+    for stem, paths in (await run_in_threadpool(_stale_paths, ttl)).items():
+        lock = _session_locks.get(stem)
+        if lock is not None and lock.locked():
+            continue  # a request is appending to it right now
+        for path in paths:
+            _unlink_quietly(path)
+            removed += 1
+    for upload_id in list(_session_locks.keys() | _session_hashers.keys()):
+        lock = _session_locks.get(upload_id)
+        if (lock is None or not lock.locked()) and not os.path.exists(_meta_path(upload_id)):
+            _session_locks.pop(upload_id, None)
+            _session_hashers.pop(upload_id, None)
+    return removed
+
+
+class SessionSweeper:
+    """Background task running sweep_sessions every UPLOAD_SWEEP_INTERVAL seconds."""
+
+    def __init__(self, interval: int = UPLOAD_SWEEP_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await sweep_sessions()
+            except Exception:
+                logger.exception("Upload session sweep failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+session_sweeper = SessionSweeper()
@@ -1,11 +1,3 @@
 from app.database.session import Base, engine
-from app.models import users, patients ,reports,images,annotations
-from app.database.session import SessionLocal  
-from sqlalchemy.orm import Session
-
-def init_db() -> Session:
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+# Imported for their side effect: every model registers its table on Base.metadata
+from app.models import users, patients ,reports,images,annotations,blobs,report_jobs,report_cache,stats
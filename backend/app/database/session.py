@@ -1,11 +1,223 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from dotenv import load_dotenv
 import os
 
+from app.core.config import (
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS,
+)
+
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Defaults to DATABASE_URL with the async driver swapped in (asyncpg / aiosqlite)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+
+# ---------- Pool metrics ----------
+class PoolMetrics:
+    """Connection checkout counters plus how long callers waited for a connection."""
+
+    def __init__(self, window: int = 1000):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.max_wait = 0.0
+        self._total_wait = 0.0
+        self._recent_waits = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += not timed_out
+            self.timeouts += timed_out
+            self.max_wait = max(self.max_wait, seconds)
+            self._total_wait += seconds
+            self._recent_waits.append(seconds)
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            recent = sorted(self._recent_waits)
+            attempts = self.checkouts + self.timeouts
+            waits = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "invalidations": self.invalidations,
+                "avg_wait_ms": round(self._total_wait / attempts * 1000, 3) if attempts else 0.0,
+                "p95_wait_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 3) if recent else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+        # QueuePool exposes live occupancy; SQLite's default pools don't
+        return {
+            "pool": type(pool).__name__,
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            "max_overflow": getattr(pool, "_max_overflow", None),
+            **waits,
+        }
+
+
+class _TimedCheckout:
+    """Pool mixin recording how long each checkout waited into the class's `metrics`."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        # Covers queueing for a free slot and opening a new connection when overflow allows
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    metrics = PoolMetrics()
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+
+def _pool_kwargs(poolclass) -> dict:
+    # Every process runs a sync and an async engine; they split DB_POOL_SIZE / DB_MAX_OVERFLOW
+    # between them, so a worker opens at most the configured number of connections
+    return {
+        "poolclass": poolclass,
+        "pool_size": max(1, DB_POOL_SIZE // 2),
+        "max_overflow": DB_MAX_OVERFLOW // 2,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+# ---------- Engine ----------
+if DATABASE_URL.startswith("sqlite"):
+    # SQLite (local runs, benchmarks) needs connections to be shareable across worker threads
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+else:
+    engine = create_engine(DATABASE_URL, **_pool_kwargs(InstrumentedQueuePool))
+
+
+@event.listens_for(engine, "invalidate")
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    InstrumentedQueuePool.metrics.record_invalidation()
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine,
+    info={"statement_timeout_ms": DB_STATEMENT_TIMEOUT_MS},
+)
 Base = declarative_base()
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session: Session, transaction, connection):
+    # SET LOCAL lasts until this transaction ends, so the pooled connection goes back clean.
+    # Registered on Session itself so AsyncSession (which wraps one) gets it too.
+    timeout = session.info.get("statement_timeout_ms")
+    if timeout and connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+# ---------- Async engine ----------
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    raise ValueError(f"No async driver configured for '{backend}'; set ASYNC_DATABASE_URL")
+
+
+_async_engine: Optional[AsyncEngine] = None
+_async_engine_lock = threading.Lock()
+
+
+def get_async_engine() -> AsyncEngine:
+    # Built on first use so sync-only tools (alembic, scripts) don't need asyncpg/aiosqlite
+    global _async_engine
+    with _async_engine_lock:
+        if _async_engine is None:
+            url = ASYNC_DATABASE_URL or async_database_url(DATABASE_URL)
+            if url.startswith("sqlite"):
+                _async_engine = create_async_engine(url)
+            else:
+                _async_engine = create_async_engine(url, **_pool_kwargs(InstrumentedAsyncQueuePool))
+            event.listen(
+                _async_engine.sync_engine, "invalidate",
+                lambda *args: InstrumentedAsyncQueuePool.metrics.record_invalidation(),
+            )
+    return _async_engine
+
+
+_async_sessionmaker: Optional[async_sessionmaker] = None
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        # No expire-on-commit: touching an expired attribute would need implicit (sync) IO
+        _async_sessionmaker = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False,
+            info={"statement_timeout_ms": DB_STATEMENT_TIMEOUT_MS},
+        )
+    return _async_sessionmaker()
+
+
+# ---------- Request dependency ----------
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    # Sync services (search, blob store, stats...) are reachable through `await db.run_sync(fn, ...)`.
+    # run_sync only makes their queries async: Python work in them still runs on the event
+    # loop, so anything CPU-heavy (index builds, decoding) belongs in a sync endpoint or the threadpool.
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def db_with_timeout(statement_timeout_ms: Optional[int]):
+    """get_db variant for endpoints that legitimately run long queries (exports, bulk jobs)."""
+    def dependency():
+        db = SessionLocal(info={"statement_timeout_ms": statement_timeout_ms})
+        try:
+            yield db
+        finally:
+            db.close()
+    return dependency
+
+
+def pool_stats() -> dict:
+    return {
+        "sync_pool": InstrumentedQueuePool.metrics.snapshot(engine.pool),
+        "async_pool": InstrumentedAsyncQueuePool.metrics.snapshot(_async_engine.pool) if _async_engine else None,
+    }
@@ -2,8 +2,8 @@ import os
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
-from app.database.init_db import init_db
+from app.core.principal_cache import Principal, principal_cache
+from app.database.session import SessionLocal
 from app.models.users import User
 from datetime import datetime
 
@@ -11,10 +11,15 @@ security = HTTPBearer()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 
+def load_principal(username: str):
+    # Only runs on a cache miss, so a cache hit never opens a session
+    with SessionLocal() as db:
+        user = db.query(User.id, User.username, User.role).filter(User.username == username).first()
+    return Principal(id=user.id, username=user.username, role=user.role) if user else None
+
 def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(init_db)
-):
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Principal:
     token = credentials.credentials
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -25,7 +30,7 @@ def get_current_user(
         if payload.get("exp") and datetime.utcnow().timestamp() > payload["exp"]:
             raise HTTPException(status_code=401, detail="Token has expired")
 
-        user = db.query(User).filter(User.username == username).first()
+        user = principal_cache.get_or_load(username, load_principal)
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
 
@@ -34,7 +39,7 @@ def get_current_user(
     except JWTError as e:
         raise HTTPException(status_code=401, detail="Token is invalid or expired")
 
-def get_current_active_admin(current_user: User = Depends(get_current_user)):
+def get_current_active_admin(current_user: Principal = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     return current_user
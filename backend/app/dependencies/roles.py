@@ -1,9 +1,9 @@
 from fastapi import Depends, HTTPException, status
-from app.models.users import User
+from app.core.principal_cache import Principal
 from app.dependencies.auth import get_current_user
 
 def require_role(allowed_roles: list[str]):
-    def role_checker(current_user: User = Depends(get_current_user)):
+    def role_checker(current_user: Principal = Depends(get_current_user)):
         print(f"[DEBUG] User trying to access: {current_user.username}")
         print(f"[DEBUG] User role: {current_user.role}")
         print(f"[DEBUG] Allowed roles: {allowed_roles}")
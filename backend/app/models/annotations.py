@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, DDL, event
+from datetime import datetime
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.dialects.postgresql import JSON
 from app.database.session import Base
 
@@ -7,8 +8,80 @@ class Annotation(Base):
     __tablename__ = "annotations"
 
     id = Column(Integer, primary_key=True, index=True)
-    image_id = Column(Integer, ForeignKey("images.id"))
+    image_id = Column(Integer, ForeignKey("images.id"), index=True)
     label = Column(String, nullable=False)
     bounding_box = Column(JSON, nullable=False)
+    # Typed copy of bounding_box (edges, pixels) so region queries can use a spatial index
+    x_min = Column(Integer)
+    y_min = Column(Integer)
+    x_max = Column(Integer)
+    y_max = Column(Integer)
+    # Same optimistic-lock counter as Patient.version
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __mapper_args__ = {"version_id_col": version}
 
     image = relationship("Image", back_populates="annotations")
+
+    @validates("bounding_box")
+    def _sync_box_columns(self, key, box):
+        for column, value in box_columns(box).items():
+            setattr(self, column, value)
+        return box
+
+
+def box_columns(box: dict) -> dict:
+    """x/y/width/height JSON box -> the typed edge columns (for Core inserts too)."""
+    return {
+        "x_min": box["x"],
+        "y_min": box["y"],
+        "x_max": box["x"] + box["width"],
+        "y_max": box["y"] + box["height"],
+    }
+
+
+# ---------- Spatial index ----------
+# Postgres: GiST over (image_id, box) via btree_gist, queried with &&. SQLite: an
+# integer R*Tree with image_id as a third dimension, kept in sync by triggers.
+POSTGRES_SPATIAL_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    """
+    CREATE INDEX IF NOT EXISTS ix_annotations_image_bbox ON annotations
+    USING gist (image_id, box(point(x_min, y_min), point(x_max, y_max)))
+    """,
+]
+
+SQLITE_SPATIAL_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS annotations_rtree USING rtree_i32(
+        id, image_min, image_max, x_min, x_max, y_min, y_max
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS annotations_rtree_insert AFTER INSERT ON annotations
+    WHEN new.x_min IS NOT NULL AND new.image_id IS NOT NULL BEGIN
+        INSERT INTO annotations_rtree
+        VALUES (new.id, new.image_id, new.image_id, new.x_min, new.x_max, new.y_min, new.y_max);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS annotations_rtree_update AFTER UPDATE ON annotations BEGIN
+        DELETE FROM annotations_rtree WHERE id = old.id;
+        INSERT INTO annotations_rtree
+        SELECT new.id, new.image_id, new.image_id, new.x_min, new.x_max, new.y_min, new.y_max
+        WHERE new.x_min IS NOT NULL AND new.image_id IS NOT NULL;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS annotations_rtree_delete AFTER DELETE ON annotations BEGIN
+        DELETE FROM annotations_rtree WHERE id = old.id;
+    END
+    """,
+]
+
+for statement in POSTGRES_SPATIAL_DDL:
+    event.listen(Annotation.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_SPATIAL_DDL:
+    event.listen(Annotation.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Annotation.__table__, "before_drop", DDL("DROP TABLE IF EXISTS annotations_rtree").execute_if(dialect="sqlite"))
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime
+from datetime import datetime
+from app.database.session import Base
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
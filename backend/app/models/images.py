@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Float, Index, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database.session import Base
@@ -7,14 +7,47 @@ class Image(Base):
     __tablename__ = "images"
 
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
     filename = Column(String, nullable=False)
     file_path = Column(String)
+    sha256 = Column(String(64), index=True)
     description = Column(String, nullable=True)
-    scan_type = Column(String, nullable=True)
-    upload_time = Column(DateTime, default=datetime.utcnow)
+    scan_type = Column(String, nullable=True, index=True)
+    mime_type = Column(String, nullable=True)
+
+    # Header metadata, parsed at ingest without decoding pixels
+    modality = Column(String(16), index=True, nullable=True)
+    study_instance_uid = Column(String(64), index=True, nullable=True)
+    series_instance_uid = Column(String(64), index=True, nullable=True)
+    sop_instance_uid = Column(String(64), index=True, nullable=True)
+    instance_number = Column(Integer, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    number_of_frames = Column(Integer, nullable=True)
+
+    # Pixel statistics, computed once at ingest (app.services.image_stats); NULL when
+    # the pixels could not be decoded or the row predates the analysis
+    bit_depth = Column(Integer, nullable=True)
+    pixel_min = Column(Float, nullable=True)
+    pixel_max = Column(Float, nullable=True)
+    pixel_mean = Column(Float, nullable=True)
+    pixel_std = Column(Float, nullable=True)
+    histogram = Column(JSON, nullable=True)  # fraction of display pixels per bin
+    contrast_score = Column(Float, nullable=True)
+    exposure = Column(String(8), nullable=True)  # "under", "normal" or "over"
+    quality_score = Column(Float, index=True, nullable=True)
+    # 64-bit perceptual hash (signed as stored) and the earlier upload it nearly matches
+    phash = Column(BigInteger, nullable=True)
+    duplicate_of_id = Column(Integer, ForeignKey("images.id", ondelete="SET NULL"), index=True, nullable=True)
+
+    upload_time = Column(DateTime, default=datetime.utcnow, index=True)
     reports = relationship("Report", back_populates="image", uselist=False)
 
     patient = relationship("Patient", backref="images")
     annotations = relationship("Annotation", back_populates="image", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # "underexposed films this week": equality on exposure, range on upload time
+        Index("ix_images_exposure_upload_time", "exposure", "upload_time"),
+    )
+
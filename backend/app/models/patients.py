@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy import Column, Integer, String, Date, DateTime, DDL, event
+from datetime import datetime
 from app.database.session import Base
 from sqlalchemy.orm import relationship
 
@@ -7,8 +8,26 @@ class Patient(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String, index=True)
-    date_of_birth = Column(Date)
+    date_of_birth = Column(Date, index=True)
     gender = Column(String)
     contact_number = Column(String)
     address = Column(String)
-    reports = relationship("Report", back_populates="patient", cascade="all, delete-orphan")
\ No newline at end of file
+    # Bumped by the ORM on every UPDATE; feeds the ETag and rejects lost updates
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __mapper_args__ = {"version_id_col": version}
+
+    reports = relationship("Report", back_populates="patient", cascade="all, delete-orphan")
+
+
+# ---------- Fuzzy name search ----------
+# Trigram index for typo-tolerant lookups (see app/services/patient_search.py). Other
+# backends fall back to an in-process n-gram index.
+POSTGRES_TRGM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_patients_full_name_trgm ON patients USING gin (lower(full_name) gin_trgm_ops)",
+]
+
+for statement in POSTGRES_TRGM_DDL:
+    event.listen(Patient.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
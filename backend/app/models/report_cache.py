@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from datetime import datetime
+from app.database.session import Base
+
+class ReportCacheEntry(Base):
+    __tablename__ = "ai_report_cache"
+
+    cache_key = Column(String(64), primary_key=True)
+    image_sha256 = Column(String(64), nullable=False, index=True)
+    prompt_version = Column(String(16), nullable=False)
+    model_name = Column(String, nullable=False)
+    findings = Column(Text, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_hit_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, DDL, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database.session import Base
@@ -7,13 +7,67 @@ class Report(Base):
     __tablename__ = "reports"
 
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"))
-    image_id = Column(Integer, ForeignKey("images.id"), nullable=True)
+    patient_id = Column(Integer, ForeignKey("patients.id"), index=True)
+    image_id = Column(Integer, ForeignKey("images.id"), nullable=True, index=True)
     title = Column(String, index=True)
     findings = Column(Text)
     recommendations = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # Incremented on each ORM UPDATE (version_id_col); the report's ETag is built from it
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __mapper_args__ = {"version_id_col": version}
 
     # Relationship
     patient = relationship("Patient", back_populates="reports")
-    image = relationship("Image", back_populates="reports")
\ No newline at end of file
+    image = relationship("Image", back_populates="reports")
+
+# ---------- Full-text search index ----------
+# Postgres keeps a weighted tsvector as a generated column; SQLite (tests) mirrors the
+# text columns into an FTS5 table via triggers. Either way every insert/update/delete,
+# including AI-generated reports, updates the index in the same transaction.
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE reports ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(findings, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(recommendations, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_reports_search_vector ON reports USING GIN (search_vector)",
+]
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+        title, findings, recommendations, content='reports', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reports_fts_insert AFTER INSERT ON reports BEGIN
+        INSERT INTO reports_fts(rowid, title, findings, recommendations)
+        VALUES (new.id, new.title, new.findings, new.recommendations);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reports_fts_delete AFTER DELETE ON reports BEGIN
+        INSERT INTO reports_fts(reports_fts, rowid, title, findings, recommendations)
+        VALUES ('delete', old.id, old.title, old.findings, old.recommendations);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reports_fts_update AFTER UPDATE ON reports BEGIN
+        INSERT INTO reports_fts(reports_fts, rowid, title, findings, recommendations)
+        VALUES ('delete', old.id, old.title, old.findings, old.recommendations);
+        INSERT INTO reports_fts(rowid, title, findings, recommendations)
+        VALUES (new.id, new.title, new.findings, new.recommendations);
+    END
+    """,
+]
+
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(Report.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Report.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Report.__table__, "before_drop", DDL("DROP TABLE IF EXISTS reports_fts").execute_if(dialect="sqlite"))
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from datetime import datetime
+from app.database.session import Base
+
+class StatCounter(Base):
+    __tablename__ = "stats_counters"
+
+    # e.g. "patients", "users:role:admin", "ai_reports:2026-10-18"
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
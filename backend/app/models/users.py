@@ -8,5 +8,5 @@ class User(Base):
     username = Column(String, unique=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
-    role = Column(String, default="student")  # student, instructor, admin
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    role = Column(String, default="student", index=True)  # student, instructor, admin
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
\ No newline at end of file
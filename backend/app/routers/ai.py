@@ -1,91 +1,156 @@
-import os
-import google.generativeai as genai
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+import json
+import logging
+import threading
+from fastapi import APIRouter, HTTPException, Depends, Response, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 from datetime import datetime
-from app.database.session import SessionLocal
+from app.database.session import SessionLocal, get_async_db
 from app.models.images import Image
-from app.models.reports import Report
-from app.schemas.reports import ReportOut
-from dotenv import load_dotenv
+from app.models.report_jobs import ReportJob
+from app.schemas.ai import ReportJobOut, CacheStats
+from app.services import report_generation
+from app.services.report_generation import ReportGenerationError
+from app.services.report_cache import report_cache
+from app.services.report_queue import report_queue
 
-load_dotenv()
-
-# Configure Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-try:
-    model = genai.GenerativeModel("gemini-2.5-flash")  # Using stable, multimodal model
-except Exception as e:
-    raise Exception(f"Failed to initialize Gemini model: {str(e)}")
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-@router.post("/generate-report/{image_id}", response_model=ReportOut)
-def generate_report(image_id: int, db: Session = Depends(get_db)):
-    image = db.query(Image).filter(Image.id == image_id).first()
+@router.post("/generate-report/{image_id}", response_model=ReportJobOut, status_code=202)
+async def generate_report(image_id: int, response: Response, bypass_cache: bool = False, db: AsyncSession = Depends(get_async_db)):
+    image = await db.get(Image, image_id)
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
 
-    # Retrieve file_path or construct from filename
-    file_path = image.file_path if image.file_path else os.path.join(os.path.abspath("uploads"), image.filename)
-    if not file_path or not os.path.exists(file_path):
-        raise HTTPException(status_code=500, detail=f"Image file not found at {file_path}")
+    if bypass_cache:
+        report_cache.record_bypass()
+    else:
+        # Same bytes, prompt and model were analysed before: answer now without a model call
+        findings = await db.run_sync(report_generation.cached_findings, image)
+        if findings is not None:
+            report = await db.run_sync(report_generation.create_report, image, findings)
+            now = datetime.utcnow()
+            job = ReportJob(
+                image_id=image.id, status="done", report_id=report.id,
+                created_at=now, started_at=now, finished_at=now
+            )
+            db.add(job)
+            await db.commit()
+            await db.refresh(job)
+            response.status_code = 200
+            return job
+
+    # Persist first so the job survives a restart, then hand it to the worker pool
+    job = ReportJob(image_id=image.id, status="queued", bypass_cache=bypass_cache)
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
 
-    # Load image content from file
     try:
-        with open(file_path, 'rb') as f:
-            image_content = f.read()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading image file: {str(e)}")
-
-    prompt = f"""
-You are an expert radiologist. Please generate a structured medical report based on the provided chest X-ray image.
+        report_queue.submit(job.id)
+    except HTTPException as e:
+        # Never ran and isn't queued anywhere: close it out rather than leave it for the next
+        # restart to pick up behind the client's retry
+        job.status = "failed"
+        job.error = e.detail
+        job.finished_at = datetime.utcnow()
+        await db.commit()
+        raise
+    return job
+
+# ---------- Streaming (SSE) ----------
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _load_image(image_id: int):
+    db = SessionLocal()
+    try:
+        return db.query(Image).filter(Image.id == image_id).first()
+    finally:
+        db.close()
 
-Image Details:
-- Filename: {image.filename}
-- Description: {image.description or 'No description provided'}
-- Scan Type: Chest X-ray
+def _lookup_cached(image: Image):
+    db = SessionLocal()
+    try:
+        findings = report_generation.cached_findings(db, image)
+        db.commit()  # the hit count / expiry
+        return findings
+    finally:
+        db.close()
 
-Required Output:
-- Findings
-- Recommendations
+def _save_streamed_report(image: Image, findings: str, from_cache: bool):
+    db = SessionLocal()
+    try:
+        if not from_cache:
+            report_cache.put(db, image, report_generation.PROMPT_VERSION, report_generation.model_name(), findings)
+        return report_generation.create_report(db, image, findings)
+    finally:
+        db.close()
 
-Analyze the uploaded X-ray image and provide a detailed interpretation.
-"""
+@router.post("/generate-report/{image_id}/stream")
+async def stream_report(image_id: int, request: Request, bypass_cache: bool = False):
+    image = await run_in_threadpool(_load_image, image_id)
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
 
-    try:
-        response = model.generate_content([
-            {
-                "parts": [
-                    {"text": prompt},
-                    {"inline_data": {"mime_type": "image/jpeg", "data": image_content}}  # Adjust mime_type if needed
-                ]
-            }
-        ])
-        if not response.text:
-            raise HTTPException(status_code=500, detail="Empty response from Gemini API")
-        gpt_output = response.text
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Gemini API Error: {str(e)}")
-
-    report = Report(
-        patient_id=image.patient_id,
-        title=f"AI Report for {image.filename}",
-        findings=gpt_output,
-        recommendations="See findings section. Generated via Gemini.",
-        created_at=datetime.utcnow()
+    if bypass_cache:
+        report_cache.record_bypass()
+        cached = None
+    else:
+        cached = await run_in_threadpool(_lookup_cached, image)
+
+    async def events():
+        cancelled = threading.Event()
+        findings = report_generation.stream_findings(image, cancelled) if cached is None else None
+        parts = []
+        try:
+            if findings is None:
+                parts.append(cached)
+                yield _sse("chunk", {"text": cached})
+            else:
+                async for text in iterate_in_threadpool(findings):
+                    if await request.is_disconnected():
+                        return
+                    parts.append(text)
+                    yield _sse("chunk", {"text": text})
+
+            # Only a completed stream becomes a Report
+            try:
+                report = await run_in_threadpool(_save_streamed_report, image, "".join(parts), cached is not None)
+            except Exception as e:
+                logger.exception("Saving streamed report for image %s failed", image.id)
+                yield _sse("error", {"detail": f"Could not save report: {str(e)}"})
+                return
+            yield _sse("done", {"report_id": report.id})
+        except ReportGenerationError as e:
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            # Client went away (or we finished): stop pulling chunks from the model. Closing
+            # the generator closes the upstream stream now rather than whenever it is collected;
+            # if a chunk is still being fetched in the threadpool, the flag stops it after that one.
+            cancelled.set()
+            if findings is not None:
+                try:
+                    await run_in_threadpool(findings.close)
+                except ValueError:
+                    pass  # generator is mid-next() in a worker thread
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    db.add(report)
-    db.commit()
-    db.refresh(report)
+@router.get("/cache/stats", response_model=CacheStats)
+async def get_cache_stats(db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(report_cache.stats)
 
-    return report
\ No newline at end of file
+@router.get("/jobs/{job_id}", response_model=ReportJobOut)
+async def get_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    job = await db.get(ReportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
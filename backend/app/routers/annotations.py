@@ -1,30 +1,125 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database.session import SessionLocal
+from app.core.conditional import latest, make_etag, not_modified
+from app.core.pagination import Keyset, DEFAULT_LIMIT, MAX_LIMIT
+from app.database.session import get_async_db, get_db
 from app.models.annotations import Annotation
-from app.schemas.annotations import AnnotationCreate, AnnotationOut
+from app.models.images import Image
+from app.schemas.annotations import (
+    AnnotationCreate,
+    AnnotationOut,
+    AnnotationBulkCreate,
+    AnnotationReplace,
+    AnnotationBulkResult,
+    AnnotationRegionHit,
+    AnnotationOverlap,
+)
+from app.schemas.pagination import Page
+from app.services import annotations as annotation_service
+from app.services import spatial
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+SORTABLE = {"id": Annotation.id, "label": Annotation.label}
 
 @router.post("/", response_model=AnnotationOut)
-def create_annotation(annotation: AnnotationCreate, db: Session = Depends(get_db)):
+async def create_annotation(annotation: AnnotationCreate, db: AsyncSession = Depends(get_async_db)):
     new_ann = Annotation(
         image_id=annotation.image_id,
         label=annotation.label,
         bounding_box=annotation.bounding_box.dict()  # Convert nested model to dict
     )
     db.add(new_ann)
-    db.commit()
-    db.refresh(new_ann)
+    await db.commit()
+    await db.refresh(new_ann)
     return new_ann
 
-@router.get("/image/{image_id}", response_model=list[AnnotationOut])
-def get_annotations_for_image(image_id: int, db: Session = Depends(get_db)):
-    return db.query(Annotation).filter(Annotation.image_id == image_id).all()
+# ---------- Bulk ----------
+@router.post("/bulk", response_model=AnnotationBulkResult, status_code=201)
+async def create_annotations_bulk(payload: AnnotationBulkCreate, db: AsyncSession = Depends(get_async_db)):
+    # Whole batch or nothing: one transaction, batched INSERTs
+    rows = [a.model_dump() for a in payload.annotations]
+    ids = await db.run_sync(annotation_service.bulk_create, rows)
+    return AnnotationBulkResult(created=len(ids), ids=ids)
+
+@router.put("/image/{image_id}", response_model=AnnotationBulkResult)
+async def replace_annotations_for_image(
+    image_id: int, payload: AnnotationReplace, db: AsyncSession = Depends(get_async_db)
+):
+    rows = [a.model_dump() for a in payload.annotations]
+    deleted, ids = await db.run_sync(annotation_service.replace_for_image, image_id, rows)
+    return AnnotationBulkResult(created=len(ids), deleted=deleted, ids=ids)
+
+@router.delete("/image/{image_id}", response_model=AnnotationBulkResult)
+async def delete_annotations_for_image(image_id: int, db: AsyncSession = Depends(get_async_db)):
+    deleted = await db.run_sync(annotation_service.delete_for_image, image_id)
+    return AnnotationBulkResult(created=0, deleted=deleted)
+
+@router.get("/image/{image_id}", response_model=Page[AnnotationOut])
+async def get_annotations_for_image(
+    image_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    sort: str = "id",
+    label: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    keyset = Keyset(SORTABLE, Annotation.id, sort, cursor, limit)
+    stmt = select(Annotation).where(Annotation.image_id == image_id)
+    if label:
+        stmt = stmt.where(Annotation.label == label)
+    page = keyset.page((await db.scalars(keyset.apply(stmt))).all())
+
+    items = page["items"]
+    etag = make_etag("annotations", [(a.id, a.version) for a in items], page["next_cursor"])
+    return not_modified(request, response, etag, latest(a.updated_at for a in items)) or page
+
+# ---------- Spatial ----------
+# Sync handlers: the IoU math is NumPy work that belongs on the threadpool, not the event loop
+@router.get("/region", response_model=list[AnnotationRegionHit])
+def get_annotations_in_region(
+    x: int,
+    y: int,
+    width: int = Query(..., ge=1),
+    height: int = Query(..., ge=1),
+    image_id: Optional[int] = None,
+    study_instance_uid: Optional[str] = None,
+    label: Optional[str] = None,
+    min_iou: float = Query(0.0, ge=0.0, le=1.0),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    db: Session = Depends(get_db)
+):
+    """Boxes intersecting the region on one image (viewport) or every image of a study."""
+    if (image_id is None) == (study_instance_uid is None):
+        raise HTTPException(status_code=400, detail="Pass exactly one of image_id or study_instance_uid")
+    if image_id is not None:
+        image_ids = [image_id]
+    else:
+        image_ids = list(db.scalars(select(Image.id).where(Image.study_instance_uid == study_instance_uid)))
+
+    hits = spatial.query_region(db, image_ids, x, y, x + width, y + height, label, min_iou, limit)
+    return [
+        AnnotationRegionHit(**AnnotationOut.model_validate(annotation).model_dump(), iou=iou)
+        for annotation, iou in hits
+    ]
+
+@router.get("/image/{image_id}/overlaps", response_model=list[AnnotationOverlap])
+def get_overlapping_annotations(
+    image_id: int,
+    min_iou: float = Query(0.5, gt=0.0, le=1.0),
+    same_label: bool = True,
+    db: Session = Depends(get_db)
+):
+    """Pairs of boxes on the image overlapping by at least min_iou, e.g. for inter-annotator agreement."""
+    annotations = db.scalars(
+        select(Annotation).where(Annotation.image_id == image_id, Annotation.x_min.is_not(None)).order_by(Annotation.id)
+    ).all()
+    return [
+        AnnotationOverlap(a=AnnotationOut.model_validate(a), b=AnnotationOut.model_validate(b), iou=iou)
+        for a, b, iou in spatial.overlapping_pairs(annotations, min_iou, same_label)
+    ]
@@ -2,34 +2,23 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
-import bcrypt
 import os
+import secrets
 from authlib.integrations.starlette_client import OAuth
 from starlette.responses import RedirectResponse
 from dotenv import load_dotenv
 load_dotenv()
 
 
-from app.database.session import SessionLocal
+from app.database.session import get_db
 from app.models.users import User
 from app.schemas import users as user_schema
-from app.core.security import (
-    get_password_hash,
-    verify_password,
-    create_access_token,
-)
+from app.core.security import create_access_token
+from app.core.hashing import password_pool
 from app.core.config import ACCESS_TOKEN_EXPIRE_MINUTES
 
 router = APIRouter()
 
-# ---------- Database Dependency ----------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
 
 # ---------- OAuth Setup ----------
 oauth = OAuth()
@@ -70,7 +59,8 @@ async def github_callback(request: Request, db: Session = Depends(get_db)):
     # Check if user exists or create
     user = db.query(User).filter(User.email == user_data["email"]).first()
     if not user:
-        fake_password = bcrypt.hashpw("oauth_default".encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+        # OAuth users never log in with a password; hash a random one so none can guess it
+        fake_password = await password_pool.ahash(secrets.token_urlsafe(32))
         user = User(
             username=user_data["username"],
             email=user_data["email"],
@@ -100,7 +90,7 @@ def signup(users: user_schema.UserCreate, db: Session = Depends(get_db)):
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already exists")
 
-    hashed_pw = get_password_hash(users.password)
+    hashed_pw = password_pool.hash(users.password)
     db_user = User(
         username=users.username,
         email=users.email,
@@ -116,7 +106,7 @@ def signup(users: user_schema.UserCreate, db: Session = Depends(get_db)):
 @router.post("/login")
 def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not password_pool.verify(form_data.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -1,59 +1,373 @@
+import logging
+import math
 import os
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
+from dataclasses import asdict
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Header, Request, Response, BackgroundTasks, Query
+from fastapi.responses import FileResponse
+from PIL import Image as PILImage, UnidentifiedImageError
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime
-from app.database.session import SessionLocal
+from app.core.config import UPLOAD_DIR, BUILD_TILES_AT_INGEST, DUPLICATE_MAX_DISTANCE
+from app.core.conditional import make_etag, not_modified
+from app.core.pagination import Keyset, DEFAULT_LIMIT, MAX_LIMIT
+from app.core.storage import blob_store
+from app.core.uploads import (
+    StoredUpload,
+    iter_upload_file,
+    save_upload,
+    create_session,
+    load_session,
+    append_to_session,
+    finish_session,
+)
+from app.database.session import SessionLocal, get_db, get_async_db
 from app.models.images import Image
 from app.models.patients import Patient
-from app.schemas.images import ImageOut
+from app.models.reports import Report
+from app.models.report_jobs import ReportJob
+from app.schemas.images import Exposure, ImageOut, ImageDuplicate, UploadSessionCreate, UploadSessionOut, TileManifest
+from app.schemas.pagination import Page
+from app.services import duplicates, image_stats, imaging, tiles
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-UPLOAD_DIR = "uploads/"
+SORTABLE = {"id": Image.id, "upload_time": Image.upload_time}
+
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-def get_db():
+async def _get_patient_or_404(db: AsyncSession, patient_id: int) -> Patient:
+    patient = await db.get(Patient, patient_id)
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return patient
+
+def _get_image_or_404(db: Session, image_id: int) -> Image:
+    image = db.query(Image).filter(Image.id == image_id).first()
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return image
+
+async def _read_metadata(stored: StoredUpload) -> dict:
+    # Headers only; DICOM pixel data stays on disk until a tile, preview or AI call needs it
+    try:
+        metadata = await run_in_threadpool(imaging.read_metadata, stored.path)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read image header: {str(e)}")
+    if metadata.get("mime_type") == "application/octet-stream":
+        raise HTTPException(status_code=415, detail="Unsupported file type: expected DICOM or a raster image")
+    return metadata
+
+async def _analyze_pixels(stored: StoredUpload, metadata: dict) -> dict:
+    # The one full decode at ingest, so exposure/quality filters never touch pixels again.
+    # An image we can't analyse is still stored, just without stats.
+    if not metadata.get("mime_type"):
+        return {}
+    try:
+        return await run_in_threadpool(image_stats.analyze, stored.path, metadata["mime_type"])
+    except (UnidentifiedImageError, PILImage.DecompressionBombError, OSError, ValueError, RuntimeError) as e:
+        # Undecodable pixels (RuntimeError: pydicom without a handler for the transfer syntax);
+        # anything else is a bug in the analysis and should surface
+        logger.warning("Image analysis failed for %s: %s", stored.sha256, e)
+        return {}
+
+def _find_duplicate(phash: int, study_instance_uid: Optional[str]) -> Optional[int]:
+    # Own session in the threadpool: the first lookup builds the index from the whole table,
+    # which mustn't run on the event loop (run_sync would)
     db = SessionLocal()
     try:
-        yield db
+        match = duplicates.find_duplicate(db, duplicates.to_unsigned(phash), study_instance_uid=study_instance_uid)
+        return match[0] if match else None
     finally:
         db.close()
 
+async def _describe(stored: StoredUpload) -> dict:
+    """Column values for an upload: header metadata, pixel stats and the near-duplicate it
+    repeats, if any. Re-exports, crops and format changes of an image already on file get
+    linked to it. The temp file is removed if the upload is rejected."""
+    try:
+        metadata = await _read_metadata(stored)
+        metadata.update(await _analyze_pixels(stored, metadata))
+        if metadata.get("phash") is not None:
+            metadata["duplicate_of_id"] = await run_in_threadpool(
+                _find_duplicate, metadata["phash"], metadata.get("study_instance_uid")
+            )
+    except BaseException:
+        os.remove(stored.path)
+        raise
+    return metadata
+
+def _stage_image(
+    db: Session, patient_id: int, filename: str, description: str, scan_type: str,
+    stored: StoredUpload, metadata: dict
+) -> Image:
+    # Reference first so a concurrent delete of the same content can't remove the file under us;
+    # the file itself moves into the store only if this transaction commits
+    blob_store.add_ref(db, stored.sha256, stored.size)
+    file_path = blob_store.stage(db, stored.path, stored.sha256)
+
+    image = Image(
+        patient_id=patient_id,
+        filename=filename,
+        file_path=file_path,
+        sha256=stored.sha256,
+        description=description,
+        scan_type=scan_type or metadata.get("modality"),
+        upload_time=datetime.utcnow(),
+        **metadata
+    )
+    db.add(image)
+    return image
+
+def _create_image(
+    db: Session, patient_id: int, filename: str, description: str, scan_type: str,
+    stored: StoredUpload, metadata: dict
+) -> Image:
+    image = _stage_image(db, patient_id, filename, description, scan_type, stored, metadata)
+    db.commit()
+    db.refresh(image)
+    return image
+
+def _schedule_derivatives(background_tasks: BackgroundTasks, image: Image) -> None:
+    # Runs after the response is sent; tile requests build lazily if this is disabled or still running
+    if BUILD_TILES_AT_INGEST:
+        background_tasks.add_task(tiles.build_derivatives, image)
+
 @router.post("/", response_model=ImageOut)
-def upload_image(
+async def upload_image(
+    background_tasks: BackgroundTasks,
     patient_id: int = Form(...),
     description: str = Form(None),
     scan_type: str = Form(None),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Validate patient exists
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
+    await _get_patient_or_404(db, patient_id)
 
-    # Save file
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as f:
-        f.write(file.file.read())
+    # Stream file to disk in fixed-size chunks, then file it under its SHA-256
+    stored = await save_upload(iter_upload_file(file))
+    metadata = await _describe(stored)
 
-    image = Image(
-        patient_id=patient_id,
-        filename=file.filename,
-        description=description,
-        scan_type=scan_type,
-        upload_time=datetime.utcnow()
+    image = await db.run_sync(
+        _create_image, patient_id, os.path.basename(file.filename), description, scan_type, stored, metadata
     )
+    _schedule_derivatives(background_tasks, image)
+    return image
 
-    db.add(image)
-    db.commit()
-    db.refresh(image)
+@router.post("/series", response_model=list[ImageOut])
+async def upload_series(
+    patient_id: int = Form(...),
+    description: str = Form(None),
+    scan_type: str = Form(None),
+    files: list[UploadFile] = File(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # One row per DICOM instance, committed together; thumbnails/tiles are built lazily on view
+    await _get_patient_or_404(db, patient_id)
+
+    images = []
+    try:
+        for file in files:
+            stored = await save_upload(iter_upload_file(file))
+            metadata = await _describe(stored)
+            images.append(await db.run_sync(
+                _stage_image, patient_id, os.path.basename(file.filename), description, scan_type, stored, metadata
+            ))
+        await db.commit()
+    except BaseException:
+        # All or nothing: the rollback drops the refs taken so far, and the files staged
+        # with them (still temp files until commit) are removed with it
+        await db.rollback()
+        raise
+    for image in images:
+        await db.refresh(image)
+    return sorted(images, key=lambda i: (i.series_instance_uid or "", i.instance_number or 0))
+
+# ---------- Resumable uploads ----------
+@router.post("/uploads", response_model=UploadSessionOut, status_code=201)
+def start_upload(upload: UploadSessionCreate):
+    return UploadSessionOut(**asdict(create_session(upload.filename, upload.size)))
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionOut)
+def get_upload(upload_id: str):
+    return UploadSessionOut(**asdict(load_session(upload_id)))
+
+@router.patch("/uploads/{upload_id}", response_model=UploadSessionOut)
+async def upload_chunk(upload_id: str, request: Request, upload_offset: int = Header(...)):
+    # Body is raw bytes starting at Upload-Offset; resend from GET /uploads/{id} offset after a drop.
+    session = load_session(upload_id)
+    session = await append_to_session(session, upload_offset, request.stream())
+    return UploadSessionOut(**asdict(session))
+
+@router.post("/uploads/{upload_id}/complete", response_model=ImageOut)
+async def complete_upload(
+    upload_id: str,
+    background_tasks: BackgroundTasks,
+    patient_id: int = Form(...),
+    description: str = Form(None),
+    scan_type: str = Form(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    await _get_patient_or_404(db, patient_id)
+
+    session = load_session(upload_id)
+    stored = await finish_session(session)
+    metadata = await _describe(stored)
+
+    image = await db.run_sync(_create_image, patient_id, session.filename, description, scan_type, stored, metadata)
+    _schedule_derivatives(background_tasks, image)
     return image
 
-@router.get("/", response_model=list[ImageOut])
-def get_all_images(db: Session = Depends(get_db)):
-    return db.query(Image).all()
+def _filtered_images(
+    patient_id: Optional[int], scan_type: Optional[str], modality: Optional[str],
+    uploaded_from: Optional[datetime], uploaded_to: Optional[datetime],
+    exposure: Optional[str] = None, min_quality: Optional[float] = None
+):
+    stmt = select(Image)
+    if patient_id is not None:
+        stmt = stmt.where(Image.patient_id == patient_id)
+    if scan_type:
+        stmt = stmt.where(Image.scan_type == scan_type)
+    if modality:
+        stmt = stmt.where(Image.modality == modality)
+    if uploaded_from:
+        stmt = stmt.where(Image.upload_time >= uploaded_from)
+    if uploaded_to:
+        stmt = stmt.where(Image.upload_time <= uploaded_to)
+    if exposure:
+        stmt = stmt.where(Image.exposure == exposure)
+    if min_quality is not None:
+        stmt = stmt.where(Image.quality_score >= min_quality)
+    return stmt
+
+@router.get("/", response_model=Page[ImageOut])
+async def get_all_images(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    sort: str = "id",
+    patient_id: Optional[int] = None,
+    scan_type: Optional[str] = None,
+    modality: Optional[str] = None,
+    uploaded_from: Optional[datetime] = None,
+    uploaded_to: Optional[datetime] = None,
+    exposure: Optional[Exposure] = None,
+    min_quality: Optional[float] = Query(None, ge=0.0, le=1.0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    keyset = Keyset(SORTABLE, Image.id, sort, cursor, limit)
+    stmt = _filtered_images(patient_id, scan_type, modality, uploaded_from, uploaded_to, exposure, min_quality)
+    return keyset.page((await db.scalars(keyset.apply(stmt))).all())
+
+@router.get("/patient/{patient_id}", response_model=Page[ImageOut])
+async def get_images_by_patient(
+    patient_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    sort: str = "id",
+    scan_type: Optional[str] = None,
+    modality: Optional[str] = None,
+    uploaded_from: Optional[datetime] = None,
+    uploaded_to: Optional[datetime] = None,
+    exposure: Optional[Exposure] = None,
+    min_quality: Optional[float] = Query(None, ge=0.0, le=1.0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    keyset = Keyset(SORTABLE, Image.id, sort, cursor, limit)
+    stmt = _filtered_images(patient_id, scan_type, modality, uploaded_from, uploaded_to, exposure, min_quality)
+    page = keyset.page((await db.scalars(keyset.apply(stmt))).all())
+
+    # Uploads never change, but duplicate_of_id is cleared when the original is deleted; no
+    # Last-Modified, since that change leaves upload_time as it was
+    items = page["items"]
+    etag = make_etag("images", patient_id, [(i.id, i.duplicate_of_id) for i in items], page["next_cursor"])
+    return not_modified(request, response, etag) or page
+
+@router.get("/patient/{patient_id}/duplicates", response_model=list[ImageDuplicate])
+def get_duplicate_images(
+    patient_id: int,
+    max_distance: int = Query(DUPLICATE_MAX_DISTANCE, ge=0, le=16),
+    db: Session = Depends(get_db)
+):
+    """Near-duplicate pairs involving the patient's images, closest first."""
+    pairs = duplicates.duplicates_for_patient(db, patient_id, max_distance)
+    return [
+        ImageDuplicate(image=ImageOut.model_validate(image), duplicate=ImageOut.model_validate(other), distance=dist)
+        for image, other, dist in pairs
+    ]
+
+@router.get("/series/{series_instance_uid}", response_model=list[ImageOut])
+async def get_series(series_instance_uid: str, db: AsyncSession = Depends(get_async_db)):
+    stmt = (
+        select(Image)
+        .where(Image.series_instance_uid == series_instance_uid)
+        .order_by(Image.instance_number, Image.id)
+    )
+    return (await db.scalars(stmt)).all()
+
+@router.delete("/{image_id}")
+async def delete_image(image_id: int, db: AsyncSession = Depends(get_async_db)):
+    image = await db.get(Image, image_id)
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    # Reports outlive the image they were generated from. Core UPDATE skips version_id_col,
+    # so bump the version by hand: it's what the reports' ETags are built from
+    await db.execute(
+        update(Report)
+        .where(Report.image_id == image_id)
+        .values(image_id=None, version=Report.version + 1)
+    )
+    # The FK cascades too, but SQLite only enforces it with PRAGMA foreign_keys
+    await db.execute(delete(ReportJob).where(ReportJob.image_id == image_id))
+    if image.sha256:
+        await db.run_sync(blob_store.release, image.sha256)
+    await db.delete(image)
+    await db.commit()
+    return {"message": "Image deleted"}
+
+# ---------- Thumbnails & tiles ----------
+# Derivatives are keyed by content hash, so they never change once written. These stay
+# sync: decoding and resizing are CPU work that belongs in the threadpool anyway.
+DERIVED_CACHE_HEADERS = {"Cache-Control": "private, max-age=31536000, immutable"}
+
+def _derive(build, image: Image):
+    """Run a thumbnail/tile builder; a missing file is a 404, one we can't decode a 415."""
+    try:
+        return build(image)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (UnidentifiedImageError, PILImage.DecompressionBombError, OSError, ValueError) as e:
+        raise HTTPException(status_code=415, detail=f"Could not decode image: {str(e)}")
+
+@router.get("/{image_id}/thumbnail")
+def get_thumbnail(image_id: int, db: Session = Depends(get_db)):
+    image = _get_image_or_404(db, image_id)
+    path = _derive(tiles.ensure_thumbnail, image)
+    return FileResponse(path, media_type="image/jpeg", headers=DERIVED_CACHE_HEADERS)
+
+@router.get("/{image_id}/tiles", response_model=TileManifest)
+def get_tile_manifest(image_id: int, db: Session = Depends(get_db)):
+    image = _get_image_or_404(db, image_id)
+    return _derive(tiles.build_pyramid, image)
+
+@router.get("/{image_id}/tiles/{level}/{x}/{y}")
+def get_tile(image_id: int, level: int, x: int, y: int, db: Session = Depends(get_db)):
+    image = _get_image_or_404(db, image_id)
+    manifest = tiles.load_manifest(image) or _derive(tiles.build_pyramid, image)
+
+    if not 0 <= level <= manifest["max_level"]:
+        raise HTTPException(status_code=404, detail="Tile level out of range")
+    width, height = tiles.level_size(manifest, level)
+    tile_size = manifest["tile_size"]
+    if not (0 <= x < math.ceil(width / tile_size) and 0 <= y < math.ceil(height / tile_size)):
+        raise HTTPException(status_code=404, detail="Tile out of range")
 
-@router.get("/patient/{patient_id}", response_model=list[ImageOut])
-def get_images_by_patient(patient_id: int, db: Session = Depends(get_db)):
-    return db.query(Image).filter(Image.patient_id == patient_id).all()
+    return FileResponse(tiles.tile_path(image, level, x, y), media_type="image/jpeg", headers=DERIVED_CACHE_HEADERS)
@@ -1,58 +1,140 @@
-from fastapi import APIRouter, Depends, HTTPException
+import io
+from datetime import date
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database.session import SessionLocal
+from app.core import tabular
+from app.core.conditional import make_etag, not_modified
+from app.core.config import BULK_STATEMENT_TIMEOUT_MS
+from app.core.pagination import Keyset, DEFAULT_LIMIT, MAX_LIMIT
+from app.database.session import get_async_db, get_db, db_with_timeout
 from app.models.patients import Patient
+from app.models.reports import Report
 from app.schemas import patients as patient_schema
+from app.schemas.pagination import Page
+from app.services import patient_io, patient_search, report_pdf
 
 router = APIRouter()
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+SORTABLE = {"id": Patient.id, "full_name": Patient.full_name, "date_of_birth": Patient.date_of_birth}
+
+async def _report_ids(db: AsyncSession, patient_id: int) -> list[int]:
+    return (await db.scalars(select(Report.id).where(Report.patient_id == patient_id))).all()
 
 @router.post("/", response_model=patient_schema.PatientOut)
-def create_patient(patient: patient_schema.PatientCreate, db: Session = Depends(get_db)):
+async def create_patient(patient: patient_schema.PatientCreate, db: AsyncSession = Depends(get_async_db)):
     db_patient = Patient(**patient.dict())
     db.add(db_patient)
-    db.commit()
-    db.refresh(db_patient)
+    await db.commit()
+    await db.refresh(db_patient)
     return db_patient
 
 @router.put("/{patient_id}", response_model=patient_schema.PatientOut)
-def update_patient(patient_id: int, updated_data: patient_schema.PatientCreate, db: Session = Depends(get_db)):
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
+async def update_patient(patient_id: int, updated_data: patient_schema.PatientCreate, db: AsyncSession = Depends(get_async_db)):
+    patient = await db.get(Patient, patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
     for key, value in updated_data.dict().items():
         setattr(patient, key, value)
 
-    db.commit()
-    db.refresh(patient)
+    await db.commit()
+    await db.refresh(patient)
+    # Their reports' PDFs print the patient's name
+    for report_id in await _report_ids(db, patient_id):
+        report_pdf.invalidate(report_id)
     return patient
 
 
-@router.get("/", response_model=list[patient_schema.PatientOut])
-def get_patients(db: Session = Depends(get_db)):
-    return db.query(Patient).all()
+@router.get("/", response_model=Page[patient_schema.PatientOut])
+async def get_patients(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    sort: str = "id",
+    born_from: Optional[date] = None,
+    born_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    keyset = Keyset(SORTABLE, Patient.id, sort, cursor, limit)
+    stmt = select(Patient)
+    if born_from:
+        stmt = stmt.where(Patient.date_of_birth >= born_from)
+    if born_to:
+        stmt = stmt.where(Patient.date_of_birth <= born_to)
+    return keyset.page((await db.scalars(keyset.apply(stmt))).all())
+
+# Sync handler: off Postgres, the in-memory trigram index is built (first call) and scanned
+# in Python, which would stall the event loop
+@router.get("/search", response_model=list[patient_schema.PatientSearchHit])
+def search_patients(
+    q: Optional[str] = Query(None, description="Full or partial name; misspellings are tolerated"),
+    dob: Optional[date] = Query(None, description="Date of birth; near-miss typos still match, ranked lower"),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    if not (q and q.strip()) and dob is None:
+        raise HTTPException(status_code=400, detail="Provide a name (q) and/or a date of birth (dob)")
+    return [
+        patient_schema.PatientSearchHit(
+            **patient_schema.PatientOut.model_validate(patient).model_dump(), score=round(score, 4)
+        )
+        for patient, score in patient_search.search_patients(db, q, dob, limit)
+    ]
+
+# ---------- Bulk import / export ----------
+# Sync handlers: parsing, batch inserts and cursor reads are blocking work for the threadpool
+@router.post("/import", response_model=patient_schema.PatientImportResult)
+def import_patients(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="Defaults to the file extension"),
+    db: Session = Depends(db_with_timeout(BULK_STATEMENT_TIMEOUT_MS))
+):
+    fmt = tabular.detect_format(format, file.filename, file.content_type)
+    if not fmt:
+        raise HTTPException(status_code=400, detail="Unknown file format; pass format=csv or format=ndjson")
+    # The upload is spooled to disk by the server; decode it line by line
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return patient_io.import_patients(db, stream, fmt)
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"File is not valid UTF-8: {str(e)}")
+    finally:
+        stream.detach()
+
+@router.get("/export")
+def export_patients(
+    format: Literal["csv", "ndjson"] = "csv",
+    born_from: Optional[date] = None,
+    born_to: Optional[date] = None,
+):
+    chunks = patient_io.export_patients(format, born_from, born_to, BULK_STATEMENT_TIMEOUT_MS or None)
+    return StreamingResponse(
+        chunks,
+        media_type=tabular.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="patients.{format}"'},
+    )
 
 @router.get("/{patient_id}", response_model=patient_schema.PatientOut)
-def get_patient(patient_id: int, db: Session = Depends(get_db)):
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
+async def get_patient(patient_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    patient = await db.get(Patient, patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
-    return patient
+    cached = not_modified(request, response, make_etag("patient", patient.id, patient.version), patient.updated_at)
+    return cached or patient
 
 @router.delete("/{patient_id}")
-def delete_patient(patient_id: int, db: Session = Depends(get_db)):
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
+async def delete_patient(patient_id: int, db: AsyncSession = Depends(get_async_db)):
+    patient = await db.get(Patient, patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
-    db.delete(patient)
-    db.commit()
+    report_ids = await _report_ids(db, patient_id)
+    await db.delete(patient)
+    await db.commit()
+    # The reports went with the patient; their rendered PDFs must not outlive them
+    for report_id in report_ids:
+        report_pdf.invalidate(report_id)
     return {"message": "Patient deleted"}
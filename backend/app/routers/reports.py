@@ -1,69 +1,198 @@
-from fastapi import APIRouter, Depends, HTTPException
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
+from starlette.background import BackgroundTask
 
-from app.database.session import SessionLocal
+from app.core import tabular
+from app.core.conditional import cache_headers, latest, make_etag, not_modified
+from app.core.config import BULK_STATEMENT_TIMEOUT_MS
+from app.core.pagination import Keyset, DEFAULT_LIMIT, MAX_LIMIT
+from app.database.session import get_async_db, get_db
 from app.models.reports import Report
 from app.models.patients import Patient
+from app.models.report_jobs import ReportJob
 from app.schemas import reports as report_schema
+from app.schemas.pagination import Page
+from app.services import report_export, report_pdf, search
 
 router = APIRouter()
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+SORTABLE = {"id": Report.id, "created_at": Report.created_at, "title": Report.title}
 
 @router.post("/", response_model=report_schema.ReportOut)
-def create_report(report: report_schema.ReportCreate, db: Session = Depends(get_db)):
+async def create_report(report: report_schema.ReportCreate, db: AsyncSession = Depends(get_async_db)):
     new_report = Report(**report.dict())
     db.add(new_report)
-    db.commit()
-    db.refresh(new_report)
+    await db.commit()
+    await db.refresh(new_report)
     return report_schema.ReportOut.from_orm(new_report)
 
 @router.put("/{report_id}", response_model=report_schema.ReportOut)
-def update_report(report_id: int, updated: report_schema.ReportCreate, db: Session = Depends(get_db)):
-    report = db.query(Report).filter(Report.id == report_id).first()
+async def update_report(report_id: int, updated: report_schema.ReportCreate, db: AsyncSession = Depends(get_async_db)):
+    report = await db.get(Report, report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
 
     for key, value in updated.dict().items():
         setattr(report, key, value)
 
-    db.commit()
-    db.refresh(report)
+    await db.commit()
+    await db.refresh(report)
+    report_pdf.invalidate(report_id)
     return report_schema.ReportOut.from_orm(report)
 
 @router.delete("/{report_id}", status_code=204)
-def delete_report(report_id: int, db: Session = Depends(get_db)):
-    report = db.query(Report).filter(Report.id == report_id).first()
+async def delete_report(report_id: int, db: AsyncSession = Depends(get_async_db)):
+    report = await db.get(Report, report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
 
-    db.delete(report)
-    db.commit()
+    # Jobs keep their history; the FK would null this too, where the database enforces it
+    await db.execute(update(ReportJob).where(ReportJob.report_id == report_id).values(report_id=None))
+    await db.delete(report)
+    await db.commit()
+    report_pdf.invalidate(report_id)
     return {"message": "Report deleted"}
 
-@router.get("/", response_model=list[report_schema.ReportOut])
-def get_all_reports(query: str = "", db: Session = Depends(get_db)):
-    reports = db.query(Report).options(joinedload(Report.patient)).all()
-    results = []
-    for report in reports:
-        patient_name = report.patient.full_name if report.patient else "Unknown"
+@router.get("/", response_model=Page[report_schema.ReportOut])
+async def get_all_reports(
+    query: str = "",
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    sort: str = "-created_at",
+    patient_id: Optional[int] = None,
+    image_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    keyset = Keyset(SORTABLE, Report.id, sort, cursor, limit)
+
+    # Patient name comes from the join itself; no Patient objects are loaded
+    stmt = select(Report, Patient.full_name).outerjoin(Patient, Report.patient_id == Patient.id)
+    if patient_id is not None:
+        stmt = stmt.where(Report.patient_id == patient_id)
+    if image_id is not None:
+        stmt = stmt.where(Report.image_id == image_id)
+    if created_from:
+        stmt = stmt.where(Report.created_at >= created_from)
+    if created_to:
+        stmt = stmt.where(Report.created_at <= created_to)
+    if query:
+        stmt = stmt.where(search.match_clause(db.sync_session, query))
+
+    rows = (await db.execute(keyset.apply(stmt))).all()
+    items = []
+    for report, patient_name in rows:
         report_data = report_schema.ReportOut.from_orm(report).dict()
-        report_data["patient_name"] = patient_name
-        results.append(report_data)
-    return results
+        report_data["patient_name"] = patient_name or "Unknown"
+        items.append(report_data)
+    return keyset.page(rows, items, key=lambda row: row[0])
+
+@router.get("/search", response_model=Page[report_schema.ReportSearchHit])
+async def search_reports(
+    q: str = Query(..., min_length=1),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Ranked by relevance across title, findings and recommendations
+    page = await db.run_sync(search.search_reports, q, cursor, limit)
+    items = []
+    for hit in page["items"]:
+        report_data = report_schema.ReportOut.from_orm(hit["report"]).dict()
+        report_data["patient_name"] = hit["patient_name"] or "Unknown"
+        report_data["rank"] = hit["rank"]
+        report_data["highlights"] = hit["highlights"]
+        items.append(report_data)
+    page["items"] = items
+    return page
+
+@router.get("/export")
+def export_reports(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    query: str = "",
+    patient_id: Optional[int] = None,
+    image_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    # Bulk counterpart of GET /reports/ (same filters) for warehouse loads; streams, never pages
+    chunks = report_export.export_reports(
+        format, gzip, patient_id, image_id, created_from, created_to, query, BULK_STATEMENT_TIMEOUT_MS or None
+    )
+    filename = f"reports.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if gzip else tabular.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# ---------- PDF ----------
+# Sync handlers: they wait on the render pool and do file IO, both fine in the threadpool
+@router.post("/pdf/batch")
+def export_reports_pdf(payload: report_schema.ReportPdfBatch, db: Session = Depends(get_db)):
+    """Zip of one PDF per report; cached renderings are reused, the rest render in parallel."""
+    wanted = report_pdf.stamps(db, payload.report_ids)
+    missing = sorted(set(payload.report_ids) - set(wanted))
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Reports not found: {missing}")
+    report_pdf.ensure(db, list(wanted.values()))
+
+    # Spooled to a temp file rather than memory; PDFs are already compressed, so stored as-is
+    fd, zip_path = tempfile.mkstemp(suffix=".zip")
+    try:
+        with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w", zipfile.ZIP_STORED) as archive:
+            for report_id in dict.fromkeys(payload.report_ids):
+                _, pdf = report_pdf.open_pdf(db, wanted[report_id])
+                with pdf, archive.open(f"report-{report_id}.pdf", "w") as entry:
+                    shutil.copyfileobj(pdf, entry)
+    except BaseException:
+        os.remove(zip_path)
+        raise
+    return FileResponse(
+        zip_path, media_type="application/zip", filename="reports.zip", background=BackgroundTask(os.remove, zip_path)
+    )
+
+@router.get("/{report_id}/pdf")
+def get_report_pdf(report_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    stamp = report_pdf.stamps(db, [report_id]).get(report_id)
+    if not stamp:
+        raise HTTPException(status_code=404, detail="Report not found")
+    cached = not_modified(request, response, stamp.etag, stamp.last_modified)
+    if cached:
+        return cached
+
+    # Read through a handle, not served by path: an edit may remove the file before it's sent
+    stamp, pdf = report_pdf.open_pdf(db, stamp)
+    with pdf:
+        content = pdf.read()
+    headers = cache_headers(stamp.etag, stamp.last_modified)
+    headers["Content-Disposition"] = f'attachment; filename="report-{report_id}.pdf"'
+    return Response(content, media_type="application/pdf", headers=headers)
 
 @router.get("/{report_id}", response_model=report_schema.ReportOut)
-def get_report(report_id: int, db: Session = Depends(get_db)):
-    report = db.query(Report).options(joinedload(Report.patient)).filter(Report.id == report_id).first()
+async def get_report(report_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    report = await db.scalar(select(Report).options(joinedload(Report.patient)).where(Report.id == report_id))
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
 
+    # The body embeds the patient's name, so a patient edit is a new representation too
+    patient = report.patient
+    etag = make_etag("report", report.id, report.version, patient.version if patient else None)
+    cached = not_modified(request, response, etag, latest([report.updated_at, patient.updated_at if patient else None]))
+    if cached:
+        return cached
+
     patient_name = report.patient.full_name if report.patient else "Unknown"
     report_data = report_schema.ReportOut.from_orm(report).dict()
     report_data["patient_name"] = patient_name
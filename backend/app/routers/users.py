@@ -1,101 +1,133 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.pagination import Keyset, DEFAULT_LIMIT, MAX_LIMIT
+from app.core.principal_cache import Principal, principal_cache
 from app.models.users import User
-from app.schemas.users import UserOut, UserRoleUpdate
+from app.schemas.users import UserOut, UserRoleUpdate, PrincipalCacheStats, DbPoolStats
 from app.dependencies.auth import get_current_active_admin
-from app.database.init_db import init_db
-from app.models.reports import Report
-from app.models.patients import Patient
+from app.database.session import get_async_db, pool_stats
+from app.schemas.pagination import Page
+from app.services import stats
 
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+SORTABLE = {"id": User.id, "created_at": User.created_at, "username": User.username}
+
 # ✅ Get All Users (Admin only)
-@router.get("/", response_model=list[UserOut])
-def list_users(db: Session = Depends(init_db), admin: User = Depends(get_current_active_admin)):
-    users = db.query(User).all()
-    return [UserOut.model_validate(u) for u in users]
+@router.get("/", response_model=Page[UserOut])
+async def list_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    sort: str = "id",
+    role: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+    admin: Principal = Depends(get_current_active_admin)
+):
+    keyset = Keyset(SORTABLE, User.id, sort, cursor, limit)
+    stmt = select(User)
+    if role:
+        stmt = stmt.where(User.role == role)
+    if created_from:
+        stmt = stmt.where(User.created_at >= created_from)
+    if created_to:
+        stmt = stmt.where(User.created_at <= created_to)
+    users = (await db.scalars(keyset.apply(stmt))).all()
+    return keyset.page(users, [UserOut.model_validate(u) for u in users])
 
 
 # ✅ Get User by ID (Admin only)
 @router.get("/users/{user_id}", response_model=UserOut)
-def get_user(
+async def get_user(
     user_id: int,
-    db: Session = Depends(init_db),
-    current_admin: User = Depends(get_current_active_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Principal = Depends(get_current_active_admin)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 # ✅ Update Role
 @router.put("/users/{user_id}/role", response_model=UserOut)
-def update_user_role(
+async def update_user_role(
     user_id: int,
     role_update: UserRoleUpdate,
-    db: Session = Depends(init_db),
-    current_admin: User = Depends(get_current_active_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Principal = Depends(get_current_active_admin)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     user.role = role_update.role
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    principal_cache.invalidate(user.username)
+    await db.refresh(user)
     return user
 
 # ✅ Delete User
 @router.delete("/users/{user_id}")
-def delete_user(
+async def delete_user(
     user_id: int,
-    db: Session = Depends(init_db),
-    current_admin: User = Depends(get_current_active_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Principal = Depends(get_current_active_admin)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    db.delete(user)
-    db.commit()
+    username = user.username
+    await db.delete(user)
+    await db.commit()
+    principal_cache.invalidate(username)
     return {"message": "User deleted successfully"}
 
-# ✅ Dashboard Summary with Real Stats
-# ✅ Dashboard Summary with Extended Stats
+# ✅ Auth cache metrics
+@router.get("/auth-cache/stats", response_model=PrincipalCacheStats)
+def get_auth_cache_stats(current_admin: Principal = Depends(get_current_active_admin)):
+    return principal_cache.stats()
+
+# ✅ DB connection pool metrics
+@router.get("/db-pool/stats", response_model=DbPoolStats)
+def get_db_pool_stats(current_admin: Principal = Depends(get_current_active_admin)):
+    return pool_stats()
+
+# ✅ Dashboard Summary from the stats counters (constant time regardless of table sizes)
 @router.get("/dashboard")
-def get_admin_dashboard(
-    db: Session = Depends(init_db),
-    current_admin: User = Depends(get_current_active_admin)
+async def get_admin_dashboard(
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Principal = Depends(get_current_active_admin)
 ):
-    total_users = db.query(User).count()
-    total_admins = db.query(User).filter(User.role == "admin").count()
-    total_students = db.query(User).filter(User.role == "student").count()
-    total_instructors = db.query(User).filter(User.role == "instructor").count()
-
-    total_patients = db.query(Patient).count()
-    total_reports = db.query(Report).count()
+    counters = await db.run_sync(stats.snapshot)
+    totals, users_by_role = counters["totals"], counters["users_by_role"]
 
+    # Served by the users.created_at index
     latest_user = (
-        db.query(User)
-        .order_by(User.created_at.desc())
-        .first()
-    )
+        await db.execute(select(User.username, User.created_at).order_by(User.created_at.desc()).limit(1))
+    ).first()
 
     return {
         "message": f"Welcome Admin {current_admin.username}",
         "stats": {
-            "total_users": total_users,
-            "total_admins": total_admins,
-            "total_students": total_students,
-            "total_instructors": total_instructors,
-            "total_patients": total_patients,
-            "total_reports": total_reports,
+            "total_users": totals["users"],
+            "total_admins": users_by_role.get("admin", 0),
+            "total_students": users_by_role.get("student", 0),
+            "total_instructors": users_by_role.get("instructor", 0),
+            "total_patients": totals["patients"],
+            "total_reports": totals["reports"],
+            "total_images": totals["images"],
+            "total_annotations": totals["annotations"],
+            "users_by_role": users_by_role,
+            "ai_reports_per_day": counters["ai_reports_per_day"],
             "latest_user_joined": {
                 "username": latest_user.username,
                 "created_at": latest_user.created_at
             } if latest_user else None
         }
     }
-
-
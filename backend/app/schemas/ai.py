@@ -1,23 +1,27 @@
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
 
-# Load API key from .env
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
-# Create Gemini model
-try:
-    model = genai.GenerativeModel("gemini-2.5-flash")  # Updated to stable, high-capacity model
-except Exception as e:
-    print(f"Error initializing model: {str(e)}")
-    exit(1)
+class ReportJobOut(BaseModel):
+    id: str
+    image_id: int
+    status: str
+    attempts: int
+    error: Optional[str] = None
+    report_id: Optional[int] = None
+    bypass_cache: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
-# Generate response
-try:
-    response = model.generate_content("Generate a radiology report for a chest X-ray.")
-    if not response.text:
-        raise ValueError("Empty response from Gemini API")
-    print(response.text)
-except Exception as e:
-    print(f"Error generating content: {str(e)}")
\ No newline at end of file
+    class Config:
+        from_attributes = True
+
+
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+    bypasses: int
+    hit_rate: float
+    entries: int
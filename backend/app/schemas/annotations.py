@@ -1,18 +1,54 @@
 from pydantic import BaseModel, Field
 
+from app.core.config import MAX_BULK_ANNOTATIONS
+
 class BoundingBox(BaseModel):
+    # Unchecked, for responses: rows stored before boxes were validated can have a
+    # negative origin or no area, and reading them back mustn't fail
     x: int = Field(..., example=10)
     y: int = Field(..., example=20)
     width: int = Field(..., example=100)
     height: int = Field(..., example=80)
 
+class BoundingBoxIn(BoundingBox):
+    x: int = Field(..., ge=0, example=10)
+    y: int = Field(..., ge=0, example=20)
+    width: int = Field(..., ge=1, example=100)
+    height: int = Field(..., ge=1, example=80)
+
 class AnnotationCreate(BaseModel):
     image_id: int
     label: str
-    bounding_box: BoundingBox
+    bounding_box: BoundingBoxIn
 
-class AnnotationOut(AnnotationCreate):
+class AnnotationOut(BaseModel):
+    image_id: int
+    label: str
+    bounding_box: BoundingBox
     id: int
 
     class Config:
         from_attributes = True
+
+class AnnotationBox(BaseModel):
+    label: str
+    bounding_box: BoundingBoxIn
+
+class AnnotationBulkCreate(BaseModel):
+    annotations: list[AnnotationCreate] = Field(..., min_length=1, max_length=MAX_BULK_ANNOTATIONS)
+
+class AnnotationReplace(BaseModel):
+    annotations: list[AnnotationBox] = Field(..., max_length=MAX_BULK_ANNOTATIONS)  # empty clears the image
+
+class AnnotationBulkResult(BaseModel):
+    created: int
+    deleted: int = 0
+    ids: list[int] = []  # ids of the created rows, in request order
+
+class AnnotationRegionHit(AnnotationOut):
+    iou: float  # overlap with the queried region
+
+class AnnotationOverlap(BaseModel):
+    a: AnnotationOut
+    b: AnnotationOut
+    iou: float
@@ -1,7 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
 from datetime import datetime
 
+Exposure = Literal["under", "normal", "over"]
+
 class ImageOut(BaseModel):
     id: int
     patient_id: int
@@ -9,6 +11,48 @@ class ImageOut(BaseModel):
     description: Optional[str] = None
     scan_type: Optional[str] = None
     upload_time: datetime
+    sha256: Optional[str] = None
+    mime_type: Optional[str] = None
+    modality: Optional[str] = None
+    study_instance_uid: Optional[str] = None
+    series_instance_uid: Optional[str] = None
+    sop_instance_uid: Optional[str] = None
+    instance_number: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    number_of_frames: Optional[int] = None
+    bit_depth: Optional[int] = None
+    pixel_min: Optional[float] = None
+    pixel_max: Optional[float] = None
+    pixel_mean: Optional[float] = None
+    pixel_std: Optional[float] = None
+    histogram: Optional[list[float]] = None
+    contrast_score: Optional[float] = None
+    exposure: Optional[Exposure] = None
+    quality_score: Optional[float] = None
+    duplicate_of_id: Optional[int] = None  # earlier upload this one nearly matches
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+class ImageDuplicate(BaseModel):
+    image: ImageOut
+    duplicate: ImageOut
+    distance: int  # pHash Hamming distance, 0 = visually identical
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int = Field(..., ge=0)
+
+class UploadSessionOut(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    offset: int
+
+class TileManifest(BaseModel):
+    width: int
+    height: int
+    tile_size: int
+    max_level: int
+    format: str
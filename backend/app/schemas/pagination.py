@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page; null on the last page
+    limit: int
@@ -1,6 +1,5 @@
 from pydantic import BaseModel
 from datetime import date
-from sqlalchemy.orm import relationship
 
 class PatientCreate(BaseModel):
     full_name: str
@@ -13,4 +12,21 @@ class PatientOut(PatientCreate):
     id: int
     
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+
+class PatientSearchHit(PatientOut):
+    score: float  # name similarity (0-1) plus a bonus when the date of birth matches
+
+
+class PatientImportError(BaseModel):
+    line: int  # line number in the uploaded file (CSV counts the header as line 1)
+    errors: list[str]
+
+
+class PatientImportResult(BaseModel):
+    received: int
+    imported: int
+    failed: int
+    errors: list[PatientImportError]
+    errors_truncated: bool = False  # more rows failed than are listed
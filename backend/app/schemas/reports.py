@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict
+
+from app.core.config import REPORT_PDF_BATCH_MAX
 
 
 class ReportCreate(BaseModel):
@@ -22,3 +24,12 @@ class ReportOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ReportSearchHit(ReportOut):
+    rank: float
+    highlights: Dict[str, str] = {}  # field -> excerpt with <mark>…</mark> around matched terms
+
+
+class ReportPdfBatch(BaseModel):
+    report_ids: list[int] = Field(..., min_length=1, max_length=REPORT_PDF_BATCH_MAX)
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
+from typing import Optional
 
 class UserCreate(BaseModel):
     username: str
@@ -22,3 +23,28 @@ class UserOut(BaseModel):
 
 class UserRoleUpdate(BaseModel):
     role: str
+
+class PrincipalCacheStats(BaseModel):
+    hits: int
+    misses: int
+    invalidations: int
+    hit_rate: float
+    entries: int
+
+class PoolStats(BaseModel):
+    pool: str
+    size: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+    max_overflow: Optional[int] = None
+    checkouts: int
+    timeouts: int
+    invalidations: int
+    avg_wait_ms: float
+    p95_wait_ms: float
+    max_wait_ms: float
+
+
+class DbPoolStats(BaseModel):
+    sync_pool: PoolStats
+    async_pool: Optional[PoolStats] = None  # null until the first async request opens the engine
@@ -0,0 +1,194 @@
+import hashlib
+import math
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional
+
+from dotenv import load_dotenv
+
+from app.core.config import (
+    AI_PROVIDER,
+    GEMINI_MODEL,
+    AI_STUB_LATENCY,
+    AI_STUB_LATENCY_JITTER,
+    AI_STUB_LATENCY_DIST,
+    AI_STUB_ERROR_RATE,
+    AI_STUB_OUTPUT_CHARS,
+    AI_STUB_SEED,
+)
+
+load_dotenv()
+
+
+class ProviderError(Exception):
+    """Upstream model failure; callers treat it as retryable."""
+
+
+class ReportProvider(ABC):
+    """Turns a prompt plus one image into report text."""
+
+    name = "base"
+    model_name = "base"
+
+    @abstractmethod
+    def generate(self, prompt: str, image_bytes: bytes, mime_type: str) -> str:
+        """The whole report text; raises ProviderError on upstream failure."""
+
+    @abstractmethod
+    def stream(self, prompt: str, image_bytes: bytes, mime_type: str) -> Iterator[str]:
+        """Report text chunk by chunk, as a generator: closing it must stop the upstream call.
+        A provider without native streaming can yield generate()'s text as one chunk."""
+
+
+# ---------- Gemini ----------
+class GeminiProvider(ReportProvider):
+    name = "gemini"
+
+    def __init__(self, model_name: str = GEMINI_MODEL):
+        import google.generativeai as genai
+
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)  # Using stable, multimodal model
+
+    @staticmethod
+    def _contents(prompt: str, image_bytes: bytes, mime_type: str) -> list:
+        return [
+            {
+                "parts": [
+                    {"text": prompt},
+                    {"inline_data": {"mime_type": mime_type, "data": image_bytes}}
+                ]
+            }
+        ]
+
+    def generate(self, prompt: str, image_bytes: bytes, mime_type: str) -> str:
+        try:
+            response = self.model.generate_content(self._contents(prompt, image_bytes, mime_type))
+            return response.text
+        except Exception as e:
+            raise ProviderError(f"Gemini API Error: {str(e)}")
+
+    def stream(self, prompt: str, image_bytes: bytes, mime_type: str) -> Iterator[str]:
+        try:
+            response = self.model.generate_content(self._contents(prompt, image_bytes, mime_type), stream=True)
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            raise ProviderError(f"Gemini API Error: {str(e)}")
+
+
+# ---------- Local stub ----------
+STUB_SENTENCES = [
+    "Findings: The lungs are clear without focal consolidation.",
+    "No pleural effusion or pneumothorax is identified.",
+    "The cardiomediastinal silhouette is within normal limits.",
+    "Osseous structures are intact for age.",
+    "Recommendations: Routine follow-up as clinically indicated.",
+]
+
+
+class StubProvider(ReportProvider):
+    """Deterministic offline provider with configurable latency, error rate and output size.
+
+    The text depends only on the prompt and image bytes, so identical inputs always give
+    identical reports. Latency and failures come from a seeded RNG, so a benchmark run
+    with the same seed and call order is reproducible.
+    """
+
+    name = "stub"
+    model_name = "stub"
+
+    def __init__(
+        self,
+        latency: float = AI_STUB_LATENCY,
+        jitter: float = AI_STUB_LATENCY_JITTER,
+        distribution: str = AI_STUB_LATENCY_DIST,
+        error_rate: float = AI_STUB_ERROR_RATE,
+        output_chars: int = AI_STUB_OUTPUT_CHARS,
+        seed: int = AI_STUB_SEED,
+    ):
+        if distribution not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown stub latency distribution: {distribution}")
+        self.latency = latency
+        self.jitter = jitter
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.output_chars = output_chars
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def sample_latency(self) -> float:
+        with self._rng_lock:
+            if self.distribution == "uniform":
+                value = self._rng.uniform(self.latency - self.jitter, self.latency + self.jitter)
+            elif self.distribution == "normal":
+                value = self._rng.gauss(self.latency, self.jitter)
+            elif self.distribution == "lognormal" and self.latency > 0:
+                # Parameterised so the mean stays at `latency` with std dev `jitter`
+                sigma2 = math.log(1 + (self.jitter / self.latency) ** 2)
+                value = self._rng.lognormvariate(math.log(self.latency) - sigma2 / 2, math.sqrt(sigma2))
+            else:
+                value = self.latency
+        return max(0.0, value)
+
+    def _maybe_fail(self) -> None:
+        with self._rng_lock:
+            failed = self._rng.random() < self.error_rate
+        if failed:
+            raise ProviderError("Stub provider simulated failure")
+
+    def _text(self, prompt: str, image_bytes: bytes) -> str:
+        digest = hashlib.sha256(prompt.encode() + image_bytes).hexdigest()
+        start = int(digest[:8], 16) % len(STUB_SENTENCES)
+        sentences, length = [], 0
+        while length < self.output_chars:
+            sentence = STUB_SENTENCES[(start + len(sentences)) % len(STUB_SENTENCES)]
+            sentences.append(sentence)
+            length += len(sentence) + 1
+        return " ".join(sentences)[: self.output_chars]
+
+    def generate(self, prompt: str, image_bytes: bytes, mime_type: str) -> str:
+        time.sleep(self.sample_latency())
+        self._maybe_fail()
+        return self._text(prompt, image_bytes)
+
+    def stream(self, prompt: str, image_bytes: bytes, mime_type: str) -> Iterator[str]:
+        # Same total latency as a blocking call, spread across word-sized chunks
+        self._maybe_fail()
+        words = self._text(prompt, image_bytes).split(" ")
+        delay = self.sample_latency() / len(words)
+        for i, word in enumerate(words):
+            time.sleep(delay)
+            yield word if i == 0 else " " + word
+
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "stub": StubProvider,
+}
+
+_provider: Optional[ReportProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> ReportProvider:
+    # Built on first use so importing the app never needs an API key
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            if AI_PROVIDER not in PROVIDERS:
+                raise ValueError(f"Unknown AI_PROVIDER '{AI_PROVIDER}', expected one of {sorted(PROVIDERS)}")
+            _provider = PROVIDERS[AI_PROVIDER]()
+    return _provider
+
+
+def set_provider(provider: Optional[ReportProvider]) -> None:
+    """Swap the active provider (benchmarks); None goes back to the configured one."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
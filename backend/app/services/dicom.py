@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from PIL import Image as PILImage
+
+try:
+    import pydicom
+    from pydicom.multival import MultiValue
+except ImportError:  # DICOM support is optional; raster uploads work without it
+    pydicom = None
+    MultiValue = ()
+
+DICOM_MIME = "application/dicom"
+
+# Only these elements are parsed at ingest; pixel data is never touched.
+HEADER_TAGS = [
+    "Modality",
+    "StudyInstanceUID",
+    "SeriesInstanceUID",
+    "SOPInstanceUID",
+    "InstanceNumber",
+    "Rows",
+    "Columns",
+    "NumberOfFrames",
+]
+
+
+@dataclass(frozen=True)
+class DicomHeader:
+    modality: Optional[str]
+    study_instance_uid: Optional[str]
+    series_instance_uid: Optional[str]
+    sop_instance_uid: Optional[str]
+    instance_number: Optional[int]
+    rows: Optional[int]
+    columns: Optional[int]
+    number_of_frames: int
+
+
+def _require_pydicom():
+    if pydicom is None:
+        raise RuntimeError("pydicom is not installed; DICOM files cannot be read")
+
+
+def is_dicom(path: str) -> bool:
+    # Part 10 files carry a 128-byte preamble followed by "DICM"
+    with open(path, "rb") as f:
+        return f.read(132)[128:] == b"DICM"
+
+
+def read_header(path: str) -> DicomHeader:
+    _require_pydicom()
+    ds = pydicom.dcmread(path, stop_before_pixels=True, specific_tags=HEADER_TAGS)
+
+    def _int(value):
+        return int(value) if value not in (None, "") else None
+
+    return DicomHeader(
+        modality=ds.get("Modality"),
+        study_instance_uid=ds.get("StudyInstanceUID"),
+        series_instance_uid=ds.get("SeriesInstanceUID"),
+        sop_instance_uid=ds.get("SOPInstanceUID"),
+        instance_number=_int(ds.get("InstanceNumber")),
+        rows=_int(ds.get("Rows")),
+        columns=_int(ds.get("Columns")),
+        number_of_frames=_int(ds.get("NumberOfFrames")) or 1,
+    )
+
+
+# ---------- Lazy pixel access ----------
+def _memmap_frames(path: str, ds) -> Optional[np.ndarray]:
+    """Map uncompressed pixel data straight from disk; None when it has to be decoded."""
+    if ds.file_meta.TransferSyntaxUID.is_compressed:
+        return None
+    if ds.BitsAllocated not in (8, 16, 32) or ds.get("SamplesPerPixel", 1) != 1:
+        return None
+
+    elem = ds.get_item(0x7FE00010)  # (7FE0,0010) PixelData, still raw when deferred
+    if elem is None or getattr(elem, "value_tell", None) is None:
+        return None
+
+    dtype = np.dtype(f"{'i' if ds.PixelRepresentation else 'u'}{ds.BitsAllocated // 8}")
+    dtype = dtype.newbyteorder("<" if ds.file_meta.TransferSyntaxUID.is_little_endian else ">")
+    frames = int(ds.get("NumberOfFrames", 1) or 1)
+    return np.memmap(path, dtype=dtype, mode="r", offset=elem.value_tell, shape=(frames, ds.Rows, ds.Columns))
+
+
+def load_frame(path: str, frame: int = 0) -> tuple[np.ndarray, "pydicom.Dataset"]:
+    _require_pydicom()
+    # defer_size leaves large values (PixelData) on disk until something reads them
+    ds = pydicom.dcmread(path, defer_size="1 KB")
+    frames = _memmap_frames(path, ds)
+    if frames is not None:
+        return frames[frame], ds
+
+    pixels = ds.pixel_array  # compressed or packed: full decode is unavoidable
+    if int(ds.get("NumberOfFrames", 1) or 1) > 1:
+        pixels = pixels[frame]
+    return pixels, ds
+
+
+def to_display_array(pixels: np.ndarray, ds) -> np.ndarray:
+    """Apply modality rescale and VOI windowing, returning 8-bit pixels."""
+    if pixels.ndim == 3:  # colour (RGB) data is already display-ready
+        return pixels.astype(np.uint8)
+
+    values = pixels.astype(np.float32)
+    values = values * float(ds.get("RescaleSlope", 1) or 1) + float(ds.get("RescaleIntercept", 0) or 0)
+
+    center, width = ds.get("WindowCenter"), ds.get("WindowWidth")
+    if center is not None and width is not None:
+        # Multi-valued windows list alternatives; the first is the default
+        center = float(center[0] if isinstance(center, MultiValue) else center)
+        width = float(width[0] if isinstance(width, MultiValue) else width)
+        lo, hi = center - width / 2, center + width / 2
+    else:
+        lo, hi = float(values.min()), float(values.max())
+
+    scale = 255.0 / (hi - lo) if hi > lo else 0.0
+    display = np.clip((values - lo) * scale, 0, 255).astype(np.uint8)
+    if ds.get("PhotometricInterpretation") == "MONOCHROME1":
+        display = 255 - display
+    return display
+
+
+def render_frame(path: str, frame: Optional[int] = None) -> PILImage.Image:
+    """Decode a single frame (the middle one by default) to an 8-bit PIL image."""
+    if frame is None:
+        frame = read_header(path).number_of_frames // 2
+    pixels, ds = load_frame(path, frame)
+    return PILImage.fromarray(to_display_array(pixels, ds))
@@ -0,0 +1,227 @@
+import itertools
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+from PIL import Image as PILImage
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import DUPLICATE_MAX_DISTANCE, DUPLICATE_INDEX_OVERLAP, DUPLICATE_INDEX_RESYNC_SECONDS
+from app.models.images import Image
+
+HASH_BITS = 64
+DCT_SIZE = 32  # image is reduced to 32x32; the top-left 8x8 DCT coefficients make the hash
+BANDS = 4  # 16-bit substrings per hash for multi-index hashing
+BAND_BITS = HASH_BITS // BANDS
+
+
+# ---------- Perceptual hash ----------
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II basis; D @ X @ D.T is the 2-D DCT of X."""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    basis = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    basis[0] /= np.sqrt(2.0)
+    return basis
+
+
+_DCT = _dct_matrix(DCT_SIZE)
+
+
+def phash(display: np.ndarray) -> int:
+    """64-bit pHash of 8-bit grey pixels: bits set where a low-frequency DCT coefficient
+    exceeds their median. Survives rescaling, re-encoding and mild crops or contrast changes."""
+    small = PILImage.fromarray(display).convert("L").resize((DCT_SIZE, DCT_SIZE), PILImage.LANCZOS)
+    coefficients = (_DCT @ np.asarray(small, dtype=np.float64) @ _DCT.T)[:8, :8].ravel()
+    # The DC term is overall brightness, not structure; it would skew the median
+    bits = coefficients > np.median(coefficients[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def to_signed(value: int) -> int:
+    # BIGINT columns are signed; store the same 64 bits in two's complement
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def to_unsigned(value: int) -> int:
+    return value & ((1 << HASH_BITS) - 1)
+
+
+def distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+# ---------- Multi-index hash table ----------
+class PerceptualHashIndex:
+    """Multi-index hash table over image pHashes, for near-duplicate lookups by Hamming distance.
+
+    Each hash is split into BANDS 16-bit substrings with one table per band. Two hashes within
+    distance d share, in at least one band, a substring within d // BANDS bits, so a lookup
+    probes each table with every such variant of the query band and checks the few candidates
+    exactly - a few dozen dict lookups instead of a scan over every stored image.
+
+    Built from the table on first use. Writes through the ORM in this process land via mapper
+    events; rows inserted by other workers are picked up by a catch-up query before each
+    lookup. Ids are allocated at insert but become visible at commit, so the catch-up starts
+    DUPLICATE_INDEX_OVERLAP ids below the newest seen, and a full reload every
+    DUPLICATE_INDEX_RESYNC_SECONDS covers slower transactions and deletes in other workers.
+    Results are re-read from the database, so deleted images never surface.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built_at: Optional[float] = None
+        self._max_id = 0
+        self._hashes: dict[int, int] = {}
+        self._tables: list[dict[int, set[int]]] = [{} for _ in range(BANDS)]
+
+    @staticmethod
+    def _bands(value: int) -> list[int]:
+        mask = (1 << BAND_BITS) - 1
+        return [(value >> (band * BAND_BITS)) & mask for band in range(BANDS)]
+
+    def _add(self, image_id: int, value: int) -> None:
+        self._remove(image_id)
+        self._hashes[image_id] = value
+        self._max_id = max(self._max_id, image_id)
+        for table, key in zip(self._tables, self._bands(value)):
+            table.setdefault(key, set()).add(image_id)
+
+    def _remove(self, image_id: int) -> None:
+        value = self._hashes.pop(image_id, None)
+        if value is None:
+            return
+        for table, key in zip(self._tables, self._bands(value)):
+            ids = table.get(key)
+            if ids is not None:
+                ids.discard(image_id)
+                if not ids:
+                    del table[key]
+
+    def add(self, image_id: int, value: int) -> None:
+        with self._lock:
+            self._add(image_id, value)
+
+    def remove(self, image_id: int) -> None:
+        with self._lock:
+            self._remove(image_id)
+
+    def _load(self, db: Session, after_id: int) -> None:
+        stmt = (
+            select(Image.id, Image.phash)
+            .where(Image.id > after_id, Image.phash.is_not(None))
+            .execution_options(yield_per=10000)
+        )
+        for image_id, value in db.execute(stmt):
+            if image_id not in self._hashes:
+                self._add(image_id, to_unsigned(value))
+
+    def sync(self, db: Session) -> None:
+        with self._lock:
+            if self._built_at is None or time.monotonic() - self._built_at > DUPLICATE_INDEX_RESYNC_SECONDS:
+                self._hashes = {}
+                self._tables = [{} for _ in range(BANDS)]
+                self._max_id = 0
+                self._load(db, 0)
+                self._built_at = time.monotonic()
+            else:
+                self._load(db, self._max_id - DUPLICATE_INDEX_OVERLAP)
+
+    def _probes(self, key: int, radius: int):
+        for flips in range(radius + 1):
+            for positions in itertools.combinations(range(BAND_BITS), flips):
+                probe = key
+                for position in positions:
+                    probe ^= 1 << position
+                yield probe
+
+    def search(self, value: int, max_distance: int, exclude: Optional[int] = None) -> list[tuple[int, int]]:
+        """(image_id, distance) within max_distance of `value`, nearest first."""
+        radius = max_distance // BANDS
+        with self._lock:
+            candidates = set()
+            for table, key in zip(self._tables, self._bands(value)):
+                for probe in self._probes(key, radius):
+                    candidates.update(table.get(probe, ()))
+            candidates.discard(exclude)
+            matches = [(image_id, distance(value, self._hashes[image_id])) for image_id in candidates]
+        matches = [match for match in matches if match[1] <= max_distance]
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+
+phash_index = PerceptualHashIndex()
+
+
+@event.listens_for(Image, "after_insert")
+def _index_image(mapper, connection, image):
+    if image.phash is not None:
+        phash_index.add(image.id, to_unsigned(image.phash))
+
+
+@event.listens_for(Image, "before_delete")
+def _unlink_duplicates(mapper, connection, image):
+    # ondelete="SET NULL" does the same, but SQLite only enforces it with PRAGMA foreign_keys
+    images = Image.__table__
+    connection.execute(update(images).where(images.c.duplicate_of_id == image.id).values(duplicate_of_id=None))
+
+
+@event.listens_for(Image, "after_delete")
+def _unindex_image(mapper, connection, image):
+    phash_index.remove(image.id)
+
+
+# ---------- Queries ----------
+def find_duplicate(
+    db: Session, value: int, max_distance: int = DUPLICATE_MAX_DISTANCE, study_instance_uid: Optional[str] = None
+) -> Optional[tuple[int, int]]:
+    """Nearest stored image within max_distance of an (unsigned) pHash, as (image_id, distance).
+
+    Images of the same DICOM study don't count: adjacent slices of a series look alike by
+    design, they're not re-uploads of each other."""
+    phash_index.sync(db)
+    for image_id, dist in phash_index.search(value, max_distance):
+        image = db.get(Image, image_id)
+        if image is not None and not (study_instance_uid and image.study_instance_uid == study_instance_uid):
+            return image_id, dist
+    return None
+
+
+def _same_study(a: Image, b: Image) -> bool:
+    return bool(a.study_instance_uid) and a.study_instance_uid == b.study_instance_uid
+
+
+def duplicates_for_patient(
+    db: Session, patient_id: int, max_distance: int = DUPLICATE_MAX_DISTANCE
+) -> list[tuple[Image, Image, int]]:
+    """(image, near-duplicate, distance) for every image of the patient; duplicates may
+    belong to other patients, which usually means a misfiled upload. Like find_duplicate,
+    images of one study are never paired."""
+    phash_index.sync(db)
+    images = db.scalars(
+        select(Image).where(Image.patient_id == patient_id, Image.phash.is_not(None)).order_by(Image.id)
+    ).all()
+    found = []
+    for image in images:
+        for other_id, dist in phash_index.search(to_unsigned(image.phash), max_distance, exclude=image.id):
+            found.append((image.id, other_id, dist))
+
+    others = {i.id: i for i in db.scalars(select(Image).where(Image.id.in_({o for _, o, _ in found})))}
+    by_id = {i.id: i for i in images}
+    pairs = []
+    seen = set()
+    for image_id, other_id, dist in found:
+        pair = frozenset((image_id, other_id))
+        if other_id not in others or pair in seen:
+            continue
+        seen.add(pair)  # both images of a pair may belong to this patient
+        if _same_study(by_id[image_id], others[other_id]):
+            continue
+        pairs.append((by_id[image_id], others[other_id], dist))
+    pairs.sort(key=lambda pair: (pair[2], pair[0].id, pair[1].id))
+    return pairs
@@ -0,0 +1,89 @@
+from typing import Optional
+
+import numpy as np
+from PIL import Image as PILImage
+
+from app.core.config import (
+    IMAGE_STATS_MAX_PIXELS,
+    IMAGE_STATS_HISTOGRAM_BINS,
+    IMAGE_UNDEREXPOSED_MEAN,
+    IMAGE_OVEREXPOSED_MEAN,
+)
+from app.services import dicom, duplicates
+from app.services.imaging import to_display
+
+# Bits per sample for PIL modes; DICOM reports BitsStored instead
+MODE_BIT_DEPTH = {"1": 1, "L": 8, "P": 8, "LA": 8, "RGB": 8, "RGBA": 8, "CMYK": 8, "YCbCr": 8,
+                  "I;16": 16, "I;16B": 16, "I;16L": 16, "I": 32, "F": 32}
+
+# Display levels counted as crushed blacks / blown highlights
+CLIP_LOW, CLIP_HIGH = 5, 250
+
+
+def _subsample(pixels: np.ndarray) -> np.ndarray:
+    """Strided view keeping at most IMAGE_STATS_MAX_PIXELS pixels; a regular grid keeps the histogram shape."""
+    step = int(np.ceil(np.sqrt(pixels.shape[0] * pixels.shape[1] / IMAGE_STATS_MAX_PIXELS)))
+    return pixels[::step, ::step] if step > 1 else pixels
+
+
+def _load(path: str, mime_type: Optional[str]) -> tuple[np.ndarray, np.ndarray, int]:
+    """(raw values, 8-bit display pixels, bit depth) for one representative frame."""
+    if mime_type == dicom.DICOM_MIME:
+        header = dicom.read_header(path)
+        pixels, ds = dicom.load_frame(path, header.number_of_frames // 2)
+        pixels = _subsample(pixels)
+        # Raw stats in modality units (e.g. Hounsfield), display stats after VOI windowing
+        raw = pixels.astype(np.float32) * float(ds.get("RescaleSlope", 1) or 1) + float(ds.get("RescaleIntercept", 0) or 0)
+        display = dicom.to_display_array(pixels, ds)
+        return raw, display, int(ds.get("BitsStored") or ds.BitsAllocated)
+
+    with PILImage.open(path) as img:
+        bit_depth = MODE_BIT_DEPTH.get(img.mode, 8)
+        # Decode at reduced size where the codec supports it (JPEG); stats don't need full resolution
+        img.draft("L", (2048, 2048))
+        raw = _subsample(np.asarray(img.convert("F") if bit_depth > 8 else img.convert("L")))
+        display = _subsample(np.asarray(to_display(img).convert("L")))
+    return raw.astype(np.float32), display, bit_depth
+
+
+def analyze(path: str, mime_type: Optional[str]) -> dict:
+    """Pixel statistics, an exposure/contrast grade and the perceptual hash, as column values
+    for the Image row."""
+    raw, display, bit_depth = _load(path, mime_type)
+    if display.ndim == 3:  # colour DICOM: grade the luminance
+        display = np.asarray(PILImage.fromarray(display).convert("L"))
+
+    counts = np.bincount(display.ravel(), minlength=256)
+    fractions = counts / max(int(counts.sum()), 1)
+    cumulative = np.cumsum(fractions)
+    levels = np.arange(256)
+
+    mean = float(levels @ fractions)
+    # 1st-99th percentile spread: the usable dynamic range, ignoring a few outliers
+    p1, p99 = np.searchsorted(cumulative, [0.01, 0.99])
+    contrast = float(p99 - p1) / 255.0
+    clipped = float(fractions[:CLIP_LOW + 1].sum() + fractions[CLIP_HIGH:].sum())
+
+    if mean < IMAGE_UNDEREXPOSED_MEAN:
+        exposure = "under"
+    elif mean > IMAGE_OVEREXPOSED_MEAN:
+        exposure = "over"
+    else:
+        exposure = "normal"
+    # 1.0 for a mid-grey-centred image using its full range with nothing clipped
+    centring = 1.0 - abs(mean - 127.5) / 127.5
+    quality = contrast * (1.0 - clipped) * (0.5 + 0.5 * centring)
+
+    bins = np.histogram(levels, bins=IMAGE_STATS_HISTOGRAM_BINS, range=(0, 256), weights=fractions)[0]
+    return {
+        "bit_depth": bit_depth,
+        "pixel_min": float(raw.min()),
+        "pixel_max": float(raw.max()),
+        "pixel_mean": float(raw.mean(dtype=np.float64)),
+        "pixel_std": float(raw.std(dtype=np.float64)),
+        "histogram": [round(float(b), 5) for b in bins],
+        "contrast_score": round(contrast, 4),
+        "exposure": exposure,
+        "quality_score": round(quality, 4),
+        "phash": duplicates.to_signed(duplicates.phash(display)),
+    }
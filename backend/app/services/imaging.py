@@ -0,0 +1,128 @@
+import os
+import uuid
+
+import numpy as np
+from PIL import Image as PILImage, UnidentifiedImageError
+
+from app.core.config import AI_INPUT_MAX_EDGE, AI_INPUT_FORMAT, AI_INPUT_QUALITY
+from app.core.storage import DERIVED_DIR, blob_store
+from app.services import dicom
+
+MODEL_INPUT_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+    "png": ("PNG", "image/png", "png"),
+    "webp": ("WEBP", "image/webp", "webp"),
+}
+
+
+def derived_dir(image) -> str:
+    # Keyed by content hash so deduplicated uploads share their derivatives.
+    if image.sha256:
+        return blob_store.derived_path(image.sha256)
+    return os.path.join(DERIVED_DIR, f"image-{image.id}")
+
+
+def source_path(image) -> str:
+    path = blob_store.resolve(image)
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError(f"Image file not found at {path}")
+    return path
+
+
+def read_metadata(path: str) -> dict:
+    """Header-only inspection at ingest: column values for the Image row, no pixel decoding."""
+    if dicom.is_dicom(path):
+        header = dicom.read_header(path)
+        return {
+            "mime_type": dicom.DICOM_MIME,
+            "modality": header.modality,
+            "study_instance_uid": header.study_instance_uid,
+            "series_instance_uid": header.series_instance_uid,
+            "sop_instance_uid": header.sop_instance_uid,
+            "instance_number": header.instance_number,
+            "width": header.columns,
+            "height": header.rows,
+            "number_of_frames": header.number_of_frames,
+        }
+
+    try:
+        # PIL.Image.open only parses the header; pixels load on first access
+        with PILImage.open(path) as img:
+            return {
+                "mime_type": PILImage.MIME.get(img.format, "application/octet-stream"),
+                "width": img.width,
+                "height": img.height,
+                "number_of_frames": getattr(img, "n_frames", 1),
+            }
+    except UnidentifiedImageError:
+        return {"mime_type": "application/octet-stream"}
+
+
+def open_image(image) -> PILImage.Image:
+    path = source_path(image)
+    if image.mime_type == dicom.DICOM_MIME:
+        return dicom.render_frame(path)
+    return PILImage.open(path)
+
+
+def to_display(img: PILImage.Image) -> PILImage.Image:
+    """Convert any decoded image to 8-bit L or RGB for JPEG/PNG output."""
+    if img.mode in ("L", "RGB"):
+        return img
+    if img.mode in ("I", "I;16", "I;16B", "I;16L", "F"):
+        # Stretch high-bit-depth data into 0..255 instead of clipping it.
+        pixels = np.asarray(img, dtype=np.float32)
+        lo, hi = float(pixels.min()), float(pixels.max())
+        scale = 255.0 / (hi - lo) if hi > lo else 0.0
+        return PILImage.fromarray(((pixels - lo) * scale).astype(np.uint8), mode="L")
+    if img.mode in ("1", "LA"):
+        return img.convert("L")
+    return img.convert("RGB")
+
+
+def sniff_mime(path: str) -> str:
+    """MIME type from the file's content, whatever its name or the stored mime_type claims."""
+    if dicom.is_dicom(path):
+        return dicom.DICOM_MIME
+    try:
+        with PILImage.open(path) as img:
+            return PILImage.MIME.get(img.format, "application/octet-stream")
+    except UnidentifiedImageError:
+        return "application/octet-stream"
+
+
+# ---------- Model input ----------
+def model_input_path(image) -> str:
+    # The settings are part of the name, so changing them never serves a stale payload
+    _, _, ext = MODEL_INPUT_FORMATS[AI_INPUT_FORMAT]
+    return os.path.join(derived_dir(image), f"model_{AI_INPUT_MAX_EDGE}_{AI_INPUT_QUALITY}.{ext}")
+
+
+def _prepare_model_input(image, path: str) -> None:
+    pil_format, _, _ = MODEL_INPUT_FORMATS[AI_INPUT_FORMAT]
+    src = source_path(image)
+    mime_type = sniff_mime(src)
+    with (dicom.render_frame(src) if mime_type == dicom.DICOM_MIME else PILImage.open(src)) as img:
+        # JPEG sources decode straight at (about) the target size
+        img.draft("RGB", (AI_INPUT_MAX_EDGE, AI_INPUT_MAX_EDGE))
+        # DICOM is already windowed to 8 bits; 16-bit PNG/TIFF gets stretched the same way
+        img = to_display(img)
+        if max(img.size) > AI_INPUT_MAX_EDGE:
+            img.thumbnail((AI_INPUT_MAX_EDGE, AI_INPUT_MAX_EDGE), PILImage.LANCZOS)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        options = {"optimize": True} if pil_format == "PNG" else {"quality": AI_INPUT_QUALITY}
+        img.save(tmp_path, pil_format, **options)
+    os.replace(tmp_path, path)
+
+
+def model_payload(image) -> tuple[bytes, str]:
+    """Bytes and MIME type to send to the vision model for an Image row: decoded (DICOM
+    windowed), downscaled to AI_INPUT_MAX_EDGE and re-encoded once, then served from disk."""
+    _, mime_type, _ = MODEL_INPUT_FORMATS[AI_INPUT_FORMAT]
+    path = model_input_path(image)
+    if not os.path.exists(path):
+        _prepare_model_input(image, path)
+    with open(path, "rb") as f:
+        return f.read(), mime_type
@@ -0,0 +1,204 @@
+import re
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import case, event, func, literal, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import PATIENT_SEARCH_SIMILARITY, PATIENT_SEARCH_WORD_SIMILARITY
+from app.models.patients import Patient
+
+DOB_WEIGHT = 0.5  # added to the name score for an exact DOB match, half that for a likely typo
+
+
+# ---------- Trigrams ----------
+def normalize(name: Optional[str]) -> str:
+    return " ".join(re.findall(r"\w+", (name or "").lower()))
+
+
+def trigrams(name: str) -> set[str]:
+    """Same trigram set pg_trgm extracts: each word padded with two leading and one trailing space."""
+    grams = set()
+    for word in normalize(name).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def dob_variants(dob: date) -> set[date]:
+    """Dates a mistyped DOB most plausibly came from: day/month swapped, off-by-one day or
+    year, and the last two year digits transposed."""
+    candidates = [dob - timedelta(days=1), dob + timedelta(days=1)]
+    for year, month, day in (
+        (dob.year, dob.day, dob.month),
+        (dob.year - 1, dob.month, dob.day),
+        (dob.year + 1, dob.month, dob.day),
+        (dob.year - dob.year % 100 + (dob.year % 10) * 10 + (dob.year // 10) % 10, dob.month, dob.day),
+    ):
+        try:
+            candidates.append(date(year, month, day))
+        except ValueError:
+            continue
+    return {d for d in candidates if d != dob}
+
+
+def _dob_score(patient_dob: Optional[date], dob: Optional[date], variants: set[date]) -> float:
+    if dob is None or patient_dob is None:
+        return 0.0
+    if patient_dob == dob:
+        return DOB_WEIGHT
+    return DOB_WEIGHT / 2 if patient_dob in variants else 0.0
+
+
+# ---------- In-process fallback index ----------
+class TrigramIndex:
+    """Inverted trigram index over patient names, for backends without pg_trgm.
+
+    Built from the table on first search and kept current by mapper events, so it only
+    sees writes made through the ORM in this process. Results are re-read from the
+    database, so an entry left behind by a rolled-back write never surfaces a stale row.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built = False
+        self._postings: dict[str, set[int]] = {}
+        self._grams: dict[int, frozenset] = {}
+        self._dobs: dict[int, Optional[date]] = {}
+
+    def _add(self, patient_id: int, full_name: Optional[str], dob: Optional[date]) -> None:
+        self._remove(patient_id)
+        grams = frozenset(trigrams(full_name))
+        self._grams[patient_id] = grams
+        self._dobs[patient_id] = dob
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(patient_id)
+
+    def _remove(self, patient_id: int) -> None:
+        for gram in self._grams.pop(patient_id, ()):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(patient_id)
+                if not ids:
+                    del self._postings[gram]
+        self._dobs.pop(patient_id, None)
+
+    def add(self, patient_id: int, full_name: Optional[str], dob: Optional[date]) -> None:
+        with self._lock:
+            self._add(patient_id, full_name, dob)
+
+    def remove(self, patient_id: int) -> None:
+        with self._lock:
+            self._remove(patient_id)
+
+    def ensure_built(self, db: Session) -> None:
+        if self._built:
+            return
+        with self._lock:
+            if self._built:
+                return
+            stmt = select(Patient.id, Patient.full_name, Patient.date_of_birth).execution_options(yield_per=10000)
+            for patient_id, full_name, dob in db.execute(stmt):
+                # Don't clobber a newer value written by a mapper event while we were loading
+                if patient_id not in self._grams:
+                    self._add(patient_id, full_name, dob)
+            self._built = True
+
+    def search(self, q: str, dob: Optional[date], limit: int) -> list[tuple[int, float]]:
+        query_grams = trigrams(q)
+        if not query_grams:
+            return []
+        variants = dob_variants(dob) if dob else set()
+        with self._lock:
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self._postings.get(gram, ()))
+
+            scored = []
+            for patient_id, common in shared.items():
+                # similarity() is Jaccard over trigram sets; containment stands in for
+                # word_similarity() (how much of the query appears within the name)
+                similarity = common / (len(query_grams) + len(self._grams[patient_id]) - common)
+                word_similarity = common / len(query_grams)
+                if similarity < PATIENT_SEARCH_SIMILARITY and word_similarity < PATIENT_SEARCH_WORD_SIMILARITY:
+                    continue
+                score = max(similarity, word_similarity) + _dob_score(self._dobs[patient_id], dob, variants)
+                scored.append((score, similarity, patient_id))
+        scored.sort(key=lambda item: (-item[0], -item[1], item[2]))
+        return [(patient_id, score) for score, _, patient_id in scored[:limit]]
+
+
+trigram_index = TrigramIndex()
+
+
+@event.listens_for(Patient, "after_insert")
+@event.listens_for(Patient, "after_update")
+def _index_patient(mapper, connection, patient):
+    trigram_index.add(patient.id, patient.full_name, patient.date_of_birth)
+
+
+@event.listens_for(Patient, "after_delete")
+def _unindex_patient(mapper, connection, patient):
+    trigram_index.remove(patient.id)
+
+
+# ---------- Search ----------
+def _dob_score_clause(dob: Optional[date], variants: set[date]):
+    if dob is None:
+        return literal(0.0)
+    return case(
+        (Patient.date_of_birth == dob, DOB_WEIGHT),
+        (Patient.date_of_birth.in_(variants), DOB_WEIGHT / 2),
+        else_=0.0,
+    )
+
+
+def _ranked_by_name_pg(db: Session, q: str, dob: Optional[date], limit: int) -> list[tuple[int, float]]:
+    # The % and <% operators use the GIN trigram index; their cut-offs are per transaction
+    db.execute(
+        text("SELECT set_config('pg_trgm.similarity_threshold', :s, true), "
+             "set_config('pg_trgm.word_similarity_threshold', :w, true)"),
+        {"s": str(PATIENT_SEARCH_SIMILARITY), "w": str(PATIENT_SEARCH_WORD_SIMILARITY)},
+    )
+    name = func.lower(Patient.full_name)
+    similarity = func.similarity(name, q)
+    score = func.greatest(similarity, func.word_similarity(q, name)) + _dob_score_clause(dob, dob_variants(dob) if dob else set())
+    stmt = (
+        select(Patient.id, score.label("score"))
+        .where(text("(lower(patients.full_name) % :q OR :q <% lower(patients.full_name))").bindparams(q=q))
+        .order_by(score.desc(), similarity.desc(), Patient.id)
+        .limit(limit)
+    )
+    return [(row.id, float(row.score)) for row in db.execute(stmt)]
+
+
+def _ranked_by_dob(db: Session, dob: date, limit: int) -> list[tuple[int, float]]:
+    variants = dob_variants(dob)
+    score = _dob_score_clause(dob, variants)
+    stmt = (
+        select(Patient.id, score.label("score"))
+        .where(Patient.date_of_birth.in_(variants | {dob}))
+        .order_by(score.desc(), Patient.full_name, Patient.id)
+        .limit(limit)
+    )
+    return [(row.id, float(row.score)) for row in db.execute(stmt)]
+
+
+def search_patients(db: Session, q: Optional[str], dob: Optional[date], limit: int) -> list[tuple[Patient, float]]:
+    """Best matches for a partial or misspelled name and/or a possibly mistyped DOB."""
+    q = normalize(q)
+    if q:
+        if db.get_bind().dialect.name == "postgresql":
+            ranked = _ranked_by_name_pg(db, q, dob, limit)
+        else:
+            trigram_index.ensure_built(db)
+            ranked = trigram_index.search(q, dob, limit)
+    elif dob:
+        ranked = _ranked_by_dob(db, dob, limit)
+    else:
+        return []
+
+    patients = {p.id: p for p in db.scalars(select(Patient).where(Patient.id.in_([pid for pid, _ in ranked])))}
+    return [(patients[pid], score) for pid, score in ranked if pid in patients]
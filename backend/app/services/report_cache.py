@@ -0,0 +1,133 @@
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import AI_CACHE_TTL, AI_CACHE_MAX_ENTRIES
+from app.models.images import Image
+from app.models.report_cache import ReportCacheEntry
+
+# Run the size cap only every N writes; counting the table on every put is wasted work.
+EVICT_EVERY = 100
+
+
+class ReportCache:
+    """Generated findings keyed by (image content hash, prompt template version, model name)."""
+
+    def __init__(self, ttl: int = AI_CACHE_TTL, max_entries: int = AI_CACHE_MAX_ENTRIES):
+        self.ttl = timedelta(seconds=ttl)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(image_sha256: str, prompt_version: str, model_name: str) -> str:
+        return hashlib.sha256(f"{image_sha256}:{prompt_version}:{model_name}".encode()).hexdigest()
+
+    def _count(self, attr: str) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def record_bypass(self) -> None:
+        self._count("bypasses")
+
+    def get(self, db: Session, image: Image, prompt_version: str, model_name: str) -> Optional[str]:
+        """Cached findings, or None. Hit bookkeeping and expiry are flushed, not committed:
+        they land with whatever the caller commits next."""
+        if not image.sha256:
+            self._count("misses")
+            return None
+
+        entry = db.get(ReportCacheEntry, self.key(image.sha256, prompt_version, model_name))
+        now = datetime.utcnow()
+        if entry and entry.created_at < now - self.ttl:
+            db.delete(entry)
+            db.flush()
+            entry = None
+        if not entry:
+            self._count("misses")
+            return None
+
+        entry.hit_count += 1
+        entry.last_hit_at = now
+        db.flush()
+        self._count("hits")
+        return entry.findings
+
+    def put(self, db: Session, image: Image, prompt_version: str, model_name: str, findings: str) -> None:
+        """Store findings for the image's content. Like get, this flushes and leaves the commit
+        to the caller, which saves the report in the same transaction."""
+        if not image.sha256:
+            return
+
+        key = self.key(image.sha256, prompt_version, model_name)
+        entry = db.get(ReportCacheEntry, key)
+        if entry:
+            # Explicit bypass regenerated it; keep the fresh text
+            entry.findings = findings
+            entry.size_bytes = len(findings.encode())
+            entry.created_at = entry.last_hit_at = datetime.utcnow()
+            db.flush()
+        else:
+            try:
+                with db.begin_nested():
+                    db.add(ReportCacheEntry(
+                        cache_key=key,
+                        image_sha256=image.sha256,
+                        prompt_version=prompt_version,
+                        model_name=model_name,
+                        findings=findings,
+                        size_bytes=len(findings.encode()),
+                    ))
+            except IntegrityError:
+                # Another worker cached the same result first; only the savepoint rolled back
+                pass
+
+        with self._lock:
+            self._puts += 1
+            due = self._puts % EVICT_EVERY == 0
+        if due:
+            self.evict(db)
+
+    def evict(self, db: Session) -> int:
+        """Drop expired entries, then the least recently hit ones beyond max_entries."""
+        removed = (
+            db.query(ReportCacheEntry)
+            .filter(ReportCacheEntry.created_at < datetime.utcnow() - self.ttl)
+            .delete(synchronize_session=False)
+        )
+        overflow = db.query(ReportCacheEntry).count() - self.max_entries
+        if overflow > 0:
+            oldest = (
+                db.query(ReportCacheEntry.cache_key)
+                .order_by(ReportCacheEntry.last_hit_at)
+                .limit(overflow)
+                .subquery()
+            )
+            removed += (
+                db.query(ReportCacheEntry)
+                .filter(ReportCacheEntry.cache_key.in_(select(oldest.c.cache_key)))
+                .delete(synchronize_session=False)
+            )
+        db.flush()
+        return removed
+
+    def stats(self, db: Session) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": db.query(ReportCacheEntry).count(),
+        }
+
+
+report_cache = ReportCache()
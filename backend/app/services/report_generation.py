@@ -0,0 +1,112 @@
+import threading
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy.orm import Session
+
+from app.models.images import Image
+from app.models.reports import Report
+from app.services import imaging, stats
+from app.services.ai_providers import ProviderError, get_provider
+from app.services.report_cache import report_cache
+
+
+class ReportGenerationError(Exception):
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+# Bump whenever build_prompt's template changes; cached findings are keyed on it.
+PROMPT_VERSION = "1"
+
+
+def model_name() -> str:
+    return get_provider().model_name
+
+
+def build_prompt(image: Image) -> str:
+    return f"""
+You are an expert radiologist. Please generate a structured medical report based on the provided chest X-ray image.
+
+Image Details:
+- Filename: {image.filename}
+- Description: {image.description or 'No description provided'}
+- Scan Type: Chest X-ray
+
+Required Output:
+- Findings
+- Recommendations
+
+Analyze the uploaded X-ray image and provide a detailed interpretation.
+"""
+
+
+def load_payload(image: Image) -> tuple[bytes, str]:
+    # Downscaled, re-encoded copy of the stored file (DICOM windowed to one frame), cached on disk
+    try:
+        return imaging.model_payload(image)
+    except FileNotFoundError as e:
+        raise ReportGenerationError(str(e), retryable=False)
+    except Exception as e:
+        raise ReportGenerationError(f"Error reading image file: {str(e)}", retryable=False)
+
+
+def generate_findings(image: Image) -> str:
+    image_content, mime_type = load_payload(image)
+    try:
+        text = get_provider().generate(build_prompt(image), image_content, mime_type)
+    except ProviderError as e:
+        raise ReportGenerationError(str(e))
+
+    if not text:
+        raise ReportGenerationError("Empty response from model")
+    return text
+
+
+def stream_findings(image: Image, cancelled: threading.Event) -> Iterator[str]:
+    """Yield model output as it arrives; stops pulling from upstream once cancelled is set."""
+    image_content, mime_type = load_payload(image)
+    chunks = get_provider().stream(build_prompt(image), image_content, mime_type)
+    try:
+        for text in chunks:
+            if cancelled.is_set():
+                break
+            yield text
+    except ProviderError as e:
+        raise ReportGenerationError(str(e))
+    finally:
+        chunks.close()
+
+
+def create_report(db: Session, image: Image, findings: str) -> Report:
+    report = Report(
+        patient_id=image.patient_id,
+        image_id=image.id,
+        title=f"AI Report for {image.filename}",
+        findings=findings,
+        recommendations=f"See findings section. Generated via {model_name()}.",
+        created_at=datetime.utcnow()
+    )
+
+    db.add(report)
+    stats.increment(db, stats.ai_reports_key(report.created_at.date()))
+    db.commit()
+    db.refresh(report)
+    return report
+
+
+def cached_findings(db: Session, image: Image):
+    return report_cache.get(db, image, PROMPT_VERSION, model_name())
+
+
+def generate_report_for_image(db: Session, image_id: int, use_cache: bool = True) -> Report:
+    image = db.query(Image).filter(Image.id == image_id).first()
+    if not image:
+        raise ReportGenerationError("Image not found", retryable=False)
+
+    findings = cached_findings(db, image) if use_cache else None
+    if findings is None:
+        findings = generate_findings(image)
+        report_cache.put(db, image, PROMPT_VERSION, model_name(), findings)
+    return create_report(db, image, findings)
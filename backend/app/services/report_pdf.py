@@ -0,0 +1,204 @@
+import os
+import shutil
+import uuid
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from datetime import datetime
+from typing import BinaryIO, Iterable, Optional
+from xml.sax.saxutils import escape
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.conditional import latest, make_etag
+from app.core.config import UPLOAD_DIR, REPORT_PDF_WORKERS, REPORT_PDF_QUEUE_SIZE
+from app.core.process_pool import BoundedProcessPool
+from app.models.patients import Patient
+from app.models.reports import Report
+
+try:
+    import reportlab
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+except ImportError:  # PDF export is optional; the rest of the API works without it
+    reportlab = None
+
+PDF_DIR = os.path.join(UPLOAD_DIR, "derived", "reports")
+# Times a PDF is re-rendered when an edit or delete removes it between render and open
+OPEN_ATTEMPTS = 3
+
+
+class PdfRenderPool(BoundedProcessPool):
+    service = "PDF rendering"
+
+
+pdf_pool = PdfRenderPool(REPORT_PDF_WORKERS, REPORT_PDF_QUEUE_SIZE)
+
+
+def _require_reportlab():
+    if reportlab is None:
+        raise HTTPException(status_code=501, detail="PDF export is not available: reportlab is not installed")
+
+
+# ---------- Cache keys ----------
+@dataclass(frozen=True)
+class PdfStamp:
+    """What a rendered PDF depends on. The patient's name is printed on it, so a patient
+    edit is a new document too (same rule as the report's ETag)."""
+
+    report_id: int
+    version: int
+    patient_version: Optional[int]
+    last_modified: Optional[datetime]
+
+    @property
+    def directory(self) -> str:
+        return os.path.join(PDF_DIR, str(self.report_id))
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{self.version}-{self.patient_version or 0}.pdf")
+
+    @property
+    def etag(self) -> str:
+        return make_etag("report-pdf", self.report_id, self.version, self.patient_version)
+
+
+def stamps(db: Session, report_ids: Iterable[int]) -> dict[int, PdfStamp]:
+    """Cache keys for the reports that exist, without loading their text."""
+    stmt = (
+        select(Report.id, Report.version, Report.updated_at, Patient.version, Patient.updated_at)
+        .outerjoin(Patient, Report.patient_id == Patient.id)
+        .where(Report.id.in_(set(report_ids)))
+    )
+    return {
+        report_id: PdfStamp(report_id, version, patient_version, latest([updated_at, patient_updated_at]))
+        for report_id, version, updated_at, patient_version, patient_updated_at in db.execute(stmt)
+    }
+
+
+def invalidate(report_id: int) -> None:
+    """Drop every cached rendering of a report (after an edit or delete of it or its patient)."""
+    shutil.rmtree(os.path.join(PDF_DIR, str(report_id)), ignore_errors=True)
+
+
+def _sweep(stamp: PdfStamp) -> None:
+    """Remove renderings older than `stamp`, e.g. ones showing the patient's old name."""
+    try:
+        names = os.listdir(stamp.directory)
+    except FileNotFoundError:
+        return
+    current = os.path.basename(stamp.path)
+    for name in names:
+        try:
+            version, patient_version = map(int, name.removesuffix(".pdf").split("-"))
+        except ValueError:
+            continue  # an in-flight .tmp
+        # Leave anything newer alone: a request that read its stamp earlier may finish last
+        if name != current and version <= stamp.version and patient_version <= (stamp.patient_version or 0):
+            try:
+                os.remove(os.path.join(stamp.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+# ---------- Rendering (runs in the pool's worker processes) ----------
+def _paragraphs(text: Optional[str], style) -> list:
+    blocks = [block.strip() for block in (text or "").split("\n\n") if block.strip()]
+    return [Paragraph(escape(block).replace("\n", "<br/>"), style) for block in blocks] or [Paragraph("-", style)]
+
+
+def render_to_file(data: dict, path: str) -> str:
+    styles = getSampleStyleSheet()
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    doc = SimpleDocTemplate(
+        tmp_path, pagesize=A4, title=data["title"] or f"Report {data['id']}",
+        leftMargin=20 * mm, rightMargin=20 * mm, topMargin=18 * mm, bottomMargin=18 * mm,
+    )
+    created = data["created_at"].strftime("%Y-%m-%d %H:%M UTC") if data["created_at"] else "-"
+    story = [
+        Paragraph(escape(data["title"] or f"Report {data['id']}"), styles["Title"]),
+        Paragraph(
+            f"<b>Patient:</b> {escape(data['patient_name'] or 'Unknown')} &nbsp;&nbsp; "
+            f"<b>Report:</b> #{data['id']} &nbsp;&nbsp; <b>Created:</b> {created}",
+            styles["Normal"],
+        ),
+        Spacer(1, 6 * mm),
+        Paragraph("Findings", styles["Heading2"]),
+        *_paragraphs(data["findings"], styles["BodyText"]),
+        Spacer(1, 4 * mm),
+        Paragraph("Recommendations", styles["Heading2"]),
+        *_paragraphs(data["recommendations"], styles["BodyText"]),
+    ]
+    doc.build(story)
+    os.replace(tmp_path, path)  # readers only ever see a complete file
+    return path
+
+
+# ---------- Cache fill ----------
+def _render_data(db: Session, report_ids: list[int]) -> dict[int, dict]:
+    stmt = (
+        select(
+            Report.id, Report.title, Report.findings, Report.recommendations, Report.created_at,
+            Patient.full_name.label("patient_name"),
+        )
+        .outerjoin(Patient, Report.patient_id == Patient.id)
+        .where(Report.id.in_(report_ids))
+    )
+    return {row.id: dict(row._mapping) for row in db.execute(stmt)}
+
+
+def ensure(db: Session, wanted: list[PdfStamp]) -> None:
+    """Render whichever of `wanted` are not cached yet, in parallel on the process pool.
+
+    The session is closed once the report text is read: renders can take a while and
+    shouldn't hold a pooled connection meanwhile (it reconnects if used again). A render
+    whose directory an invalidate removed is just left missing; `open_pdf` re-renders it.
+    """
+    missing = [stamp for stamp in wanted if not os.path.exists(stamp.path)]
+    if not missing:
+        return
+    _require_reportlab()
+    data = _render_data(db, [stamp.report_id for stamp in missing])
+    db.close()
+
+    def finish(futures) -> None:
+        for future in futures:
+            stamp = rendering.pop(future)
+            try:
+                pdf_pool.result(future)
+            except FileNotFoundError:
+                continue
+            _sweep(stamp)
+
+    # Keep only a couple of renders per worker in flight, so one big batch can't claim
+    # the whole pending budget and shut out single-report requests
+    window = max(1, pdf_pool.workers * 2)
+    rendering = {}
+    for stamp in missing:
+        if stamp.report_id not in data:
+            continue  # deleted since the stamp was read
+        if len(rendering) >= window:
+            done, _ = wait(rendering, return_when=FIRST_COMPLETED)
+            finish(done)
+        os.makedirs(stamp.directory, exist_ok=True)
+        rendering[pdf_pool.submit(render_to_file, data[stamp.report_id], stamp.path)] = stamp
+    finish(list(rendering))
+
+
+def open_pdf(db: Session, stamp: PdfStamp) -> tuple[PdfStamp, BinaryIO]:
+    """The report's PDF opened for reading, rendered first if need be, with the stamp it was
+    rendered for. An open file survives a later invalidate; one removed before it could be
+    opened is re-read and rendered again under the report's current stamp."""
+    for _ in range(OPEN_ATTEMPTS):
+        ensure(db, [stamp])
+        try:
+            return stamp, open(stamp.path, "rb")
+        except FileNotFoundError:
+            stamp = stamps(db, [stamp.report_id]).get(stamp.report_id)
+            if stamp is None:
+                raise HTTPException(status_code=404, detail="Report not found")
+    raise HTTPException(status_code=503, detail="Report is being edited, try again")
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.core.config import AI_WORKERS, AI_QUEUE_SIZE, AI_MAX_ATTEMPTS, AI_RETRY_BACKOFF, AI_RETRY_BACKOFF_MAX
+from app.database.session import SessionLocal
+from app.models.report_jobs import ReportJob
+from app.services.report_generation import ReportGenerationError, generate_report_for_image
+
+logger = logging.getLogger(__name__)
+
+# A job still "running" this long after it started belongs to a process that died.
+STALE_RUNNING_AFTER = timedelta(minutes=10)
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(AI_RETRY_BACKOFF * 2 ** (attempts - 1), AI_RETRY_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)  # jitter so retries don't arrive in lockstep
+
+
+def process_job(job_id: str, max_attempts: int = AI_MAX_ATTEMPTS) -> Optional[float]:
+    """Run one attempt of a job. Returns a retry delay in seconds, or None when finished."""
+    db = SessionLocal()
+    try:
+        # Claim atomically so two processes never run the same job
+        claimed = (
+            db.query(ReportJob)
+            .filter(ReportJob.id == job_id, ReportJob.status == "queued")
+            .update(
+                {
+                    ReportJob.status: "running",
+                    ReportJob.attempts: ReportJob.attempts + 1,
+                    ReportJob.started_at: datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if not claimed:
+            return None
+
+        job = db.query(ReportJob).filter(ReportJob.id == job_id).first()
+        try:
+            # The API looked the cache up before queueing (or was told to bypass it); a
+            # second lookup here would count every miss twice
+            report = generate_report_for_image(db, job.image_id, use_cache=False)
+        except ReportGenerationError as e:
+            db.rollback()
+            job.error = str(e)
+            if e.retryable and job.attempts < max_attempts:
+                job.status = "queued"
+                db.commit()
+                return _backoff(job.attempts)
+            job.status = "failed"
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            return None
+        except Exception as e:
+            # Not a model failure (a database error, a bug): retrying won't help, and left
+            # "running" the job would only be picked up again after a restart
+            logger.exception("Report job %s failed", job_id)
+            db.rollback()
+            job.status = "failed"
+            job.error = f"Internal error: {str(e)}"
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            return None
+
+        job.status = "done"
+        job.error = None
+        job.report_id = report.id
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        return None
+    finally:
+        db.close()
+
+
+class ReportJobQueue:
+    """In-process queue feeding a fixed number of workers; job state lives in report_jobs."""
+
+    def __init__(self, workers: int = AI_WORKERS, max_size: int = AI_QUEUE_SIZE):
+        self.workers = workers
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        # Dedicated threads: model calls never compete with request handlers for the default pool
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="report-worker")
+        for _ in range(self.workers):
+            self._spawn(self._worker())
+        # Jobs queued before a restart; may exceed max_size, so feed them in as room frees up
+        self._spawn(self._enqueue(await self._run_sync(self._pending_job_ids)))
+
+    async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False)
+
+    def submit(self, job_id: str) -> None:
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Report queue is full, try again later")
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    # ---------- Internals ----------
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_sync(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                delay = await self._run_sync(process_job, job_id)
+                if delay is not None:
+                    self._spawn(self._enqueue([job_id], delay))
+            except Exception:
+                logger.exception("Report job %s crashed", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _enqueue(self, job_ids: list[str], delay: float = 0) -> None:
+        # Retries wait here, outside the workers, so a backing-off job doesn't hold a slot
+        if delay:
+            await asyncio.sleep(delay)
+        for job_id in job_ids:
+            await self._queue.put(job_id)
+
+    @staticmethod
+    def _pending_job_ids() -> list[str]:
+        db = SessionLocal()
+        try:
+            stale = datetime.utcnow() - STALE_RUNNING_AFTER
+            db.query(ReportJob).filter(
+                ReportJob.status == "running", ReportJob.started_at < stale
+            ).update({ReportJob.status: "queued"}, synchronize_session=False)
+            db.commit()
+            rows = (
+                db.query(ReportJob.id)
+                .filter(ReportJob.status == "queued")
+                .order_by(ReportJob.created_at)
+                .all()
+            )
+            return [row.id for row in rows]
+        finally:
+            db.close()
+
+
+report_queue = ReportJobQueue()
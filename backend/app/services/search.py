@@ -0,0 +1,161 @@
+import base64
+import html
+import re
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, literal_column, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.models.patients import Patient
+from app.models.reports import Report
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+# The database marks matches with these private-use characters; the text is HTML-escaped
+# afterwards and only then do they become <mark> tags, so report text can't inject markup
+SENTINEL_START = "\ue000"
+SENTINEL_STOP = "\ue001"
+SEARCH_FIELDS = ("title", "findings", "recommendations")
+
+
+def _dialect(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def _fts5_query(q: str) -> str:
+    # Quote every term so user input can't produce FTS5 syntax errors; the last term
+    # matches as a prefix so results update while the user is still typing.
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return '""'
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _highlighted(fragment: Optional[str]) -> Optional[str]:
+    if fragment is None:
+        return None
+    return html.escape(fragment).replace(SENTINEL_START, HIGHLIGHT_START).replace(SENTINEL_STOP, HIGHLIGHT_STOP)
+
+
+def _highlights(row) -> dict:
+    return {f: _highlighted(getattr(row, f)) for f in SEARCH_FIELDS}
+
+
+def _pg_query(q: str):
+    return func.websearch_to_tsquery("english", q)
+
+
+def match_clause(db: Session, q: str):
+    """WHERE clause restricting Report rows to those matching the search text."""
+    dialect = _dialect(db)
+    if dialect == "postgresql":
+        return literal_column("reports.search_vector").op("@@")(_pg_query(q))
+    if dialect == "sqlite":
+        return Report.id.in_(
+            select(literal_column("rowid"))
+            .select_from(text("reports_fts"))
+            .where(text("reports_fts MATCH :fts_query").bindparams(fts_query=_fts5_query(q)))
+        )
+    # Other backends: unindexed substring match
+    pattern = f"%{q}%"
+    return or_(Report.title.ilike(pattern), Report.findings.ilike(pattern), Report.recommendations.ilike(pattern))
+
+
+# ---------- Ranked search ----------
+def encode_offset(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_offset(cursor: Optional[str]) -> int:
+    # Relevance order has no stable keyset, so ranked results page by offset
+    if not cursor:
+        return 0
+    try:
+        kind, value = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":")
+        if kind != "o":
+            raise ValueError("not a search cursor")
+        return max(0, int(value))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
+
+
+def _ranked_ids(db: Session, q: str, offset: int, limit: int) -> list[tuple[int, float, dict]]:
+    """(report id, rank, highlights) for one page, best match first."""
+    dialect = _dialect(db)
+    if dialect == "postgresql":
+        rows = db.execute(
+            text(
+                """
+                SELECT r.id,
+                       ts_rank_cd(r.search_vector, q) AS rank,
+                       ts_headline('english', coalesce(r.title, ''), q, :opts) AS title,
+                       ts_headline('english', coalesce(r.findings, ''), q, :opts) AS findings,
+                       ts_headline('english', coalesce(r.recommendations, ''), q, :opts) AS recommendations
+                FROM reports r, websearch_to_tsquery('english', :q) q
+                WHERE r.search_vector @@ q
+                ORDER BY rank DESC, r.id DESC
+                LIMIT :limit OFFSET :offset
+                """
+            ),
+            {
+                "q": q,
+                "opts": f'StartSel="{SENTINEL_START}",StopSel="{SENTINEL_STOP}",MaxFragments=2,MaxWords=30',
+                "limit": limit,
+                "offset": offset,
+            },
+        ).all()
+        return [(row.id, float(row.rank), _highlights(row)) for row in rows]
+
+    if dialect == "sqlite":
+        rows = db.execute(
+            text(
+                """
+                SELECT rowid AS id,
+                       bm25(reports_fts, 10.0, 4.0, 1.0) AS score,
+                       highlight(reports_fts, 0, :start, :stop) AS title,
+                       snippet(reports_fts, 1, :start, :stop, '...', 24) AS findings,
+                       snippet(reports_fts, 2, :start, :stop, '...', 24) AS recommendations
+                FROM reports_fts
+                WHERE reports_fts MATCH :q
+                ORDER BY score, rowid DESC
+                LIMIT :limit OFFSET :offset
+                """
+            ),
+            {"q": _fts5_query(q), "start": SENTINEL_START, "stop": SENTINEL_STOP, "limit": limit, "offset": offset},
+        ).all()
+        # bm25 is "lower is better"; flip it so rank always means "higher is better"
+        return [(row.id, -float(row.score), _highlights(row)) for row in rows]
+
+    ids = db.scalars(
+        select(Report.id).where(match_clause(db, q)).order_by(Report.id.desc()).limit(limit).offset(offset)
+    ).all()
+    return [(report_id, 0.0, {}) for report_id in ids]
+
+
+def search_reports(db: Session, q: str, cursor: Optional[str], limit: int) -> dict:
+    offset = decode_offset(cursor)
+    ranked = _ranked_ids(db, q, offset, limit + 1)
+    has_more = len(ranked) > limit
+    ranked = ranked[:limit]
+
+    rows = db.execute(
+        select(Report, Patient.full_name)
+        .outerjoin(Patient, Report.patient_id == Patient.id)
+        .where(Report.id.in_([report_id for report_id, _, _ in ranked]))
+    ).all()
+    by_id = {report.id: (report, patient_name) for report, patient_name in rows}
+
+    items = []
+    for report_id, rank, highlights in ranked:
+        if report_id not in by_id:
+            continue  # deleted between the two queries
+        report, patient_name = by_id[report_id]
+        items.append({"report": report, "patient_name": patient_name, "rank": rank, "highlights": highlights})
+    return {
+        "items": items,
+        "next_cursor": encode_offset(offset + limit) if has_more else None,
+        "limit": limit,
+    }
@@ -0,0 +1,101 @@
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import and_, func, literal_column, select, text
+from sqlalchemy.orm import Session
+
+from app.models.annotations import Annotation
+
+# Rows of the IoU matrix computed at once; bounds memory to OVERLAP_CHUNK * N floats
+OVERLAP_CHUNK = 1024
+
+
+# ---------- Vectorized geometry ----------
+def boxes_array(annotations: list[Annotation]) -> np.ndarray:
+    """(N, 4) float array of x_min, y_min, x_max, y_max."""
+    if not annotations:
+        return np.empty((0, 4), dtype=np.float64)
+    return np.array([(a.x_min, a.y_min, a.x_max, a.y_max) for a in annotations], dtype=np.float64)
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(N, M) intersection-over-union of every box in `a` against every box in `b`."""
+    x0 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y0 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x1 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y1 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+# ---------- Indexed region lookup ----------
+def region_clause(db: Session, image_ids: list[int], x0: int, y0: int, x1: int, y1: int):
+    """WHERE clause for annotations on `image_ids` whose box touches the region, via the spatial index."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        # Must match the ix_annotations_image_bbox expression for the GiST index to apply
+        box = func.box(func.point(Annotation.x_min, Annotation.y_min), func.point(Annotation.x_max, Annotation.y_max))
+        region = func.box(func.point(x0, y0), func.point(x1, y1))
+        return and_(Annotation.image_id.in_(image_ids), box.op("&&")(region))
+    if dialect == "sqlite":
+        rtree = (
+            select(literal_column("id"))
+            .select_from(text("annotations_rtree"))
+            .where(
+                text(
+                    "image_min <= :image_hi AND image_max >= :image_lo"
+                    " AND x_min <= :x1 AND x_max >= :x0 AND y_min <= :y1 AND y_max >= :y0"
+                ).bindparams(image_lo=min(image_ids), image_hi=max(image_ids), x0=x0, y0=y0, x1=x1, y1=y1)
+            )
+        )
+        return and_(Annotation.image_id.in_(image_ids), Annotation.id.in_(rtree))
+    return and_(
+        Annotation.image_id.in_(image_ids),
+        Annotation.x_min <= x1, Annotation.x_max >= x0,
+        Annotation.y_min <= y1, Annotation.y_max >= y0,
+    )
+
+
+def query_region(
+    db: Session, image_ids: list[int], x0: int, y0: int, x1: int, y1: int,
+    label: Optional[str] = None, min_iou: float = 0.0, limit: int = 1000,
+) -> list[tuple[Annotation, float]]:
+    """Annotations intersecting the region, each with its IoU against the region."""
+    if not image_ids:
+        return []
+    stmt = select(Annotation).where(region_clause(db, image_ids, x0, y0, x1, y1))
+    if label:
+        stmt = stmt.where(Annotation.label == label)
+    if min_iou <= 0:
+        stmt = stmt.limit(limit)  # otherwise the IoU cut below decides what's kept
+    annotations = db.scalars(stmt.order_by(Annotation.id)).all()
+
+    ious = iou_matrix(boxes_array(annotations), np.array([[x0, y0, x1, y1]], dtype=np.float64))[:, 0]
+    keep = np.flatnonzero(ious >= min_iou)[:limit]
+    return [(annotations[i], float(ious[i])) for i in keep]
+
+
+def overlapping_pairs(
+    annotations: list[Annotation], min_iou: float, same_label: bool = True
+) -> list[tuple[Annotation, Annotation, float]]:
+    """Pairs of distinct boxes with IoU >= min_iou, e.g. two annotators marking the same finding."""
+    boxes = boxes_array(annotations)
+    labels = np.array([a.label for a in annotations], dtype=object)
+    pairs = []
+    for start in range(0, len(annotations), OVERLAP_CHUNK):
+        chunk = slice(start, start + OVERLAP_CHUNK)
+        ious = iou_matrix(boxes[chunk], boxes)
+        mask = ious >= min_iou
+        # Upper triangle only: each pair once, never a box with itself
+        rows = np.arange(start, min(start + OVERLAP_CHUNK, len(annotations)))
+        mask &= np.arange(len(annotations))[None, :] > rows[:, None]
+        if same_label:
+            mask &= labels[chunk][:, None] == labels[None, :]
+        for i, j in zip(*np.nonzero(mask)):
+            pairs.append((annotations[start + i], annotations[j], float(ious[i, j])))
+    pairs.sort(key=lambda pair: -pair[2])
+    return pairs
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import event, func, insert, inspect, or_, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import STATS_REFRESH_INTERVAL, STATS_AI_REPORT_DAYS
+from app.database.session import SessionLocal
+from app.models.annotations import Annotation
+from app.models.images import Image
+from app.models.patients import Patient
+from app.models.reports import Report
+from app.models.stats import StatCounter
+from app.models.users import User
+
+logger = logging.getLogger(__name__)
+
+ENTITY_COUNTERS = {
+    User: "users",
+    Patient: "patients",
+    Report: "reports",
+    Image: "images",
+    Annotation: "annotations",
+}
+ROLE_PREFIX = "users:role:"
+AI_REPORTS_PREFIX = "ai_reports:"
+
+
+def role_key(role: Optional[str]) -> str:
+    return f"{ROLE_PREFIX}{role or 'none'}"
+
+
+def ai_reports_key(day: date) -> str:
+    return f"{AI_REPORTS_PREFIX}{day.isoformat()}"
+
+
+# ---------- Incremental updates ----------
+def apply_deltas(connection: Connection, deltas: dict[str, int]) -> None:
+    """Add each delta to its counter inside the caller's transaction."""
+    now = datetime.utcnow()
+    # Fixed order, so two transactions touching the same counters can't deadlock
+    for name in sorted(deltas):
+        delta = deltas[name]
+        if not delta:
+            continue
+        bump = update(StatCounter).where(StatCounter.name == name).values(value=StatCounter.value + delta, updated_at=now)
+        if connection.execute(bump).rowcount:
+            continue
+        try:
+            with connection.begin_nested():
+                connection.execute(insert(StatCounter).values(name=name, value=delta, updated_at=now))
+        except IntegrityError:
+            # Another transaction created the row first
+            connection.execute(bump)
+
+
+def increment(db: Session, name: str, delta: int = 1) -> None:
+    apply_deltas(db.connection(), {name: delta})
+
+
+@event.listens_for(Session, "after_flush")
+def _count_flushed(session: Session, flush_context) -> None:
+    # new/deleted still hold the pre-flush sets here, including delete cascades
+    deltas = Counter()
+    for obj, sign in [(o, 1) for o in session.new] + [(o, -1) for o in session.deleted]:
+        name = ENTITY_COUNTERS.get(type(obj))
+        if name:
+            deltas[name] += sign
+        if isinstance(obj, User):
+            deltas[role_key(obj.role)] += sign
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            history = inspect(obj).attrs.role.history
+            if history.has_changes():
+                for role in history.deleted:
+                    deltas[role_key(role)] -= 1
+                for role in history.added:
+                    deltas[role_key(role)] += 1
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+# ---------- Full recount ----------
+def _count_of(name: str):
+    """COUNT(*) statement behind an entity or role counter."""
+    for model, counter in ENTITY_COUNTERS.items():
+        if counter == name:
+            return select(func.count()).select_from(model)
+    role = name[len(ROLE_PREFIX):]
+    # role_key files a NULL role under "none"
+    matches_role = or_(User.role.is_(None), User.role == role) if role == "none" else User.role == role
+    return select(func.count()).select_from(User).where(matches_role)
+
+
+def _recount(db: Session, name: str, now: datetime) -> None:
+    # The count is a subquery of the UPDATE itself, so there is no window between reading the
+    # table and writing the counter for a concurrent increment to fall into
+    value = _count_of(name).scalar_subquery()
+    recount = update(StatCounter).where(StatCounter.name == name).values(value=value, updated_at=now)
+    if db.execute(recount).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(StatCounter).values(name=name, value=value, updated_at=now))
+    except IntegrityError:
+        # An increment created the row first
+        db.execute(recount)
+
+
+def refresh(db: Session) -> None:
+    """Recount every entity/role counter from the tables (one COUNT each). AI reports per day
+    are only ever counted as they are created, so they are left alone."""
+    names = set(ENTITY_COUNTERS.values())
+    names.update(role_key(role) for role in db.scalars(select(User.role).distinct()))
+    # Roles nobody holds any more recount to zero
+    names.update(db.scalars(select(StatCounter.name).where(StatCounter.name.like(f"{ROLE_PREFIX}%"))))
+
+    now = datetime.utcnow()
+    # Same fixed order as apply_deltas, so a refresh can't deadlock with an increment
+    for name in sorted(names):
+        _recount(db, name, now)
+    db.commit()
+
+
+def snapshot(db: Session, days: int = STATS_AI_REPORT_DAYS) -> dict:
+    """Every counter the dashboard shows, in one query against a table of a few dozen rows."""
+    # Days are bucketed by UTC created_at, so "today" is the UTC date too
+    since = ai_reports_key(datetime.utcnow().date() - timedelta(days=days - 1))
+    rows = db.execute(
+        select(StatCounter.name, StatCounter.value).where(
+            or_(~StatCounter.name.like(f"{AI_REPORTS_PREFIX}%"), StatCounter.name >= since)
+        )
+    ).all()
+    values = dict(rows)
+    return {
+        "totals": {name: values.get(name, 0) for name in ENTITY_COUNTERS.values()},
+        "users_by_role": {
+            name[len(ROLE_PREFIX):]: value for name, value in values.items() if name.startswith(ROLE_PREFIX)
+        },
+        "ai_reports_per_day": {
+            name[len(AI_REPORTS_PREFIX):]: value
+            for name, value in sorted(values.items())
+            if name.startswith(AI_REPORTS_PREFIX)
+        },
+    }
+
+
+class StatsRefresher:
+    """Background task recounting the counters every STATS_REFRESH_INTERVAL seconds."""
+
+    def __init__(self, interval: int = STATS_REFRESH_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def run_once() -> None:
+        db = SessionLocal()
+        try:
+            refresh(db)
+        finally:
+            db.close()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.run_once)
+            except Exception:
+                logger.exception("Stats refresh failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+stats_refresher = StatsRefresher()
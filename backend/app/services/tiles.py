@@ -0,0 +1,138 @@
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import uuid
+
+from PIL import Image as PILImage
+
+from app.core.config import TILE_SIZE, TILE_QUALITY, THUMBNAIL_SIZE
+from app.services.imaging import derived_dir, open_image, to_display
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+
+# One build at a time per image within this process; across processes the
+# directory rename below decides the winner.
+_build_locks: dict[str, threading.Lock] = {}
+_build_locks_guard = threading.Lock()
+
+
+def _lock_for(key: str) -> threading.Lock:
+    with _build_locks_guard:
+        return _build_locks.setdefault(key, threading.Lock())
+
+
+def _save_jpeg(img: PILImage.Image, path: str) -> None:
+    to_display(img).save(path, "JPEG", quality=TILE_QUALITY, optimize=True)
+
+
+# ---------- Thumbnails ----------
+def thumbnail_path(image) -> str:
+    return os.path.join(derived_dir(image), "thumb.jpg")
+
+
+def ensure_thumbnail(image) -> str:
+    path = thumbnail_path(image)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open_image(image) as img:
+        # Lets the JPEG decoder downscale while decoding instead of after
+        img.draft("RGB", (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        img = to_display(img)
+        img.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), PILImage.LANCZOS)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        _save_jpeg(img, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+# ---------- Deep-zoom pyramid ----------
+def _max_level(width: int, height: int) -> int:
+    return max(0, math.ceil(math.log2(max(width, height, 1))))
+
+
+def level_size(manifest: dict, level: int) -> tuple[int, int]:
+    scale = 2 ** (manifest["max_level"] - level)
+    return math.ceil(manifest["width"] / scale), math.ceil(manifest["height"] / scale)
+
+
+def tiles_dir(image) -> str:
+    return os.path.join(derived_dir(image), "tiles")
+
+
+def tile_path(image, level: int, x: int, y: int) -> str:
+    return os.path.join(tiles_dir(image), str(level), f"{x}_{y}.jpg")
+
+
+def load_manifest(image):
+    try:
+        with open(os.path.join(tiles_dir(image), MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_level(img: PILImage.Image, out_dir: str) -> None:
+    os.makedirs(out_dir, exist_ok=True)
+    width, height = img.size
+    for y in range(math.ceil(height / TILE_SIZE)):
+        for x in range(math.ceil(width / TILE_SIZE)):
+            box = (x * TILE_SIZE, y * TILE_SIZE, min((x + 1) * TILE_SIZE, width), min((y + 1) * TILE_SIZE, height))
+            _save_jpeg(img.crop(box), os.path.join(out_dir, f"{x}_{y}.jpg"))
+
+
+def build_pyramid(image) -> dict:
+    """Write every level's tiles once; level max_level is full resolution, level 0 is 1x1."""
+    with _lock_for(derived_dir(image)):
+        manifest = load_manifest(image)
+        if manifest:
+            return manifest
+
+        final_dir = tiles_dir(image)
+        work_dir = f"{final_dir}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open_image(image) as src:
+                img = to_display(src)
+                width, height = img.size
+                manifest = {
+                    "width": width,
+                    "height": height,
+                    "tile_size": TILE_SIZE,
+                    "max_level": _max_level(width, height),
+                    "format": "jpeg",
+                }
+                for level in range(manifest["max_level"], -1, -1):
+                    size = level_size(manifest, level)
+                    if img.size != size:
+                        # Halve from the previous level rather than the original: cheaper and sharper.
+                        img = img.resize(size, PILImage.LANCZOS)
+                    _write_level(img, os.path.join(work_dir, str(level)))
+
+            with open(os.path.join(work_dir, MANIFEST), "w") as f:
+                json.dump(manifest, f)
+            os.makedirs(os.path.dirname(final_dir), exist_ok=True)
+            os.rename(work_dir, final_dir)
+        except OSError:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            # Another worker finished the same pyramid first.
+            manifest = load_manifest(image)
+            if manifest:
+                return manifest
+            raise
+        return manifest
+
+
+def build_derivatives(image) -> None:
+    """Ingest hook: thumbnail first (it is what the viewer asks for first), then tiles."""
+    try:
+        ensure_thumbnail(image)
+        build_pyramid(image)
+    except Exception:
+        # Background task: nothing to report to; tile requests rebuild lazily and surface the error
+        logger.exception("Failed to build derivatives for image %s", image.id)
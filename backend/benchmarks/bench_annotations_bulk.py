@@ -0,0 +1,113 @@
+"""Annotation write throughput: one row per request (old path) vs the bulk insert path.
+
+The per-row path repeats what POST /annotations/ does for every box - ORM add, commit,
+refresh. The bulk path is the service behind POST /annotations/bulk: one validation
+query, one batched INSERT ... RETURNING and one commit per study:
+
+    cd backend
+    python benchmarks/bench_annotations_bulk.py --studies 20 --boxes 500
+
+Pass --database-url postgresql://... to include real network round trips; SQLite
+understates the gap since each "round trip" is a function call.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--studies", type=int, default=10, help="images annotated per run")
+    parser.add_argument("--boxes", type=int, default=300, help="annotations per image")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--database-url", default=None, help="default: a throwaway SQLite file")
+    return parser.parse_args()
+
+
+def setup_environment(args, workdir: str) -> None:
+    # Must happen before any app module reads its config
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed_images(args) -> list[int]:
+    from datetime import date
+    from app.database.session import Base, engine, SessionLocal
+    from app.database import init_db  # noqa: F401  registers every model on Base
+    from app.models.patients import Patient
+    from app.models.images import Image
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        patient = Patient(full_name="Bench Patient", date_of_birth=date(1980, 1, 1), gender="F",
+                          contact_number="000", address="n/a")
+        db.add(patient)
+        db.flush()
+        images = [Image(patient_id=patient.id, filename=f"study-{i}.png") for i in range(args.studies * 2)]
+        db.add_all(images)
+        db.commit()
+        return [image.id for image in images]
+    finally:
+        db.close()
+
+
+def make_boxes(rng: random.Random, image_id: int, count: int) -> list[dict]:
+    return [
+        {
+            "image_id": image_id,
+            "label": rng.choice(["nodule", "opacity", "fracture", "effusion"]),
+            "bounding_box": {"x": rng.randrange(2048), "y": rng.randrange(2048),
+                             "width": rng.randrange(8, 256), "height": rng.randrange(8, 256)},
+        }
+        for _ in range(count)
+    ]
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix="bench-annotations-")
+    setup_environment(args, workdir)
+    image_ids = seed_images(args)
+
+    from app.database.session import SessionLocal
+    from app.models.annotations import Annotation
+    from app.services import annotations as annotation_service
+
+    per_row_images, bulk_images = image_ids[:args.studies], image_ids[args.studies:]
+    total = args.studies * args.boxes
+
+    db = SessionLocal()
+    t0 = time.perf_counter()
+    for image_id in per_row_images:
+        for box in make_boxes(rng, image_id, args.boxes):
+            annotation = Annotation(**box)
+            db.add(annotation)
+            db.commit()
+            db.refresh(annotation)
+    per_row = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for image_id in bulk_images:
+        annotation_service.bulk_create(db, make_boxes(rng, image_id, args.boxes))
+    bulk = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for image_id in bulk_images:
+        annotation_service.replace_for_image(db, image_id, make_boxes(rng, image_id, args.boxes))
+    replace = time.perf_counter() - t0
+    db.close()
+
+    print(f"studies={args.studies} boxes/study={args.boxes} db={os.environ['DATABASE_URL'].split(':')[0]}")
+    print(f"per-row   {total / per_row:10.0f} annotations/s  ({per_row:.2f}s)")
+    print(f"bulk      {total / bulk:10.0f} annotations/s  ({bulk:.2f}s)  x{per_row / bulk:.1f}")
+    print(f"replace   {total / replace:10.0f} annotations/s  ({replace:.2f}s)  delete + insert per study")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Password verification throughput (logins/s) as the hashing pool grows, versus inline.
+
+Verifies one bcrypt hash repeatedly: first inline on the calling thread (what /auth/login
+used to do), then through PasswordHashPool at 1, 2, 4, ... workers up to the core count.
+A final burst run shows how many calls the pending-call limit sheds:
+
+    cd backend
+    python benchmarks/bench_login_throughput.py --logins 200 --burst 500 --max-pending 64
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200, help="verifications per configuration")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--burst", type=int, default=500, help="simultaneous logins in the shedding run")
+    parser.add_argument("--max-pending", type=int, default=64)
+    return parser.parse_args()
+
+
+def worker_counts(max_workers: int) -> list[int]:
+    counts, n = [], 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    return counts + [max_workers]
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from fastapi import HTTPException
+    from app.core.hashing import PasswordHashPool
+    from app.core.security import get_password_hash, verify_password
+
+    hashed = get_password_hash("correct horse battery staple")
+    print(f"cores={os.cpu_count()} logins per run={args.logins}")
+
+    t0 = time.perf_counter()
+    for _ in range(args.logins):
+        verify_password("correct horse battery staple", hashed)
+    elapsed = time.perf_counter() - t0
+    print(f"inline           {args.logins / elapsed:8.1f} logins/s")
+
+    for workers in worker_counts(args.max_workers):
+        pool = PasswordHashPool(workers=workers, max_pending=args.logins)
+        pool.verify("warmup", hashed)  # start the worker processes outside the timed region
+        t0 = time.perf_counter()
+        futures = [pool.submit(verify_password, "correct horse battery staple", hashed) for _ in range(args.logins)]
+        assert all(f.result() for f in futures)
+        elapsed = time.perf_counter() - t0
+        pool.shutdown()
+        print(f"pool workers={workers:<3} {args.logins / elapsed:8.1f} logins/s")
+
+    # Burst: many request threads arrive at once; the pool admits max_pending and sheds the rest
+    pool = PasswordHashPool(workers=args.max_workers, max_pending=args.max_pending)
+    pool.verify("warmup", hashed)
+
+    def attempt(_):
+        try:
+            return pool.verify("correct horse battery staple", hashed)
+        except HTTPException:
+            return None
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(args.burst, 256)) as threads:
+        results = list(threads.map(attempt, range(args.burst)))
+    elapsed = time.perf_counter() - t0
+    pool.shutdown()
+    served = sum(r is not None for r in results)
+    print(f"burst={args.burst} max_pending={args.max_pending}: served={served} "
+          f"shed(503)={args.burst - served} in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Bytes sent to the vision model per report: raw file (old path) vs the prepared model input.
+
+Writes synthetic radiograph-like images in the formats technicians upload (16-bit PNG,
+8-bit PNG, large JPEG) and compares, per image, the raw payload against the downscaled
+re-encode - cold (first generation builds it) and warm (served from the derived cache):
+
+    cd backend
+    python benchmarks/bench_model_payload.py --size 4096 --repeat 20
+
+Upload time is estimated from --uplink-mbps; the model's own latency also grows with
+input resolution, which this does not measure.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=4096, help="edge of the synthetic source images")
+    parser.add_argument("--repeat", type=int, default=10, help="warm payload loads per image")
+    parser.add_argument("--uplink-mbps", type=float, default=50.0)
+    return parser.parse_args()
+
+
+def setup_environment(workdir: str) -> None:
+    # Must happen before any app module reads its config
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def synthetic_sources(size: int, workdir: str) -> dict[str, str]:
+    import numpy as np
+    from PIL import Image as PILImage
+
+    # Smooth anatomy-like gradients plus sensor noise: compresses like a real film, not like noise
+    rng = np.random.default_rng(7)
+    y, x = np.mgrid[0:size, 0:size] / size
+    body = np.exp(-((x - 0.5) ** 2 / 0.08 + (y - 0.5) ** 2 / 0.15))
+    ribs = 0.15 * (np.sin(y * 60) > 0.7) * body
+    film = np.clip(body * 0.7 + ribs + rng.normal(0, 0.02, (size, size)), 0, 1)
+
+    paths = {
+        "png16": os.path.join(workdir, "film16.png"),
+        "png8": os.path.join(workdir, "film8.png"),
+        "jpeg": os.path.join(workdir, "film.jpg"),
+    }
+    PILImage.fromarray((film * 65535).astype(np.uint16)).save(paths["png16"])
+    PILImage.fromarray((film * 255).astype(np.uint8)).save(paths["png8"])
+    PILImage.fromarray((film * 255).astype(np.uint8)).save(paths["jpeg"], quality=95)
+    return paths
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="bench-payload-")
+    setup_environment(workdir)
+    sources = synthetic_sources(args.size, workdir)
+
+    from app.core.config import AI_INPUT_MAX_EDGE, AI_INPUT_FORMAT
+    from app.services import imaging
+
+    print(f"source={args.size}px max_edge={AI_INPUT_MAX_EDGE} format={AI_INPUT_FORMAT} uplink={args.uplink_mbps}Mbit/s")
+    for i, (name, path) in enumerate(sources.items()):
+        # Stand-in for an Image row: just what the payload path reads
+        image = SimpleNamespace(id=i, sha256=None, file_path=path, mime_type=imaging.sniff_mime(path))
+        raw = os.path.getsize(path)
+
+        t0 = time.perf_counter()
+        payload, mime_type = imaging.model_payload(image)
+        cold = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            imaging.model_payload(image)
+        warm = (time.perf_counter() - t0) / args.repeat
+
+        upload = lambda n: n * 8 / (args.uplink_mbps * 1e6)  # noqa: E731
+        print(f"{name:<6} raw {raw / 1e6:7.2f} MB ({upload(raw):5.2f}s up)  ->  {mime_type:<10} "
+              f"{len(payload) / 1e6:6.2f} MB ({upload(len(payload)):5.2f}s up)  x{raw / len(payload):5.1f} smaller  "
+              f"prepare cold {cold * 1000:7.1f}ms warm {warm * 1000:6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Patient onboarding throughput: one create per row (old path) vs the streaming bulk import.
+
+The per-row path repeats what POST /patients/ does - ORM add, commit, refresh - for a
+sample of the rows and extrapolates; the import path feeds the whole generated file
+through the service behind POST /patients/import:
+
+    cd backend
+    python benchmarks/bench_patient_import.py --rows 1000000 --per-row-sample 2000
+
+Pass --database-url postgresql://... for numbers that include real commits and round trips.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--per-row-sample", type=int, default=2000, help="rows created one at a time")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--bad-every", type=int, default=1000, help="make every Nth row invalid (0 = none)")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--database-url", default=None, help="default: a throwaway SQLite file")
+    return parser.parse_args()
+
+
+def setup_environment(args, workdir: str) -> None:
+    # Must happen before any app module reads its config
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def write_file(args, path: str) -> None:
+    import json
+
+    rng = random.Random(args.seed)
+    with open(path, "w", newline="") as f:
+        if args.format == "csv":
+            f.write("full_name,date_of_birth,gender,contact_number,address\n")
+        for i in range(args.rows):
+            dob = (date(1930, 1, 1) + timedelta(days=rng.randrange(30000))).isoformat()
+            if args.bad_every and i % args.bad_every == args.bad_every - 1:
+                dob = "not-a-date"
+            row = [f"Patient {i}", dob, rng.choice("FMU"), f"555-{i:07d}", f"{i} Bench Street"]
+            if args.format == "csv":
+                f.write(",".join(row) + "\n")
+            else:
+                keys = ["full_name", "date_of_birth", "gender", "contact_number", "address"]
+                f.write(json.dumps(dict(zip(keys, row))) + "\n")
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="bench-import-")
+    setup_environment(args, workdir)
+    path = os.path.join(workdir, f"patients.{args.format}")
+    write_file(args, path)
+
+    from app.database.session import Base, engine, SessionLocal
+    from app.database import init_db  # noqa: F401  registers every model on Base
+    from app.models.patients import Patient
+    from app.services import patient_io
+
+    Base.metadata.create_all(engine)
+    rng = random.Random(args.seed)
+
+    db = SessionLocal()
+    t0 = time.perf_counter()
+    for i in range(args.per_row_sample):
+        patient = Patient(full_name=f"Single {i}", date_of_birth=date(1930, 1, 1) + timedelta(days=rng.randrange(30000)),
+                          gender="U", contact_number="", address="")
+        db.add(patient)
+        db.commit()
+        db.refresh(patient)
+    per_row = (time.perf_counter() - t0) / args.per_row_sample
+
+    t0 = time.perf_counter()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        result = patient_io.import_patients(db, f, args.format)
+    bulk = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    exported = sum(len(chunk) for chunk in patient_io.export_patients(args.format))
+    export = time.perf_counter() - t0
+    db.close()
+
+    print(f"rows={args.rows} format={args.format} db={os.environ['DATABASE_URL'].split(':')[0]}")
+    print(f"per-row   {1 / per_row:10.0f} rows/s  (~{per_row * args.rows / 60:.1f} min for all rows)")
+    print(f"import    {args.rows / bulk:10.0f} rows/s  ({bulk:.1f}s)  x{per_row * args.rows / bulk:.0f}  "
+          f"imported={result['imported']} failed={result['failed']}")
+    print(f"export    {args.rows / export:10.0f} rows/s  ({export:.1f}s, {exported / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Latency of fuzzy patient lookup against a synthetic patient table.
+
+Seeds N patients with generated names, then times /patients/search-style queries with
+a typo injected into each name, reporting p50/p95 and how often the intended patient
+ranked first:
+
+    cd backend
+    python benchmarks/bench_patient_search.py --patients 1000000 --queries 500
+
+Runs on SQLite (in-process trigram index) by default; pass --database-url to time a
+Postgres database with pg_trgm instead.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+FIRST = ["james", "mary", "robert", "patricia", "john", "jennifer", "michael", "linda", "david", "elizabeth",
+         "william", "barbara", "richard", "susan", "joseph", "jessica", "thomas", "sarah", "arjun", "priya",
+         "wei", "fatima", "olga", "kenji", "amara", "diego", "ingrid", "kofi", "leila", "mateo"]
+LAST = ["smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis", "rodriguez", "martinez",
+        "hernandez", "lopez", "gonzalez", "wilson", "anderson", "thomas", "taylor", "moore", "jackson", "martin",
+        "sharma", "chen", "okafor", "nakamura", "kowalski", "haddad", "novak", "lindqvist", "mensah", "rossi"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--database-url", default=None, help="default: a throwaway SQLite file")
+    return parser.parse_args()
+
+
+def setup_environment(args, workdir: str) -> None:
+    # Must happen before any app module reads its config
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_name(rng: random.Random) -> str:
+    # A middle-name-ish suffix keeps most full names unique
+    return f"{rng.choice(FIRST)} {rng.choice(LAST)} {''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(6))}"
+
+
+def typo(rng: random.Random, name: str) -> str:
+    i = rng.randrange(len(name))
+    kind = rng.choice(["drop", "swap", "replace"])
+    if kind == "drop":
+        return name[:i] + name[i + 1:]
+    if kind == "swap" and i < len(name) - 1:
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    return name[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + name[i + 1:]
+
+
+def seed_patients(args, rng: random.Random) -> list[tuple[int, str]]:
+    from datetime import date, timedelta
+    from sqlalchemy import insert
+    from app.database.session import Base, engine, SessionLocal
+    from app.database import init_db  # noqa: F401  registers every model on Base
+    from app.models.patients import Patient
+
+    Base.metadata.create_all(engine)
+    rows, batch = [], []
+    db = SessionLocal()
+    try:
+        for i in range(args.patients):
+            name = make_name(rng)
+            dob = date(1930, 1, 1) + timedelta(days=rng.randrange(90 * 365))
+            batch.append({"full_name": name, "date_of_birth": dob, "gender": "U", "contact_number": "", "address": ""})
+            if len(batch) == 10000 or i == args.patients - 1:
+                db.execute(insert(Patient), batch)
+                batch = []
+        db.commit()
+        rows = db.query(Patient.id, Patient.full_name).all()
+    finally:
+        db.close()
+    return rows
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix="bench-patient-search-")
+    setup_environment(args, workdir)
+
+    t0 = time.perf_counter()
+    patients = seed_patients(args, rng)
+    print(f"seeded {len(patients)} patients in {time.perf_counter() - t0:.1f}s")
+
+    from app.database.session import SessionLocal
+    from app.services import patient_search
+
+    db = SessionLocal()
+    t0 = time.perf_counter()
+    patient_search.search_patients(db, "warmup", None, 1)  # builds the fallback index on SQLite
+    print(f"first query (index build) {time.perf_counter() - t0:.2f}s")
+
+    samples, top1 = [], 0
+    for patient_id, name in rng.sample(patients, min(args.queries, len(patients))):
+        query = typo(rng, name)
+        t0 = time.perf_counter()
+        hits = patient_search.search_patients(db, query, None, args.limit)
+        samples.append(time.perf_counter() - t0)
+        top1 += bool(hits) and hits[0][0].id == patient_id
+    db.close()
+
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"queries={len(samples)} p50={statistics.median(samples) * 1000:.2f}ms "
+          f"p95={p95 * 1000:.2f}ms mean={statistics.mean(samples) * 1000:.2f}ms")
+    print(f"intended patient ranked first: {top1 / len(samples):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Per-stage cost of the generate-report pipeline, run offline against the stub provider.
+
+Times file read, prompt assembly, the provider call and the DB write separately, so the
+pipeline's own overhead (everything except the model) can be tracked over time:
+
+    cd backend
+    python benchmarks/bench_report_pipeline.py --runs 500 --image-kb 512 --latency 0
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--image-kb", type=int, default=512, help="size of the synthetic image file")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub provider mean latency, seconds")
+    parser.add_argument("--output-chars", type=int, default=1200)
+    return parser.parse_args()
+
+
+def setup_environment(args, workdir: str) -> None:
+    # Must happen before any app module reads its config
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    os.environ["AI_PROVIDER"] = "stub"
+    os.environ["AI_STUB_LATENCY"] = str(args.latency)
+    os.environ["AI_STUB_OUTPUT_CHARS"] = str(args.output_chars)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed_image(args, workdir: str) -> int:
+    from datetime import date
+    from app.database.session import Base, engine, SessionLocal
+    from app.database import init_db  # noqa: F401  registers every model on Base
+    from app.models.patients import Patient
+    from app.models.images import Image
+
+    Base.metadata.create_all(engine)
+
+    image_path = os.path.join(workdir, "sample.jpg")
+    with open(image_path, "wb") as f:
+        f.write(os.urandom(args.image_kb * 1024))
+
+    db = SessionLocal()
+    try:
+        patient = Patient(full_name="Bench Patient", date_of_birth=date(1980, 1, 1), gender="F",
+                          contact_number="000", address="n/a")
+        db.add(patient)
+        db.flush()
+        image = Image(patient_id=patient.id, filename="sample.jpg", file_path=image_path, mime_type="image/jpeg")
+        db.add(image)
+        db.commit()
+        return image.id
+    finally:
+        db.close()
+
+
+def summarize(name: str, samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (f"{name:<14} mean={statistics.mean(samples) * 1000:8.3f}ms "
+            f"p50={statistics.median(samples) * 1000:8.3f}ms p95={p95 * 1000:8.3f}ms")
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="bench-report-pipeline-")
+    setup_environment(args, workdir)
+    image_id = seed_image(args, workdir)
+
+    from app.database.session import SessionLocal
+    from app.models.images import Image
+    from app.services import report_generation
+    from app.services.ai_providers import get_provider
+
+    provider = get_provider()
+    stages = {"file_read": [], "prompt": [], "provider": [], "db_write": [], "total": []}
+    db = SessionLocal()
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        image = db.query(Image).filter(Image.id == image_id).first()
+        image_content, mime_type = report_generation.load_payload(image)
+        t1 = time.perf_counter()
+        prompt = report_generation.build_prompt(image)
+        t2 = time.perf_counter()
+        findings = provider.generate(prompt, image_content, mime_type)
+        t3 = time.perf_counter()
+        report_generation.create_report(db, image, findings)
+        t4 = time.perf_counter()
+
+        stages["file_read"].append(t1 - t0)
+        stages["prompt"].append(t2 - t1)
+        stages["provider"].append(t3 - t2)
+        stages["db_write"].append(t4 - t3)
+        stages["total"].append(t4 - t0)
+    db.close()
+
+    print(f"runs={args.runs} image={args.image_kb}KB stub_latency={args.latency}s provider={provider.name}")
+    for name, samples in stages.items():
+        print(summarize(name, samples))
+    overhead = [total - model for total, model in zip(stages["total"], stages["provider"])]
+    print(summarize("overhead", overhead))
+
+
+if __name__ == "__main__":
+    main()
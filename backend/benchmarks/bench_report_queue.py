@@ -0,0 +1,105 @@
+"""Throughput of the AI report job queue against the offline stub model.
+
+Runs entirely locally (SQLite + stub model), so no Gemini key or Postgres is needed:
+
+    cd backend
+    python benchmarks/bench_report_queue.py --jobs 200 --workers 8 --latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub model latency in seconds")
+    return parser.parse_args()
+
+
+def setup_environment(args, workdir: str) -> None:
+    # Must happen before any app module reads its config
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    os.environ["AI_PROVIDER"] = "stub"
+    os.environ["AI_STUB_LATENCY"] = str(args.latency)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed_image(workdir: str) -> int:
+    from datetime import date
+    from app.database.session import Base, engine, SessionLocal
+    from app.database import init_db  # noqa: F401  registers every model on Base
+    from app.models.patients import Patient
+    from app.models.images import Image
+
+    Base.metadata.create_all(engine)
+
+    image_path = os.path.join(workdir, "sample.jpg")
+    with open(image_path, "wb") as f:
+        f.write(os.urandom(64 * 1024))
+
+    db = SessionLocal()
+    try:
+        patient = Patient(full_name="Bench Patient", date_of_birth=date(1980, 1, 1), gender="F",
+                          contact_number="000", address="n/a")
+        db.add(patient)
+        db.flush()
+        image = Image(patient_id=patient.id, filename="sample.jpg", file_path=image_path, mime_type="image/jpeg")
+        db.add(image)
+        db.commit()
+        return image.id
+    finally:
+        db.close()
+
+
+async def run(args, image_id: int) -> None:
+    from app.database.session import SessionLocal
+    from app.models.report_jobs import ReportJob
+    from app.services.report_queue import ReportJobQueue
+
+    queue = ReportJobQueue(workers=args.workers, max_size=args.jobs)
+    await queue.start()
+
+    db = SessionLocal()
+    jobs = [ReportJob(image_id=image_id, status="queued") for _ in range(args.jobs)]
+    db.add_all(jobs)
+    db.commit()
+    job_ids = [job.id for job in jobs]
+
+    start = time.perf_counter()
+    for job_id in job_ids:
+        queue.submit(job_id)
+
+    while True:
+        await asyncio.sleep(0.05)
+        finished = db.query(ReportJob).filter(ReportJob.status.in_(["done", "failed"])).count()
+        db.rollback()  # end the read transaction so the next poll sees new commits
+        if finished >= args.jobs:
+            break
+    elapsed = time.perf_counter() - start
+
+    failed = db.query(ReportJob).filter(ReportJob.status == "failed").count()
+    db.close()
+    await queue.stop()
+
+    ideal = args.workers / args.latency if args.latency else float("inf")
+    print(f"jobs={args.jobs} workers={args.workers} stub_latency={args.latency}s")
+    print(f"elapsed={elapsed:.2f}s throughput={args.jobs / elapsed:.1f} jobs/s "
+          f"(ideal {ideal:.1f} jobs/s) failed={failed}")
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="bench-report-queue-")
+    setup_environment(args, workdir)
+    image_id = seed_image(workdir)
+    asyncio.run(run(args, image_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Requests/s and tail latency of the sync (threadpool) vs async DB stacks under concurrency.
+
+Serves the same two endpoints from one uvicorn process - a patient page read through
+`get_db` in a sync handler, and through `get_async_db` in an async one - and drives each
+with N concurrent clients:
+
+    cd backend
+    python benchmarks/bench_sync_vs_async.py --concurrency 16 64 256 --requests 5000
+
+SQLite (the default) serialises on one file, so it mostly shows dispatch overhead; pass
+--database-url postgresql://... for numbers that reflect the production stack. Optional
+--db-latency-ms adds a server-side sleep to every query (Postgres only) to model a
+remote database, which is where threadpool-bound concurrency shows up.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+PORT = 8765
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--requests", type=int, default=3000, help="requests per stack per concurrency level")
+    parser.add_argument("--patients", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    parser.add_argument("--database-url", default=None, help="default: a throwaway SQLite file")
+    return parser.parse_args()
+
+
+def setup_environment(args, workdir: str) -> None:
+    # Must happen before any app module reads its config
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    os.environ["BENCH_DB_LATENCY_MS"] = str(args.db_latency_ms)
+    os.environ["BENCH_PAGE_SIZE"] = str(args.page_size)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(args) -> None:
+    from datetime import date, timedelta
+    from sqlalchemy import delete, insert
+    from app.database.session import Base, engine, SessionLocal
+    from app.database import init_db  # noqa: F401  registers every model on Base
+    from app.models.patients import Patient
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        db.execute(delete(Patient))
+        db.execute(insert(Patient), [
+            {"full_name": f"Patient {i}", "date_of_birth": date(1950, 1, 1) + timedelta(days=i % 20000),
+             "gender": "U", "contact_number": "", "address": ""}
+            for i in range(args.patients)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def build_app():
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import select, text
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+    from app.database.session import get_async_db, get_db
+    from app.models.patients import Patient
+
+    latency = float(os.environ["BENCH_DB_LATENCY_MS"]) / 1000
+    page = select(Patient).order_by(Patient.id).limit(int(os.environ["BENCH_PAGE_SIZE"]))
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_page(db: Session = Depends(get_db)):
+        if latency:
+            db.execute(text("SELECT pg_sleep(:s)"), {"s": latency})
+        return [p.id for p in db.scalars(page)]
+
+    @app.get("/async")
+    async def async_page(db: AsyncSession = Depends(get_async_db)):
+        if latency:
+            await db.execute(text("SELECT pg_sleep(:s)"), {"s": latency})
+        return [p.id for p in await db.scalars(page)]
+
+    return app
+
+
+def serve() -> None:
+    import uvicorn
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # for spawn-start platforms
+    uvicorn.run(build_app(), host="127.0.0.1", port=PORT, log_level="warning")
+
+
+async def drive(path: str, concurrency: int, total: int) -> tuple[float, list[float], int]:
+    import httpx
+
+    latencies, errors = [], 0
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=60) as client:
+        async def client_loop():
+            nonlocal errors
+            for _ in remaining:
+                t0 = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - t0)
+                except httpx.HTTPError:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        return time.perf_counter() - start, latencies, errors
+
+
+async def wait_for_server() -> None:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}") as client:
+        for _ in range(100):
+            try:
+                await client.get("/sync")
+                await client.get("/async")
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError("benchmark server did not start")
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="bench-sync-async-")
+    setup_environment(args, workdir)
+    seed(args)
+
+    server = multiprocessing.Process(target=serve, daemon=True)
+    server.start()
+    try:
+        asyncio.run(wait_for_server())
+        print(f"patients={args.patients} requests={args.requests} db_latency={args.db_latency_ms}ms "
+              f"db={os.environ['DATABASE_URL'].split(':')[0]}")
+        for concurrency in args.concurrency:
+            for stack in ("sync", "async"):
+                elapsed, latencies, errors = asyncio.run(drive(f"/{stack}", concurrency, args.requests))
+                ordered = sorted(latencies) or [0.0]
+                p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+                print(f"c={concurrency:<4} {stack:<5} {len(latencies) / elapsed:8.1f} req/s "
+                      f"p50={statistics.median(ordered) * 1000:7.2f}ms p99={p99 * 1000:7.2f}ms errors={errors}")
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
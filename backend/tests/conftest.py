@@ -0,0 +1,94 @@
+import asyncio
+import io
+import os
+import tempfile
+
+# Settings are read from the environment at import time, so they go in before any app module
+_TMP = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_TMP, 'test.db')}")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_TMP, "uploads"))
+os.environ.setdefault("AI_PROVIDER", "stub")
+os.environ.setdefault("AI_STUB_LATENCY", "0")
+os.environ.setdefault("BUILD_TILES_AT_INGEST", "false")
+os.environ.setdefault("STATS_REFRESH_INTERVAL", "0")
+os.environ.setdefault("UPLOAD_SWEEP_INTERVAL", "0")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from PIL import Image as PILImage  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.app import app  # noqa: E402
+from app.database.session import Base, SessionLocal, engine, get_async_engine  # noqa: E402
+from app.services.duplicates import phash_index  # noqa: E402
+from app.services.patient_search import trigram_index  # noqa: E402
+
+
+def _enforce_foreign_keys(dbapi_connection, connection_record):
+    # Off by default in SQLite; Postgres always enforces them, so the tests should too
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+event.listen(engine, "connect", _enforce_foreign_keys)
+event.listen(get_async_engine().sync_engine, "connect", _enforce_foreign_keys)
+
+
+@pytest.fixture
+def client():
+    Base.metadata.create_all(engine)
+    # In-process indexes outlive the tables; start each test from empty ones
+    trigram_index.__init__()
+    phash_index.__init__()
+    with TestClient(app) as client:
+        yield client
+    # Each TestClient runs its own event loop; don't hand its pooled connections to the next
+    asyncio.run(get_async_engine().dispose())
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def patient(client):
+    response = client.post("/patients/", json={
+        "full_name": "Jane Doe",
+        "date_of_birth": "1980-04-12",
+        "gender": "female",
+        "contact_number": "555-0100",
+        "address": "1 Main St",
+    })
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture
+def make_png():
+    def make(angle: int = 0, size: tuple[int, int] = (128, 128)) -> bytes:
+        """A smooth gradient; different angles hash apart, resizes of one angle stay duplicates."""
+        image = PILImage.linear_gradient("L").rotate(angle).resize(size)
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+    return make
+
+
+@pytest.fixture
+def upload_image(client, patient):
+    def upload(content: bytes, filename: str = "scan.png") -> dict:
+        response = client.post(
+            "/images/",
+            data={"patient_id": patient["id"]},
+            files={"file": (filename, content, "image/png")},
+        )
+        assert response.status_code == 200, response.text
+        return response.json()
+    return upload
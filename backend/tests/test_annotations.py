@@ -0,0 +1,47 @@
+import pytest
+
+from app.models.annotations import Annotation
+
+BOX = {"x": 10, "y": 20, "width": 100, "height": 80}
+
+
+@pytest.fixture
+def image(upload_image, make_png):
+    return upload_image(make_png())
+
+
+def test_create_and_read(client, image):
+    response = client.post("/annotations/", json={"image_id": image["id"], "label": "nodule", "bounding_box": BOX})
+    assert response.status_code == 200
+    created = response.json()
+    assert created["bounding_box"] == BOX
+
+    page = client.get(f"/annotations/image/{image['id']}").json()
+    assert [a["id"] for a in page["items"]] == [created["id"]]
+
+
+@pytest.mark.parametrize("box", [
+    {**BOX, "x": -1},
+    {**BOX, "y": -5},
+    {**BOX, "width": 0},
+    {**BOX, "height": -80},
+])
+def test_invalid_boxes_are_rejected(client, image, box):
+    single = {"image_id": image["id"], "label": "nodule", "bounding_box": box}
+    assert client.post("/annotations/", json=single).status_code == 422
+    assert client.post("/annotations/bulk", json={"annotations": [single]}).status_code == 422
+    replace = {"annotations": [{"label": "nodule", "bounding_box": box}]}
+    assert client.put(f"/annotations/image/{image['id']}", json=replace).status_code == 422
+
+
+def test_legacy_boxes_still_read_back(client, db, image):
+    # Stored before boxes were validated: the migration left these without typed columns
+    legacy = [{"x": -4, "y": 12, "width": 30, "height": 30}, {"x": 5, "y": 5, "width": 0, "height": 0}]
+    db.execute(Annotation.__table__.insert(), [
+        {"image_id": image["id"], "label": "legacy", "bounding_box": box} for box in legacy
+    ])
+    db.commit()
+
+    response = client.get(f"/annotations/image/{image['id']}")
+    assert response.status_code == 200
+    assert [a["bounding_box"] for a in response.json()["items"]] == legacy
@@ -0,0 +1,48 @@
+import os
+
+from app.core.storage import blob_store
+from app.models.blobs import Blob
+
+
+def _ref_count(db, digest: str):
+    db.expire_all()
+    blob = db.get(Blob, digest)
+    return blob.ref_count if blob else None
+
+
+def test_identical_uploads_share_one_blob(client, db, upload_image, make_png):
+    content = make_png(angle=15)
+    first = upload_image(content)
+    second = upload_image(content, filename="again.png")
+
+    assert first["sha256"] == second["sha256"]
+    assert first["id"] != second["id"]
+    assert _ref_count(db, first["sha256"]) == 2
+    with open(blob_store.path(first["sha256"]), "rb") as f:
+        assert f.read() == content
+    assert client.get(f"/uploads/{first['sha256']}").content == content
+
+
+def test_blob_goes_with_its_last_reference(client, db, upload_image, make_png):
+    content = make_png(angle=30)
+    first = upload_image(content)
+    second = upload_image(content, filename="again.png")
+    digest = first["sha256"]
+
+    assert client.delete(f"/images/{first['id']}").status_code == 200
+    assert _ref_count(db, digest) == 1
+    assert os.path.exists(blob_store.path(digest))
+
+    assert client.delete(f"/images/{second['id']}").status_code == 200
+    assert _ref_count(db, digest) is None
+    assert not os.path.exists(blob_store.path(digest))
+    assert not os.listdir(blob_store.trash)
+
+
+def test_derived_files_go_with_the_blob(client, db, upload_image, make_png):
+    image = upload_image(make_png(angle=45))
+    assert client.get(f"/images/{image['id']}/thumbnail").status_code == 200
+    assert os.path.exists(blob_store.derived_path(image["sha256"]))
+
+    assert client.delete(f"/images/{image['id']}").status_code == 200
+    assert not os.path.exists(blob_store.derived_path(image["sha256"]))
@@ -0,0 +1,39 @@
+def test_resized_copy_is_linked_to_the_original(client, upload_image, make_png):
+    original = upload_image(make_png(size=(128, 128)))
+    copy = upload_image(make_png(size=(96, 96)), filename="copy.png")
+    other = upload_image(make_png(angle=90), filename="other.png")
+
+    assert original["sha256"] != copy["sha256"]
+    assert original["duplicate_of_id"] is None
+    assert copy["duplicate_of_id"] == original["id"]
+    assert other["duplicate_of_id"] is None
+
+
+def test_duplicates_endpoint_lists_pairs(client, patient, upload_image, make_png):
+    original = upload_image(make_png(size=(128, 128)))
+    copy = upload_image(make_png(size=(96, 96)), filename="copy.png")
+    upload_image(make_png(angle=90), filename="other.png")
+
+    response = client.get(f"/images/patient/{patient['id']}/duplicates")
+    assert response.status_code == 200
+    pairs = response.json()
+    assert len(pairs) == 1
+    assert {pairs[0]["image"]["id"], pairs[0]["duplicate"]["id"]} == {original["id"], copy["id"]}
+    assert pairs[0]["distance"] <= 6
+
+
+def test_duplicates_endpoint_without_duplicates(client, patient, upload_image, make_png):
+    upload_image(make_png())
+    response = client.get(f"/images/patient/{patient['id']}/duplicates")
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_deleting_the_original_unlinks_the_copy(client, patient, upload_image, make_png):
+    original = upload_image(make_png(size=(128, 128)))
+    copy = upload_image(make_png(size=(96, 96)), filename="copy.png")
+
+    assert client.delete(f"/images/{original['id']}").status_code == 200
+
+    images = client.get(f"/images/patient/{patient['id']}").json()["items"]
+    assert [(i["id"], i["duplicate_of_id"]) for i in images] == [(copy["id"], None)]
@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, select
+from sqlalchemy.orm import Session, declarative_base
+
+from app.core.pagination import Keyset
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=True)
+
+
+SORTABLE = {"id": Item.id, "name": Item.name}
+NAMES = ["b", None, "a", "c", None, "b", None, "a"]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(Item(id=i, name=name) for i, name in enumerate(NAMES, start=1))
+        session.commit()
+        yield session
+
+
+def _walk(db, sort, limit):
+    """Every page of the sort, following next_cursor; returns the ids in order."""
+    ids, cursor = [], None
+    while True:
+        keyset = Keyset(SORTABLE, Item.id, sort, cursor, limit)
+        page = keyset.page(db.scalars(keyset.apply(select(Item))).all())
+        ids.extend(item.id for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 50])
+def test_nulls_come_last_ascending(db, limit):
+    assert _walk(db, "name", limit) == [3, 8, 1, 6, 4, 2, 5, 7]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 50])
+def test_nulls_come_last_descending(db, limit):
+    assert _walk(db, "-name", limit) == [4, 6, 1, 8, 3, 7, 5, 2]
+
+
+def test_cursor_inside_null_tail(db):
+    # A page ending on a NULL row must still lead to the remaining NULL rows
+    keyset = Keyset(SORTABLE, Item.id, "name", None, 6)
+    page = keyset.page(db.scalars(keyset.apply(select(Item))).all())
+    assert [item.id for item in page["items"]][-1] == 2
+
+    keyset = Keyset(SORTABLE, Item.id, "name", page["next_cursor"], 6)
+    assert [item.id for item in db.scalars(keyset.apply(select(Item)))] == [5, 7]
+
+
+def test_all_null_sort_column(db):
+    db.query(Item).update({Item.name: None})
+    db.commit()
+    assert _walk(db, "name", 3) == list(range(1, len(NAMES) + 1))
+    assert _walk(db, "-name", 3) == list(range(len(NAMES), 0, -1))
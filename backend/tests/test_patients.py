@@ -0,0 +1,77 @@
+def test_search_returns_hits(client, patient):
+    response = client.get("/patients/search", params={"q": "Jane Doe"})
+    assert response.status_code == 200
+    hits = response.json()
+    assert [hit["id"] for hit in hits] == [patient["id"]]
+    assert hits[0]["full_name"] == "Jane Doe"
+    assert 0 < hits[0]["score"]
+
+
+def test_search_tolerates_misspellings(client, patient):
+    hits = client.get("/patients/search", params={"q": "Jane Doo"}).json()
+    assert [hit["id"] for hit in hits] == [patient["id"]]
+
+
+def test_search_by_date_of_birth(client, patient):
+    hits = client.get("/patients/search", params={"dob": patient["date_of_birth"]}).json()
+    assert [hit["id"] for hit in hits] == [patient["id"]]
+
+
+def test_search_without_a_match(client, patient):
+    assert client.get("/patients/search", params={"q": "Zebulon Quartz"}).json() == []
+
+
+def test_search_needs_a_name_or_date_of_birth(client):
+    assert client.get("/patients/search").status_code == 400
+
+
+CSV_IMPORT = """full_name,date_of_birth,gender,contact_number,address
+Ann Lee,1990-01-02,female,555-0101,2 Oak Ave
+Bob Stone,not-a-date,male,555-0102,3 Elm St
+Cara Moss,1975-07-30,female,555-0103,4 Pine Rd
+Dan Ray,1960-12-01
+"""
+
+NDJSON_IMPORT = """{"full_name": "Eve Park", "date_of_birth": "1988-03-14", "gender": "female", "contact_number": "555-0104", "address": "5 Bay Rd"}
+{"full_name": "broken
+[1, 2]
+
+{"full_name": "Finn Hale", "date_of_birth": "1970-06-06", "gender": "male", "contact_number": "555-0105"}
+"""
+
+
+def _import(client, filename: str, content: str, content_type: str) -> dict:
+    response = client.post("/patients/import", files={"file": (filename, content.encode(), content_type)})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_csv_import_reports_bad_rows(client):
+    result = _import(client, "patients.csv", CSV_IMPORT, "text/csv")
+    assert (result["received"], result["imported"], result["failed"]) == (4, 2, 2)
+    assert result["errors_truncated"] is False
+    # Line numbers count the header as line 1
+    assert [e["line"] for e in result["errors"]] == [3, 5]
+    assert any(message.startswith("date_of_birth") for message in result["errors"][0]["errors"])
+    assert {message.split(":")[0] for message in result["errors"][1]["errors"]} == {
+        "gender", "contact_number", "address"
+    }
+
+    names = sorted(p["full_name"] for p in client.get("/patients/").json()["items"])
+    assert names == ["Ann Lee", "Cara Moss"]
+    # Bulk inserts skip the ORM hooks; imported patients must still be searchable
+    assert [hit["full_name"] for hit in client.get("/patients/search", params={"q": "Cara Moss"}).json()] == ["Cara Moss"]
+
+
+def test_ndjson_import_reports_bad_lines(client):
+    result = _import(client, "patients.ndjson", NDJSON_IMPORT, "application/x-ndjson")
+    # The blank line isn't a record
+    assert (result["received"], result["imported"], result["failed"]) == (4, 1, 3)
+    assert [e["line"] for e in result["errors"]] == [2, 3, 5]
+    assert result["errors"][1]["errors"] == ["row: Expected a JSON object"]
+    assert result["errors"][2]["errors"][0].startswith("address")
+
+
+def test_import_needs_a_known_format(client):
+    response = client.post("/patients/import", files={"file": ("patients.txt", b"", "text/plain")})
+    assert response.status_code == 400
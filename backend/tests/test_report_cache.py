@@ -0,0 +1,25 @@
+from app.models.images import Image
+from app.services.report_cache import report_cache
+
+
+def test_put_leaves_the_commit_to_the_caller(client, db, upload_image, make_png):
+    image = db.get(Image, upload_image(make_png())["id"])
+
+    report_cache.put(db, image, "v1", "stub", "findings")
+    assert report_cache.get(db, image, "v1", "stub") == "findings"
+    db.rollback()
+    assert report_cache.get(db, image, "v1", "stub") is None
+
+    report_cache.put(db, image, "v1", "stub", "findings")
+    db.commit()
+    assert report_cache.get(db, image, "v1", "stub") == "findings"
+
+
+def test_put_overwrites_an_existing_entry(client, db, upload_image, make_png):
+    image = db.get(Image, upload_image(make_png())["id"])
+    report_cache.put(db, image, "v1", "stub", "old")
+    db.commit()
+
+    report_cache.put(db, image, "v1", "stub", "new")
+    db.commit()
+    assert report_cache.get(db, image, "v1", "stub") == "new"
@@ -0,0 +1,65 @@
+import time
+
+
+def _wait_for_job(client, job_id: str, timeout: float = 10.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/ai/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def _completed_job(client, image: dict) -> dict:
+    response = client.post(f"/ai/generate-report/{image['id']}")
+    assert response.status_code == 202
+    job = _wait_for_job(client, response.json()["id"])
+    assert job["status"] == "done", job
+    assert job["report_id"] is not None
+    return job
+
+
+def test_job_runs_to_done(client, upload_image, make_png):
+    image = upload_image(make_png())
+    job = _completed_job(client, image)
+
+    report = client.get(f"/reports/{job['report_id']}").json()
+    assert report["image_id"] == image["id"]
+    assert report["patient_id"] == image["patient_id"]
+
+
+def test_cached_findings_answer_without_a_job_run(client, upload_image, make_png):
+    image = upload_image(make_png())
+    first = _completed_job(client, image)
+
+    response = client.post(f"/ai/generate-report/{image['id']}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "done"
+    assert response.json()["report_id"] != first["report_id"]
+
+
+def test_delete_report_keeps_its_job(client, upload_image, make_png):
+    image = upload_image(make_png())
+    job = _completed_job(client, image)
+
+    assert client.delete(f"/reports/{job['report_id']}").status_code == 204
+
+    job = client.get(f"/ai/jobs/{job['id']}").json()
+    assert job["status"] == "done"
+    assert job["report_id"] is None
+
+
+def test_delete_image_removes_its_jobs(client, upload_image, make_png):
+    image = upload_image(make_png())
+    job = _completed_job(client, image)
+
+    assert client.delete(f"/images/{image['id']}").status_code == 200
+
+    assert client.get(f"/ai/jobs/{job['id']}").status_code == 404
+    # The report outlives the image, unlinked from it
+    report = client.get(f"/reports/{job['report_id']}").json()
+    assert report["image_id"] is None
+
+
+def test_generate_report_for_missing_image(client):
+    assert client.post("/ai/generate-report/999").status_code == 404
@@ -0,0 +1,81 @@
+import io
+import os
+
+import numpy as np
+from pydicom.dataset import FileDataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, SecondaryCaptureImageStorage, generate_uid
+
+from app.core.uploads import INCOMING_DIR
+from app.models.blobs import Blob
+from app.models.images import Image
+
+
+def make_dicom(study_uid: str, series_uid: str, instance_number: int) -> bytes:
+    sop_uid = generate_uid()
+    meta = FileMetaDataset()
+    meta.MediaStorageSOPClassUID = SecondaryCaptureImageStorage
+    meta.MediaStorageSOPInstanceUID = sop_uid
+    meta.TransferSyntaxUID = ExplicitVRLittleEndian
+
+    ds = FileDataset("instance.dcm", {}, file_meta=meta, preamble=b"\0" * 128)
+    ds.is_little_endian = True
+    ds.is_implicit_VR = False
+    ds.SOPClassUID = SecondaryCaptureImageStorage
+    ds.SOPInstanceUID = sop_uid
+    ds.StudyInstanceUID = study_uid
+    ds.SeriesInstanceUID = series_uid
+    ds.InstanceNumber = instance_number
+    ds.Modality = "CT"
+    ds.Rows = ds.Columns = 32
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = "MONOCHROME2"
+    ds.BitsAllocated = 16
+    ds.BitsStored = 12
+    ds.HighBit = 11
+    ds.PixelRepresentation = 0
+    pixels = np.add.outer(np.arange(32), np.arange(32)) * (instance_number * 8)
+    ds.PixelData = pixels.astype("<u2").tobytes()
+
+    buffer = io.BytesIO()
+    ds.save_as(buffer)
+    return buffer.getvalue()
+
+
+def _post_series(client, patient, files):
+    return client.post(
+        "/images/series",
+        data={"patient_id": patient["id"]},
+        files=[("files", (name, content, content_type)) for name, content, content_type in files],
+    )
+
+
+def test_series_upload_orders_instances(client, patient):
+    study_uid, series_uid = generate_uid(), generate_uid()
+    response = _post_series(client, patient, [
+        (f"{n}.dcm", make_dicom(study_uid, series_uid, n), "application/dicom") for n in (3, 1, 2)
+    ])
+    assert response.status_code == 200, response.text
+    images = response.json()
+    assert [i["instance_number"] for i in images] == [1, 2, 3]
+    assert {i["mime_type"] for i in images} == {"application/dicom"}
+    assert {i["series_instance_uid"] for i in images} == {series_uid}
+    # Slices of one study look alike but aren't duplicates of each other
+    assert {i["duplicate_of_id"] for i in images} == {None}
+
+    series = client.get(f"/images/series/{series_uid}").json()
+    assert [i["id"] for i in series] == [i["id"] for i in images]
+
+
+def test_unrecognised_file_rolls_back_the_series(client, db, patient):
+    study_uid, series_uid = generate_uid(), generate_uid()
+    incoming = set(os.listdir(INCOMING_DIR))
+
+    response = _post_series(client, patient, [
+        ("1.dcm", make_dicom(study_uid, series_uid, 1), "application/dicom"),
+        ("notes.bin", b"not an image at all", "application/octet-stream"),
+    ])
+    assert response.status_code == 415
+
+    assert db.query(Image).count() == 0
+    assert db.query(Blob).count() == 0
+    assert set(os.listdir(INCOMING_DIR)) == incoming
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import time
+
+from app.core.uploads import INCOMING_DIR, sweep_sessions
+
+
+def _start(client, content: bytes, filename: str = "scan.png") -> str:
+    response = client.post("/images/uploads", json={"filename": filename, "size": len(content)})
+    assert response.status_code == 201
+    assert response.json()["offset"] == 0
+    return response.json()["upload_id"]
+
+
+def _send(client, upload_id: str, offset: int, chunk: bytes):
+    return client.patch(f"/images/uploads/{upload_id}", content=chunk, headers={"Upload-Offset": str(offset)})
+
+
+def test_resumable_upload_in_chunks(client, patient, make_png):
+    content = make_png()
+    upload_id = _start(client, content)
+    half = len(content) // 2
+
+    response = _send(client, upload_id, 0, content[:half])
+    assert response.status_code == 200
+    assert response.json()["offset"] == half
+    # A client that lost the response asks where to resume
+    assert client.get(f"/images/uploads/{upload_id}").json()["offset"] == half
+
+    assert _send(client, upload_id, half, content[half:]).json()["offset"] == len(content)
+
+    response = client.post(f"/images/uploads/{upload_id}/complete", data={"patient_id": patient["id"]})
+    assert response.status_code == 200, response.text
+    assert response.json()["filename"] == "scan.png"
+    assert client.get(f"/images/uploads/{upload_id}").status_code == 404
+
+
+def test_chunk_at_the_wrong_offset_is_rejected(client, make_png):
+    content = make_png()
+    upload_id = _start(client, content)
+    _send(client, upload_id, 0, content[:10])
+
+    assert _send(client, upload_id, 0, content[:10]).status_code == 409  # resent
+    assert _send(client, upload_id, 20, content[20:30]).status_code == 409  # skipped ahead
+    assert client.get(f"/images/uploads/{upload_id}").json()["offset"] == 10
+
+
+def test_chunks_past_the_declared_size_are_rejected(client, make_png):
+    content = make_png()
+    upload_id = _start(client, content)
+    assert _send(client, upload_id, 0, content + b"extra").status_code == 413
+
+
+def test_incomplete_upload_cannot_be_completed(client, patient, make_png):
+    content = make_png()
+    upload_id = _start(client, content)
+    _send(client, upload_id, 0, content[:10])
+
+    response = client.post(f"/images/uploads/{upload_id}/complete", data={"patient_id": patient["id"]})
+    assert response.status_code == 409
+    assert client.get(f"/images/uploads/{upload_id}").json()["offset"] == 10
+
+
+def test_unknown_upload_id(client):
+    assert client.get("/images/uploads/not-an-id").status_code == 404
+    assert client.get(f"/images/uploads/{'0' * 32}").status_code == 404
+
+
+def test_abandoned_sessions_expire(client, make_png):
+    content = make_png()
+    stale, fresh = _start(client, content), _start(client, content)
+    _send(client, stale, 0, content[:10])
+
+    an_hour_ago = time.time() - 3600
+    for name in (f"{stale}.part", f"{stale}.json"):
+        os.utime(os.path.join(INCOMING_DIR, name), (an_hour_ago, an_hour_ago))
+
+    assert asyncio.run(sweep_sessions(ttl=1800)) == 2
+
+    assert client.get(f"/images/uploads/{stale}").status_code == 404
+    assert client.get(f"/images/uploads/{fresh}").status_code == 200
+    assert not os.path.exists(os.path.join(INCOMING_DIR, f"{stale}.part"))